@@ -0,0 +1,86 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.functional import classproperty
+from rest_framework.views import APIView
+
+
+class AsyncAPIViewMixin:
+    """
+    Async-варианты обработчиков для APIView и ViewSet DRF.
+
+    Рядом с синхронным обработчиком объявляется async-вариант с префиксом a:
+    alist, aretrieve для действий ViewSet, aget, apost для методов APIView.
+    При ASYNC_VIEWS (включается в asgi.py) view становится асинхронным:
+    вызываются async-варианты, а действия без них и initial() (аутентификация,
+    права, троттлинг — там есть запросы к базе) выполняются через sync_to_async.
+    Без ASYNC_VIEWS работают синхронные обработчики, как в обычном DRF:
+    под WSGI async-view обходится дороже из-за async_to_sync на каждый запрос.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return settings.ASYNC_VIEWS
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        # ViewSetMixin.as_view не помечает view как корутину, APIView — помечает
+        return markcoroutinefunction(view) if cls.view_is_async else view
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            method = request.method.lower()
+            if method in self.http_method_names:
+                handler = getattr(self, method, self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            name = getattr(self, 'action', None) or method
+            async_handler = getattr(self, f'a{name}', None) if handler is not self.http_method_not_allowed else None
+            if async_handler is not None:
+                response = await async_handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def afilter_queryset(self, queryset):
+        """filter_queryset в потоке: django-filter проверяет ModelChoice-фильтры запросом к базе."""
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self):
+        """get_object для GenericAPIView через async ORM: те же фильтры, 404 и проверка прав."""
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncAPIView(AsyncAPIViewMixin, APIView):
+    """APIView с async-вариантами обработчиков."""
@@ -0,0 +1,297 @@
+"""
+Детерминированный синтетический набор данных маркетплейса для бенчмарков.
+
+Одинаковые scale и seed дают одинаковые данные: все случайные значения
+берутся из random.Random(seed), даты отсчитываются от фиксированной точки.
+Записи вставляются через bulk_create пачками, сигналы моделей не срабатывают.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from capybara_categories.models import Category, SubCategory
+from capybara_countries.models import City, Country
+from capybara_currencies.models import Currency
+from capybara_products.models import Favorite, Product, ProductImage, ProductView
+from capybara_products.pricing import to_base
+from capybara_products.viewstats import compact_views
+from capybara_tg_user.models import TelegramUser, UserRating
+
+
+SCALES = {
+    '10k': {'products': 10_000, 'users': 1_000},
+    '100k': {'products': 100_000, 'users': 10_000},
+    '1m': {'products': 1_000_000, 'users': 100_000},
+}
+
+# Производные объёмы на единицу масштаба
+FAVORITES_PER_PRODUCT = 1
+VIEWS_PER_PRODUCT = 2
+RATINGS_PER_USER = 3
+
+BATCH_SIZE = 5000
+
+ANCHOR = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+PERIOD = timedelta(days=365)
+
+USERNAME_PREFIX = 'bench_'
+TELEGRAM_ID_BASE = 9_000_000_000
+
+# Доли статусов объявлений: опубликовано, на модерации, черновик, архив
+STATUS_WEIGHTS = ((3, 80), (2, 10), (1, 5), (4, 5))
+
+COUNTRIES = {
+    'Benchland': ['Bench City', 'Bench Port', 'Bench Hills', 'Bench Lake', 'Bench Valley'],
+    'Loadovia': ['Loadgrad', 'Stress Town', 'Peak Village', 'Burst Bay', 'Latency Falls'],
+    'Perfistan': ['Profile City', 'Flame Harbor', 'Trace Point', 'Sample Ridge', 'Cache Springs'],
+}
+
+CURRENCIES = (
+    ('USD', 'Dollar', Decimal('1')),
+    ('EUR', 'Euro', Decimal('0.92')),
+    ('ARS', 'Peso', Decimal('1150')),
+)
+
+CATEGORIES = {
+    'Bench Electronics': ['Phones', 'Laptops', 'Audio', 'Cameras'],
+    'Bench Home': ['Furniture', 'Kitchen', 'Decor', 'Garden'],
+    'Bench Clothes': ['Shoes', 'Jackets', 'Dresses', 'Accessories'],
+    'Bench Kids': ['Toys', 'Strollers', 'Books', 'School'],
+    'Bench Sport': ['Bikes', 'Fitness', 'Camping', 'Winter'],
+    'Bench Auto': ['Tires', 'Parts', 'Audio systems', 'Tools'],
+    'Bench Hobby': ['Music', 'Collecting', 'Crafts', 'Games'],
+    'Bench Services': ['Repair', 'Lessons', 'Delivery', 'Cleaning'],
+}
+
+ADJECTIVES = (
+    'red', 'blue', 'green', 'black', 'white', 'vintage', 'new', 'used', 'compact', 'large',
+    'premium', 'cheap', 'rare', 'classic', 'modern', 'handmade', 'portable', 'wooden', 'steel', 'smart',
+)
+NOUNS = (
+    'phone', 'laptop', 'chair', 'table', 'lamp', 'jacket', 'bike', 'camera', 'guitar', 'sofa',
+    'watch', 'kettle', 'stroller', 'tent', 'speaker', 'monitor', 'drill', 'mirror', 'boots', 'backpack',
+    'tablet', 'printer', 'heater', 'skates', 'blender', 'console', 'rug', 'shelf', 'scooter', 'helmet',
+    'vase', 'piano', 'drone', 'router', 'clock', 'desk', 'bed', 'fridge', 'oven', 'radio',
+    'sneakers', 'coat', 'bag', 'tripod', 'lens', 'keyboard', 'mouse', 'headphones', 'microwave', 'fan',
+)
+
+
+def search_terms():
+    """Пары слов, из которых составлены заголовки; используются в сценарии поиска."""
+    return [f'{adjective} {noun}' for adjective in ADJECTIVES for noun in NOUNS]
+
+
+def is_seeded():
+    return TelegramUser.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Временно отключает auto_now/auto_now_add, чтобы вставить даты из генератора."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+class MarketplaceDataset:
+    """
+    Генератор набора данных заданного масштаба.
+
+    Создаёт справочники (страны, города, валюты, категории), пользователей
+    с оценками, объявления с изображениями, избранное и просмотры.
+    """
+
+    def __init__(self, scale, seed=42, log=None):
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale {scale!r}, expected one of {', '.join(SCALES)}")
+        self.scale = scale
+        self.seed = seed
+        self.size = SCALES[scale]
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+    def moment(self):
+        return ANCHOR + timedelta(seconds=self.rng.randrange(int(PERIOD.total_seconds())))
+
+    def generate(self):
+        with explicit_timestamps(
+            _field(Product, 'create_at'), _field(Product, 'update_at'),
+            _field(Favorite, 'create_at'), _field(ProductView, 'created_at'),
+            _field(UserRating, 'created_at'), _field(UserRating, 'updated_at'),
+        ):
+            self.create_reference_data()
+            users = self.create_users()
+            self.create_ratings(users)
+            published = self.create_products(users)
+            self.create_favorites(users, published)
+            self.create_views(users, published)
+            self.update_favorites_counts()
+        # Просмотры датированы прошлым: свёртка заполняет дневные агрегаты и views_count
+        self.log(f"Compacted view days: {compact_views()}")
+        return self.summary()
+
+    def create_reference_data(self):
+        self.currencies = []
+        for order, (code, name, rate) in enumerate(CURRENCIES):
+            currency, _ = Currency.objects.get_or_create(
+                code=code, defaults={'name': name, 'order': order, 'rate': rate}
+            )
+            self.currencies.append(currency)
+
+        self.cities = []
+        for name, city_names in COUNTRIES.items():
+            country, _ = Country.objects.get_or_create(name=name)
+            country.currencies.add(*self.currencies)
+            for city_name in city_names:
+                city, _ = City.objects.get_or_create(name=city_name, country=country)
+                self.cities.append(city)
+
+        self.subcategories = []
+        for order, (name, sub_names) in enumerate(CATEGORIES.items()):
+            category, _ = Category.objects.get_or_create(name=name, defaults={'order': order})
+            for sub_order, sub_name in enumerate(sub_names):
+                sub, _ = SubCategory.objects.get_or_create(
+                    name=f'{name} {sub_name}', defaults={'category': category, 'order': sub_order}
+                )
+                self.subcategories.append(sub)
+        self.log(f"Reference data: {len(self.cities)} cities, {len(self.subcategories)} subcategories")
+
+    def create_users(self):
+        users = []
+        for index in range(self.size['users']):
+            city = self.rng.choice(self.cities)
+            users.append(TelegramUser(
+                username=f'{USERNAME_PREFIX}{index:07d}',
+                telegram_id=TELEGRAM_ID_BASE + index,
+                first_name=f'Bench {index}',
+                password='!',
+                email='',
+                language=self.rng.choice(('ru', 'en', 'es')),
+                country_id=city.country_id,
+                city=city,
+                date_joined=self.moment(),
+            ))
+        users = self.bulk_create(TelegramUser, users)
+        self.log(f"Users: {len(users)}")
+        return users
+
+    def create_ratings(self, users):
+        ratings = []
+        for user in users:
+            # Берём на одного больше, чтобы после исключения самого пользователя хватило оценок
+            targets = [target for target in self.rng.sample(users, RATINGS_PER_USER + 1) if target is not user]
+            for target in targets[:RATINGS_PER_USER]:
+                created = self.moment()
+                ratings.append(UserRating(
+                    from_user=user, to_user=target, rating=self.rng.randint(1, 5),
+                    created_at=created, updated_at=created,
+                ))
+        self.bulk_create(UserRating, ratings)
+        self.log(f"Ratings: {len(ratings)}")
+
+    def create_products(self, users):
+        """Создаёт объявления пачками и возвращает id опубликованных."""
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        published = []
+        created = 0
+
+        for start in range(0, self.size['products'], BATCH_SIZE):
+            batch = []
+            for index in range(start, min(start + BATCH_SIZE, self.size['products'])):
+                author = self.rng.choice(users)
+                sub = self.rng.choice(self.subcategories)
+                currency = self.rng.choice(self.currencies)
+                price = self.rng.randint(1, 5000) * 10
+                create_at = self.moment()
+                title = f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)} {index}'
+                batch.append(Product(
+                    author=author,
+                    category_id=sub.category_id,
+                    subcategory=sub,
+                    title=title.capitalize(),
+                    description=f'{title} in good condition, item number {index}',
+                    country_id=author.country_id,
+                    city_id=author.city_id,
+                    price=price,
+                    price_base=to_base(price, currency.rate),
+                    currency=currency,
+                    status=self.rng.choices(statuses, weights)[0],
+                    is_premium=self.rng.random() < 0.05,
+                    create_at=create_at,
+                    update_at=create_at + timedelta(seconds=self.rng.randrange(30 * 86400)),
+                ))
+            batch = self.bulk_create(Product, batch)
+            self.bulk_create(ProductImage, [
+                ProductImage(product=product, image=f'products/bench/{product.pk}.webp') for product in batch
+            ])
+            published.extend(product.pk for product in batch if product.status == 3)
+            created += len(batch)
+            self.log(f"Products: {created}/{self.size['products']}")
+        return published
+
+    def create_favorites(self, users, published):
+        per_user = max(1, FAVORITES_PER_PRODUCT * self.size['products'] // len(users))
+        self.create_pairs(Favorite, users, published, per_user, 'create_at')
+
+    def create_views(self, users, published):
+        per_user = max(1, VIEWS_PER_PRODUCT * self.size['products'] // len(users))
+        self.create_pairs(ProductView, users, published, per_user, 'created_at', day_field='day')
+
+    def create_pairs(self, model, users, published, per_user, date_field, day_field=None):
+        batch, total = [], 0
+        for user in users:
+            for product_id in self.rng.sample(published, min(per_user, len(published))):
+                moment = self.moment()
+                dates = {date_field: moment, day_field: moment.date()} if day_field else {date_field: moment}
+                batch.append(model(user=user, product_id=product_id, **dates))
+            if len(batch) >= BATCH_SIZE:
+                total += len(self.bulk_create(model, batch))
+                batch = []
+        total += len(self.bulk_create(model, batch))
+        self.log(f"{model._meta.verbose_name_plural}: {total}")
+
+    def update_favorites_counts(self):
+        counts = (
+            Favorite.objects.filter(product=OuterRef('pk'))
+            .order_by().values('product').annotate(total=Count('id')).values('total')
+        )
+        with transaction.atomic():
+            Product.objects.filter(author__username__startswith=USERNAME_PREFIX).update(
+                favorites_count=Coalesce(Subquery(counts), Value(0))
+            )
+
+    def bulk_create(self, model, objects):
+        if not objects:
+            return []
+        with transaction.atomic():
+            return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+    def summary(self):
+        bench_users = TelegramUser.objects.filter(username__startswith=USERNAME_PREFIX)
+        products = Product.objects.filter(author__in=bench_users)
+        return {
+            'scale': self.scale,
+            'seed': self.seed,
+            'database': connection.vendor,
+            'users': bench_users.count(),
+            'products': products.count(),
+            'published': products.filter(status=3).count(),
+            'favorites': Favorite.objects.filter(user__in=bench_users).count(),
+            'views': ProductView.objects.filter(user__in=bench_users).count(),
+            'ratings': UserRating.objects.filter(from_user__in=bench_users).count(),
+        }
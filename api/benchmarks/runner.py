@@ -0,0 +1,186 @@
+"""
+Сценарии нагрузки на API через тестовый клиент Django и сбор статистики.
+
+Каждый сценарий — функция (runner, rng), которая делает несколько запросов
+через runner.request(). Для каждого запроса записываются время ответа,
+количество SQL-запросов и статус.
+"""
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.queries import capture_queries
+from api.testing import ASGIClient, allowed_host, sign_init_data
+from capybara_categories.models import Category
+from capybara_products.models import Product
+from capybara_tg_user.models import TelegramUser
+
+from .dataset import CATEGORIES, TELEGRAM_ID_BASE, USERNAME_PREFIX, search_terms
+
+
+# Токен бота только для подписи initData в сценарии входа
+BENCH_BOT_TOKEN = '0:bench-token'
+
+FEED_SCROLL_PAGES = 5
+SAMPLE_SIZE = 1000
+
+
+class BenchmarkRunner:
+    """
+    Выполняет сценарии и копит замеры по каждому из них.
+
+    При ASYNC_VIEWS запросы идут через ASGI-обработчик (ASGIClient).
+    """
+
+    def __init__(self, seed=42):
+        self.rng = random.Random(seed)
+        self.stack = 'asgi' if settings.ASYNC_VIEWS else 'wsgi'
+        self.client_class = ASGIClient if settings.ASYNC_VIEWS else Client
+        self.samples = {}
+        self.client_kwargs = {'HTTP_HOST': allowed_host(), 'raise_request_exception': False}
+
+        users = TelegramUser.objects.filter(username__startswith=USERNAME_PREFIX).order_by('pk')
+        self.users = list(users.values_list('pk', 'telegram_id', 'username')[:SAMPLE_SIZE])
+        self.products = list(
+            Product.objects.filter(status=3, author__username__startswith=USERNAME_PREFIX)
+            .order_by('pk').values_list('pk', flat=True)[:SAMPLE_SIZE]
+        )
+        self.categories = list(Category.objects.filter(name__in=CATEGORIES).values_list('pk', flat=True))
+        self.search_terms = search_terms()
+        self._clients = {}
+
+    def anonymous(self):
+        return self.client_class(**self.client_kwargs)
+
+    def client_for(self, user_id):
+        """Клиент с JWT в cookie, как после входа через Telegram."""
+        client = self._clients.get(user_id)
+        if client is None:
+            client = self.client_class(**self.client_kwargs)
+            user = TelegramUser.objects.get(pk=user_id)
+            client.cookies['access_token'] = str(RefreshToken.for_user(user).access_token)
+            self._clients[user_id] = client
+        return client
+
+    def request(self, scenario, client, method, path, **kwargs):
+        started = time.perf_counter()
+        with capture_queries() as stats:
+            response = getattr(client, method)(path, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.samples.setdefault(scenario, []).append((elapsed, stats.count, response.status_code))
+        return response
+
+    def run(self, scenarios, iterations, warmup=0):
+        for name in scenarios:
+            scenario = SCENARIOS[name]
+            for _ in range(warmup):
+                scenario(self, self.rng)
+            self.samples.pop(name, None)
+            for _ in range(iterations):
+                scenario(self, self.rng)
+        return self.report()
+
+    def report(self):
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    return statistics.quantiles(ordered, n=100, method='inclusive')[round(fraction * 100) - 1]
+
+
+def summarize(samples):
+    latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+    queries = [count for _, count, _ in samples]
+    statuses = {}
+    for _, _, code in samples:
+        statuses[str(code)] = statuses.get(str(code), 0) + 1
+    return {
+        'requests': len(samples),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_mean': round(statistics.fmean(queries), 2),
+        'queries_max': max(queries),
+        'statuses': statuses,
+    }
+
+
+def feed_scroll(runner, rng):
+    """Пользователь открывает ленту и листает несколько страниц."""
+    client = runner.client_for(rng.choice(runner.users)[0])
+    response = runner.request('feed_scroll', client, 'get', '/products/v1/feed/')
+    for _ in range(FEED_SCROLL_PAGES - 1):
+        cursor = response.json().get('next') if response.status_code == 200 else None
+        if not cursor:
+            break
+        response = runner.request('feed_scroll', client, 'get', '/products/v1/feed/?' + urlencode({'cursor': cursor}))
+
+
+def search(runner, rng):
+    """Анонимный поиск по словам из заголовков внутри категории."""
+    params = {'search': rng.choice(runner.search_terms), 'category': rng.choice(runner.categories)}
+    runner.request('search', runner.anonymous(), 'get', '/products/v1/?' + urlencode(params))
+
+
+def detail(runner, rng):
+    """Карточка объявления глазами авторизованного пользователя."""
+    client = runner.client_for(rng.choice(runner.users)[0])
+    runner.request('detail', client, 'get', f'/products/v1/{rng.choice(runner.products)}/')
+
+
+def favorite_toggle(runner, rng):
+    """Добавление объявления в избранное и удаление из него."""
+    client = runner.client_for(rng.choice(runner.users)[0])
+    path = f'/products/v1/favorites/{rng.choice(runner.products)}/toggle/'
+    runner.request('favorite_toggle', client, 'post', path)
+    runner.request('favorite_toggle', client, 'delete', path)
+
+
+def login_burst(runner, rng):
+    """Серия входов через Telegram Mini App подряд."""
+    with override_settings(TELEGRAM_BOT_TOKEN=BENCH_BOT_TOKEN):
+        for _ in range(10):
+            _, telegram_id, username = rng.choice(runner.users)
+            init_data = sign_init_data({
+                'auth_date': '1735689600',
+                'query_id': f'bench{telegram_id - TELEGRAM_ID_BASE}',
+                'user': json.dumps({'id': telegram_id, 'username': username}),
+            }, BENCH_BOT_TOKEN)
+            runner.request(
+                'login_burst', runner.anonymous(), 'post', '/users/v1/auth/telegram/',
+                data={'initData': init_data}, content_type='application/json',
+            )
+
+
+def user_profile(runner, rng):
+    """Профиль продавца с его объявлениями и рейтингом."""
+    client = runner.client_for(rng.choice(runner.users)[0])
+    runner.request('user_profile', client, 'get', f'/users/v1/{rng.choice(runner.users)[0]}/')
+
+
+def categories(runner, rng):
+    """Справочник категорий и дерево категорий со счётчиками."""
+    client = runner.anonymous()
+    runner.request('categories', client, 'get', '/categories/v1/')
+    runner.request('categories', client, 'get', '/categories/v1/tree/')
+
+
+SCENARIOS = {
+    'feed_scroll': feed_scroll,
+    'search': search,
+    'detail': detail,
+    'favorite_toggle': favorite_toggle,
+    'login_burst': login_burst,
+    'user_profile': user_profile,
+    'categories': categories,
+}
@@ -0,0 +1,16 @@
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.urls, deploy=True)
+def openapi_schema_check(app_configs, **kwargs):
+    """check --deploy: файлы схемы собраны и совпадают с текущей схемой API."""
+    from .schema import stale_schema_files
+
+    return [
+        Error(
+            f"OpenAPI schema file {path} is missing or out of date.",
+            hint="Run manage.py generate_schema during the deploy.",
+            id='api.E001',
+        )
+        for path in stale_schema_files()
+    ]
@@ -0,0 +1,79 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет накладные расходы на соединение с базой в цикле запроса: "
+        "новое соединение на каждый запрос, постоянное соединение (CONN_MAX_AGE) "
+        "и постоянное с проверкой (CONN_HEALTH_CHECKS), либо выдачу из пула psycopg. "
+        "Каждая итерация повторяет то, что Django делает на request_started/request_finished."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help="Запросов на режим (по умолчанию 200)")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Алиас базы")
+        parser.add_argument('--query', default='SELECT 1', help="Запрос, выполняемый в каждой итерации")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be positive")
+
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        saved = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        pooled = bool(settings_dict.get('OPTIONS', {}).get('pool'))
+
+        if pooled:
+            # С пулом Django не допускает постоянных соединений: close() возвращает соединение в пул
+            modes = [('connection from psycopg pool', 0, False)]
+        else:
+            modes = [
+                ('new connection per request', 0, False),
+                ('persistent (CONN_MAX_AGE)', 600, False),
+                ('persistent + health checks', 600, True),
+            ]
+
+        self.stdout.write(f"Database: {connection.vendor} {settings_dict.get('HOST') or settings_dict.get('NAME')}")
+        results = {}
+        try:
+            for label, max_age, health_checks in modes:
+                connection.close()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                timings = self.measure(connection, options['query'], options['iterations'])
+                results[label] = timings
+                self.stdout.write(
+                    f"{label:<32} mean {statistics.fmean(timings):7.3f} ms  "
+                    f"p50 {statistics.median(timings):7.3f} ms  p95 {self.p95(timings):7.3f} ms"
+                )
+        finally:
+            connection.close()
+            settings_dict.update(saved)
+
+        if len(results) > 1:
+            baseline = statistics.fmean(results['new connection per request'])
+            best = statistics.fmean(results['persistent (CONN_MAX_AGE)'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Connection overhead per request: {baseline - best:.3f} ms "
+                f"({baseline / best:.1f}x slower without persistent connections)"
+            ))
+
+    def measure(self, connection, query, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            close_old_connections()  # request_started
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+            close_old_connections()  # request_finished
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    @staticmethod
+    def p95(values):
+        return statistics.quantiles(values, n=20, method='inclusive')[-1] if len(values) > 1 else values[0]
@@ -0,0 +1,108 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmarks.dataset import is_seeded
+from api.benchmarks.runner import SCENARIOS, BenchmarkRunner
+from capybara_products.models import Product
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогоняет сценарии нагрузки (лента, поиск, карточка, избранное, вход, профиль, "
+        "категории) через тестовый клиент на данных seed_marketplace. Печатает p50/p95/p99 "
+        "и число SQL-запросов на запрос, сохраняет результат в JSON и сравнивает с прошлым. "
+        "С ASYNC_VIEWS=1 запросы идут через ASGI и async-варианты view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+            help="Сценарий (можно указать несколько раз, по умолчанию все)",
+        )
+        parser.add_argument('--iterations', type=int, default=100, help="Повторов сценария (по умолчанию 100)")
+        parser.add_argument('--warmup', type=int, default=5, help="Повторов для прогрева кэшей (по умолчанию 5)")
+        parser.add_argument('--seed', type=int, default=42, help="Зерно выбора пользователей и объявлений")
+        parser.add_argument('--output', help="Куда сохранить результаты (JSON)")
+        parser.add_argument('--compare', help="JSON с прошлыми результатами для сравнения")
+
+    def handle(self, *args, **options):
+        if not is_seeded():
+            raise CommandError("Benchmark dataset not found, run seed_marketplace first")
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError("--iterations must be positive and --warmup non-negative")
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        scenarios = options['scenarios'] or list(SCENARIOS)
+        runner = BenchmarkRunner(seed=options['seed'])
+        results = runner.run(scenarios, options['iterations'], warmup=options['warmup'])
+
+        report = {
+            'meta': {
+                'commit': current_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'products': Product.objects.count(),
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+                'stack': runner.stack,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'scenarios': results,
+        }
+
+        self.print_table(results, baseline)
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {path}"))
+
+    def print_table(self, results, baseline):
+        previous = (baseline or {}).get('scenarios', {})
+        self.stdout.write(
+            f"{'scenario':<16} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}  statuses"
+        )
+        for name, row in results.items():
+            line = (
+                f"{name:<16} {row['requests']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['queries_mean']:>8.1f}  {row['statuses']}"
+            )
+            old = previous.get(name)
+            if old:
+                line += (
+                    f"  | p95 {self.delta(old['p95_ms'], row['p95_ms'])}, "
+                    f"queries {old['queries_mean']:.1f} -> {row['queries_mean']:.1f}"
+                )
+            self.stdout.write(line)
+
+    @staticmethod
+    def delta(old, new):
+        if not old:
+            return f"{new:.2f}ms"
+        return f"{(new - old) / old * 100:+.0f}%"
@@ -0,0 +1,78 @@
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_CODE = 'import django; django.setup()'
+
+
+def parse_importtime(stderr):
+    """Строки python -X importtime: [(имя, собственное мкс, с вложенными мкс, уровень вложенности)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(own), int(cumulative), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Время импорта при холодном старте процесса (python -X importtime): по умолчанию "
+        "django.setup(), который выполняет каждая команда manage.py и каждый воркер. "
+        "Печатает медиану по запускам и самые дорогие пакеты верхнего уровня. Падает, если "
+        "медиана больше STARTUP_IMPORT_BUDGET_MS или при старте импортирован пакет из "
+        "STARTUP_LAZY_IMPORTS — такие пакеты должны загружаться при первом использовании."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Запусков интерпретатора (по умолчанию 5)")
+        parser.add_argument('--code', default=DEFAULT_CODE, help=f"Что импортировать (по умолчанию «{DEFAULT_CODE}»)")
+        parser.add_argument('--top', type=int, default=15, help="Сколько самых дорогих пакетов показать")
+        parser.add_argument(
+            '--budget-ms', type=float, default=settings.STARTUP_IMPORT_BUDGET_MS,
+            help=f"Бюджет медианы, мс (по умолчанию {settings.STARTUP_IMPORT_BUDGET_MS}); 0 — не проверять",
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be positive")
+
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        # Первый запуск может компилировать .pyc — он не входит в замер
+        runs = [self.run(options['code'], env) for _ in range(options['repeat'] + 1)][1:]
+        totals = [sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000 for rows in runs]
+        median = statistics.median(totals)
+        rows = runs[totals.index(min(totals, key=lambda total: abs(total - median)))]
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  package")
+        top = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)[:options['top']]
+        for name, own, cumulative, _ in top:
+            self.stdout.write(f"{cumulative / 1000:>14.1f} {own / 1000:>9.1f}  {name}")
+        self.stdout.write(
+            f"Import time: median {median:.1f} ms, min {min(totals):.1f} ms, max {max(totals):.1f} ms "
+            f"over {len(totals)} runs, {len(rows)} modules"
+        )
+
+        imported = {name for name, _, _, _ in rows}
+        eager = [package for package in settings.STARTUP_LAZY_IMPORTS if package in imported]
+        if eager:
+            raise CommandError(f"Imported at startup, must be lazy: {', '.join(eager)}")
+        if options['budget_ms'] and median > options['budget_ms']:
+            raise CommandError(f"Import time {median:.1f} ms exceeds the budget of {options['budget_ms']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS("Startup import budget OK"))
+
+    def run(self, code, env):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Import failed:\n{result.stderr.splitlines()[-1] if result.stderr else ''}")
+        return parse_importtime(result.stderr)
@@ -0,0 +1,85 @@
+import itertools
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api import renderers
+from api.renderers import FastJSONRenderer, JSONFragment
+from api.testing import allowed_host
+from capybara_categories.tree import build_category_tree
+from capybara_products.models import Product
+from capybara_products.serializers import ProductListFastSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает JSONRenderer и FastJSONRenderer на списке объявлений и дереве "
+        "категорий, в том числе со вставкой заранее закодированных фрагментов. "
+        "Проверяет, что все варианты дают одинаковые байты."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help="Объявлений в списке (по умолчанию 50)")
+        parser.add_argument('--repeat', type=int, default=500, help="Количество повторов (по умолчанию 500)")
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError("--rows and --repeat must be positive")
+
+        backend = 'orjson %s' % renderers.orjson.__version__ if renderers.orjson else 'json (orjson not installed)'
+        fragments = 'orjson.Fragment' if renderers.ORJSON_FRAGMENT else 'placeholder splicing'
+        self.stdout.write(f"FastJSONRenderer backend: {backend}, fragments: {fragments}")
+
+        stock = JSONRenderer()
+        fast = FastJSONRenderer()
+
+        products = self.product_list(options['rows'])
+        product_fragments = [JSONFragment(stock.render(item)) for item in products]
+        tree = json.loads(build_category_tree()[1])
+        tree_fragments = [JSONFragment(stock.render(item)) for item in tree]
+
+        scenarios = [
+            (f'product list ({len(products)} rows)', [
+                ('JSONRenderer', lambda: stock.render(products)),
+                ('FastJSONRenderer', lambda: fast.render(products)),
+                ('FastJSONRenderer + fragments', lambda: fast.render(product_fragments)),
+            ]),
+            (f'category tree ({len(tree)} categories)', [
+                ('JSONRenderer', lambda: stock.render(tree)),
+                ('FastJSONRenderer', lambda: fast.render(tree)),
+                ('FastJSONRenderer + fragments', lambda: fast.render(tree_fragments)),
+            ]),
+        ]
+
+        for title, variants in scenarios:
+            self.stdout.write(title)
+            expected = variants[0][1]()
+            for name, func in variants:
+                if func() != expected:
+                    raise CommandError(f"{name} output differs from JSONRenderer for {title}")
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    func()
+                elapsed = (time.perf_counter() - started) / options['repeat'] * 1e6
+                self.stdout.write(f"  {name:<30} {elapsed:10.1f} us/render")
+
+        self.stdout.write(self.style.SUCCESS("All renderers produced identical output"))
+
+    def product_list(self, rows):
+        request = Request(RequestFactory().get('/products/v1/', HTTP_HOST=allowed_host()))
+        request.user = AnonymousUser()
+
+        queryset = (
+            Product.objects.order_by('pk')
+            .values(*ProductListFastSerializer.fields)[:rows]
+        )
+        data = ProductListFastSerializer(request).serialize(queryset)
+        if not data:
+            raise CommandError("No products to render")
+        # На маленькой базе повторяем объявления до нужного размера страницы
+        return list(itertools.islice(itertools.cycle(data), rows))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.schema import stale_schema_files, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает OpenAPI-схему и пишет её в OPENAPI_SCHEMA_DIR (openapi.json, openapi.yaml), "
+        "откуда её отдают /swagger.json/ и /swagger.yaml/. Запускается при каждом деплое. "
+        "С --check ничего не пишет и падает, если файлы отсутствуют или расходятся с текущей схемой."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Только проверить, что файлы схемы актуальны")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = stale_schema_files()
+            if stale:
+                raise CommandError(
+                    f"OpenAPI schema is out of date: {', '.join(map(str, stale))}. Run manage.py generate_schema"
+                )
+            self.stdout.write(self.style.SUCCESS("OpenAPI schema is up to date"))
+            return
+
+        for path in write_schema():
+            self.stdout.write(f"Wrote {path}")
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.runner import percentile
+
+
+DEFAULT_PATHS = ('/products/v1/feed/', '/categories/v1/tree/', '/currencies/v1/', '/countries/v1/')
+RSS_SAMPLE_INTERVAL = 0.5
+
+
+def process_tree(pid):
+    """pid и все его потомки (воркеры gunicorn/uvicorn) по /proc."""
+    pids, queue = [], [pid]
+    while queue:
+        current = queue.pop()
+        pids.append(current)
+        for task in Path(f'/proc/{current}/task').glob('*'):
+            try:
+                queue.extend(int(child) for child in (task / 'children').read_text().split())
+            except OSError:
+                continue
+    return pids
+
+
+def tree_rss_mb(pid):
+    """Суммарный RSS процесса и его потомков в МБ или None, если /proc недоступен."""
+    total = 0
+    try:
+        for current in process_tree(pid):
+            for line in Path(f'/proc/{current}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1])
+    except OSError:
+        return None
+    return round(total / 1024, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "HTTP-нагрузка на запущенный сервер: для каждого уровня конкурентности держит "
+        "заданное число одновременных клиентов и печатает RPS, p50/p95/p99 и ошибки. "
+        "С --pid добавляет пиковый RSS процесса сервера с воркерами — так сравниваются "
+        "gunicorn с синхронными воркерами и ASGI при одинаковом числе процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Адрес сервера")
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help=f"Путь для запросов (можно несколько, по умолчанию {', '.join(DEFAULT_PATHS)})",
+        )
+        parser.add_argument(
+            '--concurrency', default='1,10,50,100',
+            help="Уровни одновременных клиентов через запятую (по умолчанию 1,10,50,100)",
+        )
+        parser.add_argument('--duration', type=float, default=10, help="Секунд на уровень (по умолчанию 10)")
+        parser.add_argument('--timeout', type=float, default=30, help="Таймаут запроса, секунд")
+        parser.add_argument('--pid', type=int, help="PID мастер-процесса сервера для замера памяти")
+        parser.add_argument('--label', default='', help="Подпись прогона в JSON (например gunicorn-sync)")
+        parser.add_argument('--output', help="Куда сохранить результаты (JSON)")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        if not levels or min(levels) < 1 or options['duration'] <= 0:
+            raise CommandError("Concurrency levels and --duration must be positive")
+
+        paths = options['paths'] or list(DEFAULT_PATHS)
+        results = []
+        self.stdout.write(
+            f"{'clients':>8} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'errors':>7} {'rss MB':>8}"
+        )
+        for level in levels:
+            row = asyncio.run(self.run_level(options, paths, level))
+            results.append(row)
+            self.stdout.write(
+                f"{row['concurrency']:>8} {row['requests']:>9} {row['rps']:>9.1f} {row['p50_ms']:>9.1f} "
+                f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['errors']:>7} "
+                f"{row['rss_mb'] if row['rss_mb'] is not None else '-':>8}"
+            )
+
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            report = {'label': options['label'], 'url': options['url'], 'paths': paths, 'levels': results}
+            path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {path}"))
+
+    async def run_level(self, options, paths, concurrency):
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + options['duration']
+        peak_rss = None
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(base_url=options['url'], limits=limits, timeout=options['timeout']) as client:
+            async def worker(offset):
+                nonlocal errors
+                index = offset
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(paths[index % len(paths)])
+                        ok = response.status_code < 500
+                    except httpx.HTTPError:
+                        ok = False
+                    latencies.append(time.perf_counter() - started)
+                    errors += not ok
+                    index += 1
+
+            async def sample_rss():
+                nonlocal peak_rss
+                while time.perf_counter() < deadline:
+                    rss = tree_rss_mb(options['pid'])
+                    if rss is not None:
+                        peak_rss = max(peak_rss or 0, rss)
+                    await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+            started = time.perf_counter()
+            tasks = [worker(offset) for offset in range(concurrency)]
+            if options['pid']:
+                tasks.append(sample_rss())
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        milliseconds = [latency * 1000 for latency in latencies] or [0]
+        return {
+            'concurrency': concurrency,
+            'requests': len(latencies),
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(milliseconds, 0.50), 1),
+            'p95_ms': round(percentile(milliseconds, 0.95), 1),
+            'p99_ms': round(percentile(milliseconds, 0.99), 1),
+            'errors': errors,
+            'rss_mb': peak_rss,
+        }
@@ -0,0 +1,75 @@
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import COLLAPSED_SUFFIX, read_collapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает профили запросов из PROFILING_DIR в отчёт по каждому view: "
+        "объединённые collapsed-стеки для flamegraph.pl/speedscope и топ функций "
+        "по собственному и полному времени."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help="Каталог профилей (по умолчанию PROFILING_DIR)")
+        parser.add_argument('--output', default=None, help="Куда записать объединённые <view>.collapsed")
+        parser.add_argument('--view', action='append', dest='views', help="Только указанные view")
+        parser.add_argument('--top', type=int, default=15, help="Сколько функций показывать (по умолчанию 15)")
+
+    def handle(self, *args, **options):
+        root = Path(options['dir'] or settings.PROFILING_DIR)
+        if not root.is_dir():
+            raise CommandError(f"Profile directory {root} does not exist")
+
+        directories = sorted(path for path in root.iterdir() if path.is_dir())
+        if options['views']:
+            directories = [path for path in directories if path.name in options['views']]
+        if not directories:
+            raise CommandError("No profiles found")
+
+        output = Path(options['output']) if options['output'] else None
+        if output is not None:
+            output.mkdir(parents=True, exist_ok=True)
+
+        for directory in directories:
+            files = sorted(directory.glob(f'*{COLLAPSED_SUFFIX}'))
+            if not files:
+                continue
+            stacks = Counter()
+            for path in files:
+                stacks.update(read_collapsed(path))
+            self.report(directory.name, len(files), stacks, options['top'])
+
+            if output is not None:
+                target = output / f'{directory.name}{COLLAPSED_SUFFIX}'
+                target.write_text(
+                    ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+                    encoding='utf-8',
+                )
+                self.stdout.write(f"  flamegraph input: {target}")
+
+    def report(self, view, profiles, stacks, top):
+        total = sum(stacks.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{view}: {profiles} profiles, {total} samples"))
+        if not total:
+            return
+
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            # Рекурсивная функция учитывается в стеке один раз
+            for frame in set(frames):
+                inclusive[frame] += count
+
+        self.stdout.write("  self time:")
+        for frame, count in own.most_common(top):
+            self.stdout.write(f"    {count / total:6.1%}  {frame}")
+        self.stdout.write("  total time:")
+        for frame, count in inclusive.most_common(top):
+            self.stdout.write(f"    {count / total:6.1%}  {frame}")
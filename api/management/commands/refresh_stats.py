@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.tasks import refresh_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает статистику маркетплейса (api.stats) и кладёт её в кэш, как "
+        "периодическая задача refresh_stats. Запускается чаще, чем истекает "
+        "MARKETPLACE_STATS_TIMEOUT (cron: */5 * * * *), чтобы экран «О нас» бота "
+        "и /api/v1/stats/ не считали счётчики на холодном кэше."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(refresh_stats()))
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replicas import LAG_CACHE_KEY, measure_lag
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку реплик (DATABASE_REPLICAS): пишет heartbeat на primary, "
+        "читает его с каждой реплики и кладёт результат в кэш, откуда его берут "
+        "воркеры API. Реплики с задержкой больше DB_REPLICA_MAX_LAG или недоступные "
+        "не получают чтений; без свежего замера (монитор остановлен) все чтения идут на primary. "
+        "С --interval работает непрерывно (запускать одним процессом)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Секунд между замерами; 0 — один замер и выход (по умолчанию)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured (DB_REPLICA_HOSTS)")
+        interval = options['interval']
+        if interval < 0:
+            raise CommandError("--interval must not be negative")
+
+        # Замер живёт в кэше три интервала: если монитор остановился, воркеры перестают его учитывать
+        timeout = max(interval * 3, 60)
+        while True:
+            lags = measure_lag()
+            cache.set(LAG_CACHE_KEY, lags, timeout)
+            self.stdout.write(' '.join(
+                f"{alias}={'unreachable' if lag is None else f'{lag:.3f}s'}"
+                + ('' if lag is not None and lag <= settings.DB_REPLICA_MAX_LAG else ' (excluded)')
+                for alias, lag in lags.items()
+            ))
+            if not interval:
+                break
+            time.sleep(interval)
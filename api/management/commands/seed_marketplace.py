@@ -0,0 +1,29 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.dataset import SCALES, MarketplaceDataset, is_seeded
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу детерминированным синтетическим маркетплейсом для бенчмарков: "
+        "пользователи с оценками, объявления по категориям и городам, изображения, "
+        "избранное и просмотры. Только для отдельной базы бенчмарков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k', help="Масштаб по числу объявлений")
+        parser.add_argument('--seed', type=int, default=42, help="Зерно генератора (по умолчанию 42)")
+
+    def handle(self, *args, **options):
+        if is_seeded():
+            raise CommandError("Benchmark dataset is already present, use a fresh database")
+
+        started = time.perf_counter()
+        dataset = MarketplaceDataset(options['scale'], options['seed'], log=self.stdout.write)
+        summary = dataset.generate()
+
+        self.stdout.write(json.dumps(summary, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Dataset generated in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,193 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from . import metrics
+from .profiling import StackSampler, ashould_profile, save_profile, should_profile, thread_position
+from .queries import QueryBudgetExceeded, capture_queries, query_budget
+from .replicas import SAFE_METHODS, begin_request, end_request, fail_over, pin
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+metrics.describe('http_request_duration_seconds', 'Request processing time by view')
+metrics.describe('http_request_db_queries', 'SQL queries per request by view')
+metrics.describe('http_request_db_seconds', 'Time spent in the database per request by view')
+metrics.describe('http_request_duplicate_queries_total', 'Repeated SQL statements (same fingerprint) by view')
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unnamed'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Считает SQL-запросы, время в базе и повторяющиеся запросы на каждый запрос к API.
+
+    Результат пишется в метрики по имени view (api.metrics) и в заголовок
+    Server-Timing. Если один и тот же SQL повторяется QUERY_DUPLICATE_WARNING
+    раз и больше, в лог пишется предупреждение — обычно это N+1.
+    При QUERY_BUDGET_ENFORCE превышение бюджета запросов (QUERY_BUDGETS)
+    возбуждает QueryBudgetExceeded; включается в тестах.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with capture_queries() as stats:
+            response = self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with capture_queries() as stats:
+            response = await self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, duration):
+        view = view_label(request)
+        metrics.observe('http_request_duration_seconds', duration, view=view)
+        metrics.observe('http_request_db_queries', stats.count, buckets=QUERY_COUNT_BUCKETS, view=view)
+        metrics.observe('http_request_db_seconds', stats.duration, view=view)
+
+        duplicates = stats.duplicates
+        if duplicates:
+            metrics.incr('http_request_duplicate_queries_total', stats.duplicate_count, view=view)
+            sql, times = duplicates[0]
+            if times >= settings.QUERY_DUPLICATE_WARNING:
+                logger.warning(
+                    "%s %s: %d queries, the same SQL ran %d times: %s",
+                    request.method, view, stats.count, times, sql[:300],
+                )
+
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries, '
+                f'{stats.duplicate_count} repeated", total;dur={duration * 1000:.1f}'
+            )
+
+        if settings.QUERY_BUDGET_ENFORCE:
+            budget = query_budget(view)
+            if budget is not None and stats.count > budget:
+                raise QueryBudgetExceeded(f"{request.method} {request.path} ({view})", stats, budget)
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Состояние маршрутизации чтений на время запроса (api.replicas).
+
+    Реплику выбирает view с ReplicaReadsMixin. Успешный небезопасный запрос
+    (создание объявления, избранное, вход) закрепляет чтения клиента
+    за primary cookie DB_REPLICA_PIN_COOKIE. Запрос, упавший на соединении
+    с репликой, повторяется на primary (api.replicas.fail_over).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = begin_request()
+        try:
+            response = self.get_response(request)
+            return self.finish(request, response)
+        finally:
+            end_request(token)
+
+    async def __acall__(self, request):
+        token = begin_request()
+        try:
+            response = await self.get_response(request)
+            return self.finish(request, response)
+        finally:
+            end_request(token)
+
+    def process_exception(self, request, exception):
+        # Ошибка соединения с репликой: безопасный запрос повторяется на primary
+        return fail_over(request, exception)
+
+    def finish(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(response)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Сэмплирующий профайлер запросов по требованию.
+
+    Запрос профилируется, если администратор передал заголовок PROFILING_HEADER
+    или запрос попал в случайную долю PROFILING_SAMPLE_RATE. Collapsed-стеки
+    сохраняются в PROFILING_DIR/<view>/, id профиля возвращается в X-Profile-Id.
+    Отчёт по view собирает команда profile_report.
+
+    Под ASGI сэмплируется поток, в котором выполняется синхронная часть
+    запроса (ORM, сериализация, синхронные обработчики); код корутин
+    в event loop в профиль не попадает.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not should_profile(request):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with StackSampler(settings.PROFILING_INTERVAL) as sampler:
+            response = self.get_response(request)
+        return self.finish(request, response, sampler, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not await ashould_profile(request):
+            return await self.get_response(request)
+
+        # Поток sync_to_async один на весь запрос (ThreadSensitiveContext в ASGIHandler)
+        target = await sync_to_async(thread_position)()
+        started = time.perf_counter()
+        with StackSampler(settings.PROFILING_INTERVAL, target) as sampler:
+            response = await self.get_response(request)
+        return self.finish(request, response, sampler, time.perf_counter() - started)
+
+    def finish(self, request, response, sampler, duration):
+        try:
+            profile_id = save_profile(sampler, view_label(request), request.method, duration)
+        except OSError:
+            logger.exception("Failed to save request profile")
+        else:
+            response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('beat_at', models.DateTimeField(verbose_name='Beat at')),
+            ],
+            options={
+                'verbose_name': 'Replication heartbeat',
+                'verbose_name_plural': 'Replication heartbeats',
+            },
+        ),
+    ]
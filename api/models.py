@@ -1,3 +1,26 @@
 from django.db import models
 
-# Create your models here.
+
+class ReplicationHeartbeat(models.Model):
+    """Отметка времени, которую команда replica_lag пишет на primary и читает с реплик."""
+    beat_at = models.DateTimeField(verbose_name='Beat at')
+
+    class Meta:
+        verbose_name = 'Replication heartbeat'
+        verbose_name_plural = 'Replication heartbeats'
+
+    def __str__(self) -> str:
+        return self.beat_at.isoformat()
+
+
+class DataVersion(models.Model):
+    """Счётчик изменений набора данных, с которым процессы сверяют свои кэши (api.versions)."""
+    name = models.CharField(max_length=50, unique=True, verbose_name='Name')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Version')
+
+    class Meta:
+        verbose_name = 'Data version'
+        verbose_name_plural = 'Data versions'
+
+    def __str__(self) -> str:
+        return f'{self.name} v{self.version}'
@@ -0,0 +1,187 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from capybara_tg_user.authentication import JWTAuthenticationFromCookie
+
+
+COLLAPSED_SUFFIX = '.collapsed'
+
+
+def frame_label(code):
+    filename = code.co_filename
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """
+    Сэмплирующий профайлер одного потока.
+
+    Фоновый поток раз в interval секунд снимает стек профилируемого потока
+    через sys._current_frames() и копит счётчики стеков в collapsed-формате
+    (frame;frame;frame). Кадры выше точки запуска (WSGI, middleware) отбрасываются.
+    По умолчанию профилируется текущий поток; target — пара (thread id, глубина
+    корня) из thread_position() для другого потока.
+    """
+
+    def __init__(self, interval, target=None):
+        self.interval = interval
+        self.target = target
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        if self.target is not None:
+            self._target, self._root_depth = self.target
+        else:
+            self._target = threading.get_ident()
+            # Глубина кадра, из которого запущен профайлер: всё, что выше, не нужно
+            self._root_depth = self._depth(sys._getframe(1))
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    @staticmethod
+    def _depth(frame):
+        depth = 0
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        return depth
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = frame_label(code)
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                return
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes = codes[:len(codes) - self._root_depth]
+            if codes:
+                self.stacks[';'.join(self._label(code) for code in reversed(codes))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def thread_position():
+    """
+    Поток и глубина корня для StackSampler(target=...).
+
+    Вызывается через sync_to_async: корнем считается обёртка asgiref,
+    которая вызвала эту функцию, остальные вызовы в потоке идут через неё же.
+    """
+    return threading.get_ident(), StackSampler._depth(sys._getframe(1))
+
+
+def should_profile(request):
+    """
+    Профилировать ли запрос.
+
+    По заголовку PROFILING_HEADER — только для администратора (сессия или JWT
+    из cookie), иначе случайная доля PROFILING_SAMPLE_RATE всех запросов.
+    """
+    if request.headers.get(settings.PROFILING_HEADER):
+        return is_admin(request)
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+async def ashould_profile(request):
+    """should_profile для async-стека: администратор проверяется в потоке (запрос к базе)."""
+    if request.headers.get(settings.PROFILING_HEADER):
+        return await sync_to_async(is_admin)(request)
+    return should_profile(request)
+
+
+def is_admin(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        result = JWTAuthenticationFromCookie().authenticate(request)
+    except Exception:
+        return False
+    return bool(result) and result[0].is_staff
+
+
+def view_directory(view_name):
+    return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in view_name)
+
+
+def save_profile(sampler, view_name, method, duration):
+    """
+    Пишет collapsed-стеки запроса в PROFILING_DIR/<view>/ и возвращает id профиля.
+
+    Заодно чистит каталог view (prune_profiles), чтобы при сэмплировании
+    в продакшене профили не заполняли диск.
+    """
+    profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    directory = Path(settings.PROFILING_DIR) / view_directory(view_name)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    header = f'# {method} {view_name} {duration * 1000:.1f}ms {sampler.samples} samples\n'
+    (directory / f'{profile_id}{COLLAPSED_SUFFIX}').write_text(header + sampler.collapsed(), encoding='utf-8')
+    prune_profiles(directory)
+    return profile_id
+
+
+def prune_profiles(directory):
+    """
+    Удаляет из каталога view профили старше PROFILING_MAX_AGE_DAYS и самые
+    старые сверх PROFILING_MAX_FILES. Возвращает число удалённых файлов.
+    """
+    # Имя профиля начинается с времени записи, поэтому сортировка по имени — по возрасту
+    files = sorted(Path(directory).glob(f'*{COLLAPSED_SUFFIX}'), reverse=True)
+    cutoff = time.time() - settings.PROFILING_MAX_AGE_DAYS * 24 * 60 * 60
+    removed = 0
+    for position, path in enumerate(files):
+        try:
+            if position >= settings.PROFILING_MAX_FILES or path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Файл уже удалил другой воркер
+            continue
+    return removed
+
+
+def read_collapsed(path):
+    """Счётчики стеков из collapsed-файла (строки-комментарии пропускаются)."""
+    stacks = Counter()
+    for line in Path(path).read_text(encoding='utf-8').splitlines():
+        if not line or line.startswith('#'):
+            continue
+        stack, _, count = line.rpartition(' ')
+        try:
+            stacks[stack] += int(count)
+        except ValueError:
+            continue
+    return stacks
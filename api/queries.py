@@ -0,0 +1,111 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Отпечаток SQL без значений параметров.
+
+    Списки IN (%s, %s, ...) разной длины сводятся к одному виду, поэтому
+    запросы N+1 с разными id дают одинаковый отпечаток.
+    """
+    return _IN_LIST.sub('(%s, ...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+class QueryStats:
+    """Количество запросов, время в базе и повторы SQL за один запрос к API."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            self.queries.append(sql)
+
+    @property
+    def duplicates(self):
+        """Отпечатки, выполненные больше одного раза, с числом повторов."""
+        return [(sql, times) for sql, times in self.fingerprints.most_common() if times > 1]
+
+    @property
+    def duplicate_count(self):
+        return sum(times - 1 for _, times in self.duplicates)
+
+
+# QueryStats активных capture_queries; контекст копируется в потоки sync_to_async
+_active_stats = ContextVar('active_query_stats', default=())
+
+
+def _record(execute, sql, params, many, context):
+    for stats in _active_stats.get():
+        execute = partial(stats, execute)
+    return execute(sql, params, many, context)
+
+
+def install_wrapper(connection):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='api.queries.install_wrapper')
+
+
+@contextmanager
+def capture_queries():
+    """
+    Считает запросы ко всем базам внутри блока.
+
+    Соединения потокозависимы: под ASGI ORM выполняется в потоке sync_to_async,
+    а не в потоке event loop. Поэтому статистика передаётся через ContextVar,
+    а execute_wrapper ставится на каждое соединение при его открытии.
+    """
+    for connection in connections.all():
+        install_wrapper(connection)
+    stats = QueryStats()
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def query_budget(view_name):
+    """Бюджет запросов для view: QUERY_BUDGETS или QUERY_BUDGET_DEFAULT."""
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос к API выполнил больше SQL-запросов, чем позволяет бюджет."""
+
+    def __init__(self, label, stats, budget):
+        lines = [f"{label} executed {stats.count} queries, budget is {budget}"]
+        for sql, times in stats.duplicates[:5]:
+            lines.append(f"  repeated {times}x: {sql[:300]}")
+        lines.append("Queries:")
+        lines.extend(f"  {index}. {sql[:300]}" for index, sql in enumerate(stats.queries, 1))
+        super().__init__('\n'.join(lines))
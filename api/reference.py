@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import threading
+from types import MappingProxyType
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
+
+from capybara_categories.models import Category, SubCategory
+from capybara_countries.models import Country, City
+from capybara_currencies.models import Currency
+
+from .responses import cached_json_response
+from .versions import aget_data_version, bump_data_version, get_data_version
+
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_VERSION = 'reference'
+
+
+class Link(str):
+    """Относительный путь, который при кодировании превращается в абсолютный URL."""
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _absolutize(data, base):
+    if isinstance(data, Link):
+        return base + data
+    if isinstance(data, dict):
+        return {key: _absolutize(value, base) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_absolutize(value, base) for value in data]
+    return data
+
+
+class ReferenceSnapshot:
+    """
+    Неизменяемый снимок справочников: страны, города, валюты, категории.
+
+    Хранит готовые ответы справочных эндпоинтов. Версия — хэш содержимого,
+    data_version — счётчик изменений справочников (api.versions), при котором
+    снимок собран. Закодированные байты с ETag запоминаются отдельно для
+    каждого хоста, так как ссылки в ответах абсолютные.
+    """
+
+    def __init__(self, payloads, data_version=0):
+        self.payloads = MappingProxyType(payloads)
+        self.data_version = data_version
+        canonical = json.dumps(
+            sorted((repr(key), value) for key, value in payloads.items()),
+            ensure_ascii=False, separators=(',', ':'),
+        )
+        self.version = hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+        self._encoded = {}
+
+    def __contains__(self, key):
+        return key in self.payloads
+
+    def encoded(self, key, base):
+        cache_key = (key, base)
+        encoded = self._encoded.get(cache_key)
+        if encoded is None:
+            body = _encode(_absolutize(self.payloads[key], base))
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            encoded = self._encoded[cache_key] = (etag, body)
+        return encoded
+
+
+def _image(image):
+    return Link(image.url) if image else None
+
+
+def build_reference_snapshot(data_version=0):
+    """Загружает справочники из базы и собирает готовые ответы для эндпоинтов."""
+    payloads = {}
+
+    payloads[('currencies',)] = [
+        {'id': currency.id, 'name': currency.name, 'code': currency.code, 'order': currency.order}
+        for currency in Currency.objects.all()
+    ]
+
+    cities = {}
+    for city in City.objects.all():
+        cities.setdefault(city.country_id, []).append({'id': city.id, 'name': city.name})
+
+    countries = []
+    for country in Country.objects.all():
+        item = {
+            'id': country.id,
+            'name': country.name,
+            'url': Link(reverse('country-detail', kwargs={'pk': country.pk})),
+        }
+        countries.append(item)
+        payloads[('country', country.pk)] = dict(item, cities=cities.get(country.id, []))
+    payloads[('countries',)] = countries
+
+    categories = []
+    category_slugs = {}
+    for category in Category.objects.all():
+        category_slugs[category.id] = category.slug
+        categories.append({
+            'id': category.id,
+            'name': category.name,
+            'slug': category.slug,
+            'url': Link(reverse('category-detail', kwargs={'slug': category.slug})),
+        })
+        payloads[('category', category.slug)] = {
+            'id': category.id,
+            'name': category.name,
+            'slug': category.slug,
+        }
+    payloads[('categories',)] = categories
+
+    for sub in SubCategory.objects.all():
+        category_slug = category_slugs[sub.category_id]
+        payloads[('subcategory', category_slug, sub.slug)] = {
+            'id': sub.id,
+            'name': sub.name,
+            'slug': sub.slug,
+            'image': _image(sub.image),
+            'category': category_slug,
+        }
+
+    return ReferenceSnapshot(payloads, data_version)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def reload_reference_snapshot():
+    """Отмечает изменение справочников для всех процессов и пересобирает снимок этого."""
+    global _snapshot
+    data_version = bump_data_version(REFERENCE_DATA_VERSION)
+    with _snapshot_lock:
+        _snapshot = build_reference_snapshot(data_version)
+    return _snapshot
+
+
+def get_reference_snapshot():
+    """
+    Возвращает текущий снимок справочников.
+
+    Если справочники изменились (правка в админке в любом процессе), счётчик
+    изменений в базе (api.versions) обгоняет версию снимка, и снимок
+    пересобирается. Иначе запрос обслуживается без обращения к базе: сам
+    счётчик перечитывается не чаще раза в DATA_VERSION_CHECK_INTERVAL сек.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    data_version = get_data_version(REFERENCE_DATA_VERSION)
+
+    if snapshot is None or snapshot.data_version != data_version:
+        with _snapshot_lock:
+            if _snapshot is snapshot:
+                _snapshot = build_reference_snapshot(data_version)
+            snapshot = _snapshot
+    return snapshot
+
+
+async def aget_reference_snapshot():
+    """
+    get_reference_snapshot для async-view.
+
+    Версия читается без блокировки event loop; пересборка снимка
+    (запросы к базе) выполняется в потоке.
+    """
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.data_version == await aget_data_version(REFERENCE_DATA_VERSION):
+        return snapshot
+    return await sync_to_async(get_reference_snapshot)()
+
+
+def clear_reference_snapshot():
+    """Забывает снимок процесса: следующий запрос соберёт его заново (тесты, бенчмарки)."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def warm_reference_snapshot():
+    """Загружает снимок при старте процесса, не роняя его при недоступной базе."""
+    try:
+        get_reference_snapshot()
+    except Exception:
+        logger.exception("Failed to warm reference data snapshot")
+
+
+def reference_response(request, key, model=None):
+    """
+    Отдаёт готовый ответ справочного эндпоинта с ETag и Cache-Control.
+
+    Если ключа нет в снимке, возбуждает Http404 с тем же текстом,
+    что и get_object_or_404 для переданной модели.
+    """
+    return _snapshot_response(request, get_reference_snapshot(), key, model)
+
+
+async def areference_response(request, key, model=None):
+    """reference_response для async-view."""
+    return _snapshot_response(request, await aget_reference_snapshot(), key, model)
+
+
+def _snapshot_response(request, snapshot, key, model):
+    if key not in snapshot:
+        name = model._meta.object_name if model is not None else 'object'
+        raise Http404(f"No {name} matches the given query.")
+
+    etag, body = snapshot.encoded(key, request.build_absolute_uri('/')[:-1])
+    return cached_json_response(request, body, etag, max_age=settings.REFERENCE_DATA_MAX_AGE)
@@ -0,0 +1,130 @@
+import json
+import re
+import secrets
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него работает стандартный json
+    orjson = None
+
+
+ORJSON_FRAGMENT = getattr(orjson, 'Fragment', None)
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        # Даты и dataclass отдаём кодировщику DRF, чтобы формат совпадал с JSONRenderer
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class JSONFragment(bytes):
+    """
+    Готовый JSON в байтах (например, закэшированная карточка объявления).
+
+    Рендерер вставляет фрагмент в ответ как есть, без разбора и повторного
+    кодирования. Содержимое должно быть корректным JSON в UTF-8.
+    """
+
+
+# Случайная часть не даёт строке из данных совпасть с заглушкой фрагмента
+FRAGMENT_MARKER = '__json_fragment_%s_' % secrets.token_hex(8)
+FRAGMENT_PATTERN = re.compile(rb'"' + FRAGMENT_MARKER.encode() + rb'(\d+)"')
+
+
+class _FragmentSplicer:
+    """
+    Подменяет фрагменты строками-заглушками и потом вклеивает их байты.
+
+    Нужен для json из стандартной библиотеки и для orjson без orjson.Fragment.
+    """
+
+    def __init__(self):
+        self.fragments = []
+
+    def placeholder(self, fragment):
+        self.fragments.append(fragment)
+        return '%s%d' % (FRAGMENT_MARKER, len(self.fragments) - 1)
+
+    def splice(self, body):
+        if not self.fragments:
+            return body
+        fragments = self.fragments
+        return FRAGMENT_PATTERN.sub(lambda match: fragments[int(match.group(1))], body)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, который кодирует ответ через orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer, кроме двух случаев с float: orjson пишет
+    NaN и бесконечность как null (JSONRenderer возбуждает ValueError) и по-своему
+    форматирует экспоненту (1e16 и 0.00001 вместо 1e+16 и 1e-05). Значения
+    те же, а проверка данных на такие числа обходится дороже самого orjson,
+    поэтому различия оставлены (их фиксируют тесты api.tests). Значения
+    JSONFragment попадают в ответ без повторного кодирования. Ответы
+    с отступами (indent) и всё, что orjson не умеет кодировать, рендерятся
+    стандартным json.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if orjson is not None and indent is None and self.compact and not self.ensure_ascii and self.strict:
+            try:
+                return self.render_orjson(data)
+            except orjson.JSONEncodeError:
+                pass
+        return self.render_stdlib(data, indent)
+
+    def render_orjson(self, data):
+        encoder = self.encoder_class()
+        splicer = None if ORJSON_FRAGMENT else _FragmentSplicer()
+
+        def default(obj):
+            if isinstance(obj, JSONFragment):
+                if splicer is None:
+                    return ORJSON_FRAGMENT(bytes(obj))
+                return splicer.placeholder(obj)
+            return encoder.default(obj)
+
+        body = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        body = self.escape_line_separators(body)
+        return splicer.splice(body) if splicer is not None else body
+
+    def render_stdlib(self, data, indent):
+        splicer = _FragmentSplicer()
+        base_encoder = self.encoder_class
+
+        class Encoder(base_encoder):
+            def default(self, obj):
+                if isinstance(obj, JSONFragment):
+                    return splicer.placeholder(obj)
+                return super().default(obj)
+
+        if indent is None:
+            separators = (',', ':') if self.compact else (', ', ': ')
+        else:
+            separators = (',', ': ')
+
+        ret = json.dumps(
+            data, cls=Encoder,
+            indent=indent, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=separators
+        )
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return splicer.splice(ret.encode())
+
+    @staticmethod
+    def escape_line_separators(body):
+        # Как и JSONRenderer, экранируем U+2028/U+2029, чтобы ответ оставался валидным JavaScript
+        if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+            body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return body
@@ -0,0 +1,224 @@
+"""
+Чтение с реплик базы с read-your-writes.
+
+Реплики — алиасы из DATABASE_REPLICAS (settings строит их из DB_REPLICA_HOSTS).
+Безопасные запросы (GET, HEAD, OPTIONS) к view с ReplicaReadsMixin читают
+с одной случайной реплики на весь запрос, остальные запросы и все записи
+идут на primary (ReplicaRouter).
+
+Read-your-writes: после успешного небезопасного запроса ReplicaRoutingMiddleware
+ставит клиенту cookie DB_REPLICA_PIN_COOKIE, и следующие DB_REPLICA_PIN_SECONDS
+секунд его чтения идут на primary, пока реплики догоняют запись. Запись
+определяется по методу, а не по роутеру: избранное пишется сырым SQL мимо него.
+
+Задержку реплик измеряет команда replica_lag (heartbeat: запись на primary,
+чтение с реплик) и кладёт в общий кэш; реплики с задержкой больше
+DB_REPLICA_MAX_LAG, недоступные или без свежего замера не используются:
+если монитор остановлен, все чтения идут на primary.
+
+Если запрос к реплике падает с ошибкой соединения (OperationalError,
+InterfaceError), ReplicaRoutingMiddleware повторяет безопасный запрос
+на primary, а реплика на DB_REPLICA_LAG_REFRESH секунд исключается в этом процессе.
+
+Локально: два алиаса SQLite в DATABASES (реплика — копия файла базы)
+и DATABASE_REPLICAS = ['replica_1']; отставание имитирует устаревшая копия,
+замер — python manage.py replica_lag.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, InterfaceError, OperationalError, connections
+from django.utils import timezone
+
+from . import metrics
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+LAG_CACHE_KEY = 'db:replica_lag'
+
+metrics.describe('db_replica_lag_seconds', 'Replication lag by replica from the replica_lag monitor (-1: unreachable)')
+metrics.describe('db_read_routing_total', 'Safe requests by read target: replica alias, pinned or no_replica')
+metrics.describe('db_replica_failover_total', 'Safe requests retried on primary after a replica connection error')
+
+
+class ReadState:
+    """
+    Маршрут чтений текущего запроса: выбранная реплика или None (primary).
+
+    failed_over — запрос повторяется на primary после ошибки реплики.
+    """
+
+    __slots__ = ('replica', 'failed_over')
+
+    def __init__(self):
+        self.replica = None
+        self.failed_over = False
+
+
+# Контекст копируется в потоки sync_to_async, объект состояния в них общий
+_state = ContextVar('db_read_state', default=None)
+
+
+def begin_request():
+    return _state.set(ReadState())
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+_lags = {'expires': 0.0, 'values': {}}
+
+# Реплики, исключённые после ошибки соединения: алиас -> time.monotonic() до которого
+_down = {}
+
+
+def replica_lags():
+    """Задержка реплик (сек, None — недоступна) из кэша; перечитывается раз в DB_REPLICA_LAG_REFRESH сек."""
+    now = time.monotonic()
+    if now >= _lags['expires']:
+        values = cache.get(LAG_CACHE_KEY) or {}
+        _lags['values'] = values
+        _lags['expires'] = now + settings.DB_REPLICA_LAG_REFRESH
+        for alias, lag in values.items():
+            metrics.gauge('db_replica_lag_seconds', -1 if lag is None else lag, database=alias)
+    return _lags['values']
+
+
+def healthy_replicas():
+    """Реплики со свежим замером в пределах DB_REPLICA_MAX_LAG, без недавних ошибок соединения."""
+    lags = replica_lags()
+    now = time.monotonic()
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := lags.get(alias)) is not None and lag <= settings.DB_REPLICA_MAX_LAG
+        and _down.get(alias, 0) <= now
+    ]
+
+
+def is_pinned(request):
+    """Клиент недавно писал в базу: его чтения ещё идут на primary."""
+    value = request.COOKIES.get(settings.DB_REPLICA_PIN_COOKIE)
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def pin(response):
+    """Закрепляет чтения клиента за primary на DB_REPLICA_PIN_SECONDS секунд."""
+    seconds = settings.DB_REPLICA_PIN_SECONDS
+    response.set_cookie(
+        key=settings.DB_REPLICA_PIN_COOKIE, value=f'{time.time() + seconds:.0f}',
+        max_age=seconds, httponly=True, secure=True, samesite='Strict'
+    )
+
+
+def route_reads(request):
+    """Выбирает реплику для чтений безопасного запроса, если клиент не закреплён за primary."""
+    state = _state.get()
+    if state is None or state.failed_over or not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+        return
+    if is_pinned(request):
+        metrics.incr('db_read_routing_total', target='pinned')
+        return
+    replicas = healthy_replicas()
+    if not replicas:
+        metrics.incr('db_read_routing_total', target='no_replica')
+        return
+    state.replica = random.choice(replicas)
+    metrics.incr('db_read_routing_total', target=state.replica)
+
+
+def fail_over(request, exception):
+    """
+    Повторяет view на primary, если запрос упал на соединении с репликой.
+
+    Возвращает ответ повторного вызова или None, если ошибка не от реплики
+    (её обрабатывает Django как обычно). Реплика исключается в этом процессе
+    на DB_REPLICA_LAG_REFRESH секунд, её соединение закрывается.
+    """
+    state = _state.get()
+    if state is None or state.replica is None or not isinstance(exception, (OperationalError, InterfaceError)):
+        return None
+    alias = state.replica
+    connection = connections[alias]
+    if not connection.errors_occurred:
+        return None
+    connection.close()
+    _down[alias] = time.monotonic() + settings.DB_REPLICA_LAG_REFRESH
+    state.replica = None
+    state.failed_over = True
+    metrics.incr('db_replica_failover_total', database=alias)
+    match = request.resolver_match
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    return view(request, *match.args, **match.kwargs)
+
+
+def measure_lag():
+    """
+    Пишет heartbeat на primary и читает его с каждой реплики.
+
+    Задержка — сколько секунд назад записана отметка, которую видит реплика:
+    с догнавшей реплики читается только что записанная. None — реплика
+    недоступна или отметка до неё ещё не дошла.
+    """
+    from .models import ReplicationHeartbeat
+
+    now = timezone.now()
+    ReplicationHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(pk=1, defaults={'beat_at': now})
+    lags = {}
+    for alias in settings.DATABASE_REPLICAS:
+        try:
+            beat_at = ReplicationHeartbeat.objects.using(alias).filter(pk=1).values_list('beat_at', flat=True).first()
+        except DatabaseError:
+            connections[alias].close()
+            beat_at = None
+        lags[alias] = None if beat_at is None else max((now - beat_at).total_seconds(), 0.0)
+    return lags
+
+
+class ReplicaRouter:
+    """
+    Роутер DATABASE_ROUTERS: чтения запроса с выбранной репликой идут на неё,
+    всё остальное — на primary. Миграции на реплики не применяются.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        # Внутри транзакции на primary читаем оттуда же
+        if state is None or state.replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        # Явно primary: иначе объект, прочитанный с реплики, сохранялся бы туда же
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaReadsMixin:
+    """
+    Чтения безопасных запросов view идут на реплику (api.replicas).
+
+    primary_actions — действия ViewSet, которые всегда читают с primary.
+    """
+
+    primary_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        if getattr(self, 'action', None) not in self.primary_actions:
+            route_reads(request)
+        super().initial(request, *args, **kwargs)
@@ -0,0 +1,22 @@
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+
+
+def cached_json_response(request, body, etag, max_age=None, content_type='application/json'):
+    """
+    Отдаёт заранее закодированный JSON с ETag.
+
+    При совпадении If-None-Match возвращает 304 без тела.
+    Если задан max_age, добавляет публичный Cache-Control.
+    """
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(body, content_type=content_type)
+
+    response['ETag'] = etag
+    if max_age is not None:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
@@ -0,0 +1,100 @@
+"""
+OpenAPI-схема API.
+
+Схема собирается один раз на деплой командой generate_schema и лежит
+файлами в OPENAPI_SCHEMA_DIR; /swagger.json и /swagger.yaml отдают готовый
+файл с ETag. Если файла нет, процесс собирает схему сам при первом запросе.
+Swagger UI и ReDoc загружают схему по этим же адресам (SPEC_URL), поэтому
+страницы интерфейса тоже не обходят view и сериализаторы. Прежний адрес
+схемы drf_yasg /swagger/?format=openapi перенаправляется на /swagger.json/.
+"""
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+logger = logging.getLogger(__name__)
+
+API_INFO = openapi.Info(
+    title="Capybara API",
+    default_version='v1',
+    description="API маркетплейса Capybara",
+    terms_of_service="https://capybarashop.store",
+    contact=openapi.Contact(email="ostrovanaleksei@gmail.com"),
+)
+
+FORMATS = {
+    'json': (OpenAPICodecJson, 'application/json'),
+    'yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+class UIShellGenerator(OpenAPISchemaGenerator):
+    """
+    Генератор для страниц Swagger UI и ReDoc: схема без путей.
+
+    Страницам нужны только название и версия, саму схему они загружают
+    по SPEC_URL из готового файла.
+    """
+
+    def get_schema(self, request=None, public=False):
+        return openapi.Swagger(info=self.info, _prefix='/', _version=self.version, paths=openapi.Paths(paths={}))
+
+
+def build_schema(fmt):
+    """Собирает схему так, как её видит анонимный пользователь, и кодирует в fmt (json или yaml)."""
+    codec, _ = FORMATS[fmt]
+    # Без адреса в схеме нет host: интерфейс обращается к серверу, с которого загружен
+    generator = OpenAPISchemaGenerator(API_INFO, url='')
+    request = Request(APIRequestFactory().get('/swagger.json'), authenticators=[])
+    return codec(validators=[]).encode(generator.get_schema(request=request, public=True))
+
+
+def schema_path(fmt):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'openapi.{fmt}'
+
+
+def write_schema():
+    """Пишет схему во всех форматах в OPENAPI_SCHEMA_DIR и возвращает пути файлов."""
+    paths = []
+    for fmt in FORMATS:
+        path = schema_path(fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(build_schema(fmt))
+        paths.append(path)
+    return paths
+
+
+def stale_schema_files():
+    """Файлы схемы, которых нет или которые не совпадают с текущей схемой."""
+    return [
+        schema_path(fmt) for fmt in FORMATS
+        if not schema_path(fmt).is_file() or schema_path(fmt).read_bytes() != build_schema(fmt)
+    ]
+
+
+def get_schema_document(fmt):
+    """(etag, body, content_type) схемы: из файла или, если его нет, собранная один раз на процесс."""
+    if fmt not in _documents:
+        with _lock:
+            if fmt not in _documents:
+                path = schema_path(fmt)
+                if path.is_file():
+                    body = path.read_bytes()
+                else:
+                    logger.warning("OpenAPI schema file %s not found, building the schema in process", path)
+                    body = build_schema(fmt)
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                _documents[fmt] = (etag, body, FORMATS[fmt][1])
+    return _documents[fmt]
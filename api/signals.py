@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from capybara_categories.models import Category, SubCategory
+from capybara_countries.models import Country, City
+from capybara_currencies.models import Currency
+from .reference import reload_reference_snapshot
+
+
+REFERENCE_MODELS = (Country, City, Currency, Category, SubCategory)
+
+
+def reference_changed(sender, instance, **kwargs):
+    transaction.on_commit(reload_reference_snapshot)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_changed, sender=model)
+    post_delete.connect(reference_changed, sender=model)
@@ -0,0 +1,58 @@
+"""
+Статистика маркетплейса: пользователи, опубликованные объявления, категории
+и города, в которых они есть.
+
+Счётчики считаются двумя запросами и лежат в кэше MARKETPLACE_STATS_TIMEOUT
+секунд; задача refresh_marketplace_stats пересчитывает их заранее, поэтому
+экран «О нас» бота и /api/v1/stats/ читают готовое значение одним обращением
+к кэшу. Сами считают только при холодном кэше.
+"""
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+
+from capybara_products.models import Product
+
+
+STATS_CACHE_KEY = 'marketplace:stats:v1'
+
+
+def build_marketplace_stats():
+    """Возвращает (stats, etag, body): словарь счётчиков и готовый JSON с ETag."""
+    stats = Product.objects.filter(status=3).aggregate(
+        products=Count('id'),
+        categories=Count('category', distinct=True),
+        cities=Count('city', distinct=True),
+    )
+    stats['users'] = get_user_model().objects.filter(is_active=True).count()
+
+    body = json.dumps(stats, separators=(',', ':')).encode('utf-8')
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    return stats, etag, body
+
+
+def refresh_marketplace_stats():
+    """Пересчитывает статистику и кладёт её в кэш."""
+    stats = build_marketplace_stats()
+    cache.set(STATS_CACHE_KEY, stats, timeout=settings.MARKETPLACE_STATS_TIMEOUT)
+    return stats
+
+
+def get_marketplace_stats():
+    """(stats, etag, body) из кэша; при холодном кэше считается на месте."""
+    cached = cache.get(STATS_CACHE_KEY)
+    if cached is not None:
+        return cached
+    return refresh_marketplace_stats()
+
+
+async def aget_marketplace_stats():
+    cached = await cache.aget(STATS_CACHE_KEY)
+    if cached is not None:
+        return cached
+    return await sync_to_async(refresh_marketplace_stats)()
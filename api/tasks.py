@@ -0,0 +1,6 @@
+from .stats import refresh_marketplace_stats
+
+
+def refresh_stats():
+    stats, _, _ = refresh_marketplace_stats()
+    return "Marketplace stats: " + ", ".join(f"{name} {value}" for name, value in stats.items())
@@ -0,0 +1,197 @@
+import hashlib
+import hmac
+import importlib
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.test import AsyncClient, override_settings
+from django.urls import clear_url_caches
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from capybara_categories.models import Category, SubCategory
+from capybara_countries.models import City, Country
+from capybara_currencies.models import Currency
+from capybara_products.models import Favorite, Product
+from capybara_tg_user.models import TelegramUser
+
+from .queries import QueryBudgetExceeded, capture_queries
+from .reference import clear_reference_snapshot
+
+
+class ASGIClient:
+    """
+    Синхронный тестовый клиент поверх AsyncClient.
+
+    Запросы проходят через ASGI-обработчик Django (async middleware, async-view),
+    а код тестов и сценариев бенчмарка остаётся синхронным.
+    """
+
+    REQUEST_METHODS = ('get', 'post', 'put', 'patch', 'delete', 'head', 'options', 'trace', 'generic')
+
+    def __init__(self, *args, **kwargs):
+        self.async_client = AsyncClient(*args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self.async_client, name)
+        if name in self.REQUEST_METHODS:
+            return async_to_sync(attr)
+        return attr
+
+
+def allowed_host():
+    """
+    Хост из ALLOWED_HOSTS для запросов тестового клиента и RequestFactory
+    вне тест-раннера (бенчмарки): 'testserver' там разрешён только в тестах.
+    """
+    return next(
+        (host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')),
+        'testserver',
+    )
+
+
+def sign_init_data(params, bot_token):
+    """Подписывает initData токеном бота так же, как Telegram Mini App."""
+    check_string = '\n'.join(f'{key}={value}' for key, value in sorted(params.items()))
+    secret = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    signature = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(dict(params, hash=signature))
+
+
+def reload_urlconf():
+    """
+    Заново импортирует URLconf проекта и сбрасывает кэш резолвера.
+
+    AsyncAPIViewMixin.as_view() помечает view как async по ASYNC_VIEWS
+    в момент импорта urls, поэтому после смены настройки view пересоздаются.
+    """
+    base_dir = str(Path(settings.BASE_DIR))
+    modules = [
+        module for name, module in list(sys.modules.items())
+        if name.endswith('.urls') and name != settings.ROOT_URLCONF
+        and (getattr(module, '__file__', None) or '').startswith(base_dir)
+    ]
+    # Сначала urls приложений: корневой URLconf подключает их через include()
+    for module in modules:
+        importlib.reload(module)
+    if settings.ROOT_URLCONF in sys.modules:
+        importlib.reload(sys.modules[settings.ROOT_URLCONF])
+    clear_url_caches()
+
+
+class HTTPStackMixin:
+    """
+    Миксин для TestCase: при ASYNC_VIEWS self.client ходит через ASGI-обработчик,
+    поэтому те же тесты проверяют и синхронный, и асинхронный стек.
+
+    Подкласс с async_views = True в том же запуске прогоняет тесты под ASGI
+    с async-вариантами view (alist, aretrieve, aget, apost), False — под WSGI:
+
+        class ProductAPITests(HTTPStackMixin, APITestCase):
+            ...
+
+        class ProductAPIASGITests(ProductAPITests):
+            async_views = True
+    """
+
+    # None — стек из настроек процесса (ASYNC_VIEWS=1 python manage.py test)
+    async_views = None
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.async_views is not None and cls.async_views != settings.ASYNC_VIEWS:
+            override = override_settings(ASYNC_VIEWS=cls.async_views)
+            override.enable()
+            reload_urlconf()
+            # Очистка в обратном порядке: сначала вернуть настройку, потом view
+            cls.addClassCleanup(reload_urlconf)
+            cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        if settings.ASYNC_VIEWS:
+            self.client = ASGIClient()
+
+
+class QueryBudgetMixin:
+    """
+    Миксин для TestCase: любой запрос тестового клиента, выполнивший больше
+    SQL-запросов, чем задано в QUERY_BUDGETS для его view, роняет тест.
+
+        class ProductAPITests(QueryBudgetMixin, APITestCase):
+            def test_list(self):
+                self.client.get('/products/v1/')
+
+                with self.assertMaxQueries(2):
+                    self.client.get('/products/v1/')
+    """
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(QUERY_BUDGET_ENFORCE=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @contextmanager
+    def assertMaxQueries(self, budget, label='block'):
+        """Проверяет, что код внутри блока выполнил не больше budget запросов."""
+        with capture_queries() as stats:
+            yield stats
+        if stats.count > budget:
+            raise QueryBudgetExceeded(label, stats, budget)
+
+
+class MarketplaceDataMixin:
+    """
+    Миксин для TestCase: небольшой каталог (валюты, страна с двумя городами,
+    категории, пользователи, опубликованные объявления) и холодные кэши
+    перед каждым тестом, как у только что запущенного процесса.
+
+    Модерация при создании объявлений не обращается к Mistral: объявления
+    сразу публикуются.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usd = Currency.objects.create(name='Dollar', code='USD', order=1)
+        cls.ars = Currency.objects.create(name='Peso', code='ARS', order=2, rate=1000)
+        cls.country = Country.objects.create(name='Argentina')
+        cls.country.currencies.set([cls.usd, cls.ars])
+        cls.city = City.objects.create(name='Buenos Aires', country=cls.country)
+        cls.other_city = City.objects.create(name='Cordoba', country=cls.country)
+        cls.category = Category.objects.create(name='Electronics', order=1, image='images/cat_img/electronics.png')
+        cls.other_category = Category.objects.create(name='Home', order=2, image='images/cat_img/home.png')
+        cls.subcategory = SubCategory.objects.create(name='Phones', category=cls.category, image='images/subcat_img/phones.png')
+        cls.user = TelegramUser.objects.create(username='alice', telegram_id=1, country=cls.country, city=cls.city)
+        cls.author = TelegramUser.objects.create(username='bob', telegram_id=2, country=cls.country, city=cls.other_city)
+
+        with mock.patch('capybara_products.signals.moderate_goods', return_value=True):
+            cls.products = [
+                Product.objects.create(
+                    author=cls.author, category=cls.category if number % 2 else cls.other_category,
+                    subcategory=cls.subcategory if number % 4 == 1 else None,
+                    title=f'Product {number}', description='Description', country=cls.country,
+                    city=cls.city if number < 4 else cls.other_city,
+                    price=100 * (number + 1), currency=cls.usd if number % 2 else cls.ars,
+                )
+                for number in range(8)
+            ]
+        for product in cls.products[:3]:
+            Favorite.objects.create(user=cls.user, product=product)
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        clear_reference_snapshot()
+
+    def login(self, user):
+        """Ставит клиенту cookie с JWT, как после входа через Telegram."""
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(user).access_token)
@@ -1,3 +1,113 @@
-from django.test import TestCase
+import time
+from io import StringIO
+from unittest import skipIf
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from . import replicas
+from .renderers import FastJSONRenderer, JSONFragment, orjson
+from .testing import ASGIClient, HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def setUp(self):
+        self.fast = FastJSONRenderer()
+        self.stock = JSONRenderer()
+
+    def test_matches_json_renderer(self):
+        data = {
+            'id': 1, 'title': 'Капибара\u2028', 'price': '10.50', 'rating': 4.5,
+            'tags': ['a', None, True], 'nested': {'1': 0.0001},
+        }
+        self.assertEqual(self.fast.render(data), self.stock.render(data))
+
+    def test_fragment_is_spliced_as_is(self):
+        body = self.fast.render({'results': [JSONFragment(b'{"id":1,"image":null}')]})
+        self.assertEqual(body, b'{"results":[{"id":1,"image":null}]}')
+
+    def test_indent_uses_json_renderer_format(self):
+        data = {'a': [1, 2]}
+        context = {'indent': 2}
+        self.assertEqual(self.fast.render(data, renderer_context=context), self.stock.render(data, renderer_context=context))
+
+    @skipIf(orjson is None, "orjson is not installed")
+    def test_accepted_float_differences(self):
+        # Различия с JSONRenderer, которые FastJSONRenderer оставляет ради скорости
+        self.assertEqual(self.fast.render({'a': 1e16}), b'{"a":1e16}')
+        self.assertEqual(self.stock.render({'a': 1e16}), b'{"a":1e+16}')
+        self.assertEqual(self.fast.render({'a': 1e-05}), b'{"a":0.00001}')
+        self.assertEqual(self.stock.render({'a': 1e-05}), b'{"a":1e-05}')
+        self.assertEqual(self.fast.render({'a': float('nan'), 'b': float('inf')}), b'{"a":null,"b":null}')
+        with self.assertRaises(ValueError):
+            self.stock.render({'a': float('nan')})
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2', 'replica_3', 'replica_4'], DB_REPLICA_MAX_LAG=5)
+class HealthyReplicasTests(SimpleTestCase):
+    def setUp(self):
+        replicas._lags['expires'] = 0
+        self.addCleanup(replicas._lags.update, expires=0)
+        self.addCleanup(replicas._down.clear)
+        self.addCleanup(cache.delete, replicas.LAG_CACHE_KEY)
+
+    def test_only_measured_replicas_within_lag(self):
+        # replica_4 без замера: монитор его не видел
+        cache.set(replicas.LAG_CACHE_KEY, {'replica_1': 0.5, 'replica_2': None, 'replica_3': 30})
+        self.assertEqual(replicas.healthy_replicas(), ['replica_1'])
+
+    def test_no_measurements(self):
+        self.assertEqual(replicas.healthy_replicas(), [])
+
+    def test_replica_down_after_error(self):
+        cache.set(replicas.LAG_CACHE_KEY, {'replica_1': 0.5, 'replica_2': 0.5})
+        replicas._down['replica_1'] = time.monotonic() + 60
+        self.assertEqual(replicas.healthy_replicas(), ['replica_2'])
+
+
+class HTTPStackTests(HTTPStackMixin, SimpleTestCase):
+    async_views = False
+
+    def test_views_match_stack(self):
+        for name in ('product-list', 'category-tree', 'telegram-auth'):
+            self.assertEqual(iscoroutinefunction(resolve(reverse(name)).func), self.async_views, name)
+        self.assertEqual(isinstance(self.client, ASGIClient), self.async_views)
+
+
+class HTTPStackASGITests(HTTPStackTests):
+    async_views = True
+
+
+class MarketplaceStatsAPITests(MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    def test_stats_within_budget(self):
+        # Холодный кэш: бюджет marketplace-stats проверяет middleware
+        response = self.client.get(reverse('marketplace-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['products'], len(self.products))
+
+        with self.assertMaxQueries(0, 'marketplace-stats'):
+            self.client.get(reverse('marketplace-stats'))
+
+    def test_refresh_command_warms_cache(self):
+        out = StringIO()
+        call_command('refresh_stats', stdout=out)
+        self.assertIn(f'products {len(self.products)}', out.getvalue())
+
+        with self.assertMaxQueries(0, 'marketplace-stats'):
+            response = self.client.get(reverse('marketplace-stats'))
+        self.assertEqual(response.json()['users'], 2)
+
+
+class SchemaUITests(SimpleTestCase):
+    def test_legacy_schema_url_redirects_to_file(self):
+        for name in ('schema-swagger-ui', 'schema-redoc'):
+            response = self.client.get(reverse(name), {'format': 'openapi'})
+            self.assertRedirects(
+                response, reverse('schema-json', kwargs={'fmt': 'json'}),
+                status_code=301, fetch_redirect_response=False,
+            )
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import MarketplaceStatsAPIView, MetricsAPIView
+
+
+urlpatterns = [
+    path('v1/metrics/', MetricsAPIView.as_view(), name='metrics'),
+    path('v1/stats/', MarketplaceStatsAPIView.as_view(), name='marketplace-stats'),
+]
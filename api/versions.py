@@ -0,0 +1,61 @@
+"""
+Версии данных, общие для всех процессов.
+
+Кэш по умолчанию может быть локальным для процесса (locmem без REDIS_URL),
+поэтому сброс кэша в одном воркере не доходит до остальных. Вместо этого
+изменение увеличивает счётчик DataVersion в базе, а процессы сверяют
+с ним свои кэши: значение счётчика само кэшируется на
+DATA_VERSION_CHECK_INTERVAL секунд, так что база спрашивается не чаще
+раза в интервал на процесс, а с общим кэшем (Redis) новая версия видна
+всем сразу.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+
+def _cache_key(name):
+    return f'data-version:{name}'
+
+
+def _read_version(name):
+    # Всегда с primary: реплика может не знать о последнем изменении
+    version = DataVersion.objects.using(DEFAULT_DB_ALIAS).filter(name=name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def get_data_version(name):
+    """Текущая версия набора данных name; 0, если он ещё не менялся."""
+    version = cache.get(_cache_key(name))
+    if version is None:
+        version = _read_version(name)
+        cache.set(_cache_key(name), version, settings.DATA_VERSION_CHECK_INTERVAL)
+    return version
+
+
+async def aget_data_version(name):
+    """get_data_version для async-кода: кэш читается без блокировки event loop."""
+    version = await cache.aget(_cache_key(name))
+    if version is None:
+        version = await sync_to_async(_read_version)(name)
+        await cache.aset(_cache_key(name), version, settings.DATA_VERSION_CHECK_INTERVAL)
+    return version
+
+
+def bump_data_version(name):
+    """Отмечает изменение набора данных name и возвращает новую версию."""
+    queryset = DataVersion.objects.using(DEFAULT_DB_ALIAS).filter(name=name)
+    if not queryset.update(version=F('version') + 1):
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                DataVersion.objects.using(DEFAULT_DB_ALIAS).create(name=name, version=1)
+        except IntegrityError:
+            # Строку только что создал другой процесс
+            queryset.update(version=F('version') + 1)
+    version = _read_version(name)
+    cache.set(_cache_key(name), version, settings.DATA_VERSION_CHECK_INTERVAL)
+    return version
@@ -1,3 +1,81 @@
-from django.shortcuts import render
+from functools import wraps
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponsePermanentRedirect
+from django.urls import reverse
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.views import APIView
+
+from .asyncviews import AsyncAPIView
+from .metrics import registry
+from .replicas import ReplicaReadsMixin, replica_lags
+from .responses import cached_json_response
+from .schema import FORMATS, get_schema_document
+from .stats import aget_marketplace_stats, get_marketplace_stats
+
+
+class MetricsAPIView(APIView):
+    """
+    API для получения метрик процесса в формате Prometheus.
+
+    Доступно только администраторам. Метрики собираются отдельно
+    в каждом процессе, поэтому ответ относится к обработавшему запрос воркеру.
+    """
+    permission_classes = [IsAdminUser]
+    swagger_schema = None
+
+    def get(self, request):
+        # Задержка реплик приходит из кэша и попадает в метрики при перечитывании
+        replica_lags()
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MarketplaceStatsAPIView(ReplicaReadsMixin, AsyncAPIView):
+    """
+    API для получения статистики маркетплейса.
+
+    Возвращает число пользователей, опубликованных объявлений, категорий
+    и городов с объявлениями. Ответ отдаётся из кэша вместе с ETag.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        _, etag, body = get_marketplace_stats()
+        return cached_json_response(request, body, etag, max_age=settings.MARKETPLACE_STATS_MAX_AGE)
+
+    async def aget(self, request):
+        _, etag, body = await aget_marketplace_stats()
+        return cached_json_response(request, body, etag, max_age=settings.MARKETPLACE_STATS_MAX_AGE)
+
+
+class OpenAPISchemaAPIView(APIView):
+    """
+    API для получения OpenAPI-схемы (swagger.json, swagger.yaml).
+
+    Схема отдаётся из файла, собранного командой generate_schema, с ETag;
+    при совпадении If-None-Match возвращается 304.
+    """
+    permission_classes = [AllowAny]
+    swagger_schema = None
+
+    def get(self, request, fmt):
+        if fmt not in FORMATS:
+            raise Http404
+        etag, body, content_type = get_schema_document(fmt)
+        return cached_json_response(
+            request, body, etag, max_age=settings.OPENAPI_SCHEMA_MAX_AGE, content_type=content_type,
+        )
+
+
+def schema_ui_view(view):
+    """
+    Страница Swagger UI или ReDoc. Прежний адрес схемы drf_yasg (?format=openapi)
+    перенаправляется на готовый файл /swagger.json/: сама страница собирается
+    из схемы без путей (api.schema.UIShellGenerator).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.GET.get('format') == 'openapi':
+            return HttpResponsePermanentRedirect(reverse('schema-json', kwargs={'fmt': 'json'}))
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -3,6 +3,22 @@ ASGI config for capybara_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+    gunicorn capybara_api.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Включает async-варианты view (ASYNC_VIEWS). Синхронный код каждого запроса
+выполняется в отдельном потоке, поэтому постоянные соединения (CONN_MAX_AGE)
+не переиспользуются между запросами и по умолчанию отключены; для
+переиспользования соединений задайте DB_POOL_MAX_SIZE (пул psycopg 3).
+
+Основной деплой остаётся на WSGI (capybara_api.wsgi). На нагрузочном тесте
+(python manage.py loadtest, 10 тыс. объявлений, 2 воркера) ASGI даёт
+135–480 rps против 770–1100 rps у синхронного gunicorn, с async-вариантами
+view и без них: каждый хук MiddlewareMixin (CommonMiddleware, SessionMiddleware,
+CsrfViewMiddleware и др.) и каждый синхронный вызов выполняются через
+sync_to_async, и на дешёвых кэшированных ответах эти переходы между потоками
+дороже самого запроса. ASGI имеет смысл, только если запросы ждут внешний
+ввод-вывод; перед переключением прогоните loadtest на обоих стеках.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +28,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'capybara_api.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+from api.reference import warm_reference_snapshot  # noqa: E402
+
+warm_reference_snapshot()
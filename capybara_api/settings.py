@@ -1,6 +1,9 @@
 
+from copy import deepcopy
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
+import importlib.util
 import os
 
 
@@ -51,12 +54,15 @@ INSTALLED_APPS = [
     'capybara_countries',
     'capybara_currencies',
     'capybara_premium',
+    'api',
     'drf_yasg',
     
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
+    'api.middleware.QueryInstrumentationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'capybara_api.urls'
@@ -84,6 +91,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'capybara_api.wsgi.application'
+ASGI_APPLICATION = 'capybara_api.asgi.application'
 
 
 
@@ -98,6 +106,78 @@ DATABASES = {
     }
 }
 
+# Соединения с PostgreSQL. По умолчанию соединение переиспользуется между запросами
+# DB_CONN_MAX_AGE секунд и проверяется перед первым запросом (CONN_HEALTH_CHECKS).
+# DB_POOL_MAX_SIZE > 0 включает пул psycopg 3 (пакет psycopg[binary,pool]); размеры
+# пула задаются на один процесс: всего соединений — до max_size × число воркеров.
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 0))
+if DB_POOL_MAX_SIZE:
+    if importlib.util.find_spec('psycopg_pool') is None:
+        raise ImproperlyConfigured("DB_POOL_MAX_SIZE requires psycopg 3 with the pool extra: psycopg[binary,pool]")
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Реплики для чтения (api.replicas): DB_REPLICA_HOSTS — host или host:port через запятую,
+# база и учётные данные как у default. Безопасные запросы к view с ReplicaReadsMixin
+# читают с реплики; после записи клиент DB_REPLICA_PIN_SECONDS секунд читает с primary
+# (cookie DB_REPLICA_PIN_COOKIE), поэтому окно должно быть больше DB_REPLICA_MAX_LAG.
+# Реплики с задержкой больше DB_REPLICA_MAX_LAG или без замера (замеряет команда
+# replica_lag) не используются; процесс перечитывает замеры из кэша раз в DB_REPLICA_LAG_REFRESH сек
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, map(str.strip, os.getenv('DB_REPLICA_HOSTS', '').split(','))), 1):
+    host, _, port = address.partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = deepcopy(DATABASES['default'])
+    DATABASES[alias].update(HOST=host, PORT=port or DATABASES['default']['PORT'], TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+DB_REPLICA_PIN_COOKIE = 'db_pin'
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 15))
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_LAG_REFRESH = 5
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        },
+        'cards': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'cards',
+            'TIMEOUT': 60 * 60,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        # Локальный LRU-кэш карточек объявлений
+        'cards': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cards',
+            'TIMEOUT': 60 * 60,
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        },
+    }
+
+# Замеры задержки реплик (команда replica_lag) воркеры читают из кэша: без общего
+# кэша замеров не видно, и все чтения уходили бы на primary
+if DATABASE_REPLICAS and not os.getenv('REDIS_URL'):
+    raise ImproperlyConfigured("DB_REPLICA_HOSTS requires a shared cache: set REDIS_URL")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -144,6 +224,9 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
 TELEGRAM_BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Другой сервер Bot API (локальный telegram-bot-api или фейковый, capybara_tg_bot.fake_telegram)
+TELEGRAM_BOT_API_URL = os.getenv("BOT_API_URL")
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [
@@ -166,9 +249,134 @@ ALLOWED_IMAGE_TYPES = [
 
 MAX_IMAGE_SIZE = 5 * 1024 * 1024 
 
+# Задержка (сек) перед фоновым обновлением дерева категорий — склеивает пачку изменений,
+# и сколько секунд хранить собранное дерево, даже если изменений не было
+CATEGORY_TREE_REFRESH_DELAY = 1
+CATEGORY_TREE_TIMEOUT = 60 * 60
+
+# Версии данных (api.versions): как часто (сек) процесс сверяет свои кэши со счётчиком
+# изменений в базе. Без общего кэша (REDIS_URL) другие воркеры видят изменения с этой задержкой
+DATA_VERSION_CHECK_INTERVAL = 5
+
+# Сколько секунд клиент может не перепроверять справочники (страны, валюты, категории)
+REFERENCE_DATA_MAX_AGE = 300
+
+# Статистика маркетплейса (api.stats): сколько секунд хранить посчитанные счётчики
+# (команда refresh_stats по cron обновляет их чаще) и сколько клиент может не перепроверять ответ
+MARKETPLACE_STATS_TIMEOUT = 15 * 60
+MARKETPLACE_STATS_MAX_AGE = 300
+
+# Базовая валюта, к которой приводятся цены объявлений (Product.price_base)
+BASE_CURRENCY_CODE = 'USD'
+
+# Лента по местоположению: размер страницы, минимум объявлений в городе
+# до расширения на страну и время жизни закэшированной первой страницы (сек)
+FEED_PAGE_SIZE = 20
+FEED_MIN_RESULTS = 10
+FEED_FIRST_PAGE_TIMEOUT = 60
+
+# Синхронизация изменений объявлений (/products/v1/changes/): максимум объявлений
+# в ответе, перекрытие окна (сек) и срок хранения tombstone-записей (дней)
+CHANGES_MAX_ITEMS = 500
+CHANGES_OVERLAP_SECONDS = 2
+CHANGES_RETENTION_DAYS = 30
+
+# Просмотры объявлений (capybara_products.viewstats): сколько дней хранить сырые просмотры
+# после свёртки в дневные агрегаты и bloom-фильтр зрителей объявления (бит, хеш-функций);
+# 8192 бита и 5 хешей дают ~2% ложных совпадений на 1000 зрителей
+PRODUCT_VIEWS_RAW_RETENTION_DAYS = 7
+PRODUCT_VIEWS_BLOOM_BITS = 8192
+PRODUCT_VIEWS_BLOOM_HASHES = 5
+
+# Архив объявлений (capybara_products.archive): через сколько дней переносить объявления
+# в статусе «Архив» и любые объявления без изменений, каталог изображений архива в хранилище,
+# размер пачки, минимальная пауза между пачками (сек) и предельная длительность одного запуска
+PRODUCT_ARCHIVE_GRACE_DAYS = 14
+PRODUCT_ARCHIVE_AFTER_DAYS = 180
+PRODUCT_ARCHIVE_MEDIA_DIR = 'archive'
+PRODUCT_ARCHIVE_BATCH_SIZE = 200
+PRODUCT_ARCHIVE_PAUSE = 0.5
+PRODUCT_ARCHIVE_MAX_SECONDS = 15 * 60
+
+# Уведомления бота (capybara_tg_bot.notifier): лимиты Telegram — сообщений в секунду
+# всего и в один чат, сколько уведомлений забирать за раз и на сколько секунд, сколько
+# ждать склейки уведомлений одного пользователя (сек), число попыток и пауза между ними
+# (сек), как часто проверять очередь (сек); сколько дней хранить отправленные и недоставленные
+# уведомления и как часто отправитель их удаляет (сек); за сколько часов предупреждать об окончании премиума
+BOT_NOTIFY_GLOBAL_RATE = 30
+BOT_NOTIFY_CHAT_RATE = 1
+BOT_NOTIFY_BATCH_SIZE = 200
+BOT_NOTIFY_LEASE_SECONDS = 120
+BOT_NOTIFY_COALESCE_SECONDS = 10
+BOT_NOTIFY_MAX_ATTEMPTS = 5
+BOT_NOTIFY_RETRY_DELAY = 30
+BOT_NOTIFY_POLL_INTERVAL = 2
+BOT_NOTIFY_RETENTION_DAYS = 30
+BOT_NOTIFY_PURGE_INTERVAL = 60 * 60
+PREMIUM_EXPIRY_NOTICE_HOURS = 24
+
+# Максимум id в одном запросе /products/v1/batch/
+PRODUCTS_BATCH_MAX_IDS = 100
+
+# Максимум действий в одном запросе /products/v1/favorites/sync/
+FAVORITES_SYNC_MAX_ACTIONS = 100
+
+# Алиас кэша для готовых карточек объявлений в списках (см. CACHES)
+PRODUCT_CARD_CACHE = 'cards'
+
+# Инструментирование SQL (api.middleware.QueryInstrumentationMiddleware): заголовок
+# Server-Timing, сколько повторов одного SQL считать N+1 для предупреждения в лог
+# и бюджеты запросов по имени view, которые проверяются в тестах (QUERY_BUDGET_ENFORCE)
+SERVER_TIMING_HEADER = True
+QUERY_DUPLICATE_WARNING = 10
+QUERY_BUDGET_ENFORCE = False
+QUERY_BUDGET_DEFAULT = 50
+# Бюджеты с учётом холодных кэшей: сборка справочников — 5 запросов, пользователь из JWT — 1,
+# проверка версии данных (api.versions) — 1
+QUERY_BUDGETS = {
+    'product-list': 10,
+    'product-feed': 11,
+    'product-batch': 10,
+    'product-changes': 6,
+    'favorite-list': 5,
+    'category-tree': 5,
+    'marketplace-stats': 3,
+    'category-list': 7,
+    'country-list': 7,
+    'currencies-list': 7,
+}
+
+# Профилирование запросов (api.middleware.ProfilingMiddleware): заголовок, по которому
+# администратор включает профайлер, доля случайно профилируемых запросов, интервал
+# сэмплирования (сек), каталог для collapsed-стеков и сколько профилей хранить
+# на каждый view: не больше PROFILING_MAX_FILES и не дольше PROFILING_MAX_AGE_DAYS дней
+PROFILING_HEADER = 'X-Profile'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.002
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = 500
+PROFILING_MAX_AGE_DAYS = 7
+
+# Холодный старт (manage.py bench_imports): бюджет времени импорта при django.setup() (мс)
+# и тяжёлые пакеты, которые должны импортироваться при первом использовании, а не при старте
+STARTUP_IMPORT_BUDGET_MS = 200
+STARTUP_LAZY_IMPORTS = ['mistralai', 'aiogram']
+
+# OpenAPI-схема (api.schema): каталог файлов, которые пишет generate_schema при деплое,
+# и сколько секунд клиент может не перепроверять схему. Swagger UI и ReDoc загружают
+# готовый файл вместо того, чтобы собирать схему на каждую страницу
+OPENAPI_SCHEMA_DIR = os.getenv('OPENAPI_SCHEMA_DIR', os.path.join(BASE_DIR, 'openapi'))
+OPENAPI_SCHEMA_MAX_AGE = 300
+SWAGGER_SETTINGS = {'SPEC_URL': ('schema-json', {'fmt': 'json'})}
+REDOC_SETTINGS = {'SPEC_URL': ('schema-json', {'fmt': 'json'})}
+
+# Async-варианты view (api.asyncviews) для развёртывания под ASGI; asgi.py включает их
+# по умолчанию. Тесты с api.testing.HTTPStackMixin при этом ходят через ASGI-обработчик
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+
 REST_FRAMEWORK = {
         'DEFAULT_RENDERER_CLASSES': [
-            "rest_framework.renderers.JSONRenderer",
+            "api.renderers.FastJSONRenderer",
         ],
         'DEFAULT_AUTHENTICATION_CLASSES': (
         'capybara_tg_user.authentication.JWTAuthenticationFromCookie',
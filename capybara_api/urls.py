@@ -2,22 +2,20 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
 from django.conf import settings
 from django.conf.urls.static import static
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Capybara API",
-      default_version='v1',
-      description="API маркетплейса Capybara",
-      terms_of_service="https://capybarashop.store",
-      contact=openapi.Contact(email="ostrovanaleksei@gmail.com"),
+from api.schema import API_INFO, UIShellGenerator
+from api.views import OpenAPISchemaAPIView, schema_ui_view
 
-   ),
+# Страницы Swagger UI и ReDoc; сама схема отдаётся готовым файлом (api.schema),
+# ?format=openapi на этих страницах перенаправляется на /swagger.json/
+schema_view = get_schema_view(
+   API_INFO,
    public=True,
    permission_classes=(permissions.AllowAny,),
+   generator_class=UIShellGenerator,
 )
 
 urlpatterns = [
@@ -27,10 +25,11 @@ urlpatterns = [
     path('currencies/', include('capybara_currencies.urls')),
     path('products/', include('capybara_products.urls')),
     path('users/', include('capybara_tg_user.urls')),
+    path('api/', include('api.urls')),
     
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger.<str:fmt>/', OpenAPISchemaAPIView.as_view(), name='schema-json'),
+    path('swagger/', schema_ui_view(schema_view.with_ui('swagger', cache_timeout=0)), name='schema-swagger-ui'),
+    path('redoc/', schema_ui_view(schema_view.with_ui('redoc', cache_timeout=0)), name='schema-redoc'),
 ]
 
 if settings.DEBUG:
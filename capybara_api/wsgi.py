@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'capybara_api.settings')
 
 application = get_wsgi_application()
+
+from api.reference import warm_reference_snapshot  # noqa: E402
+
+warm_reference_snapshot()
@@ -5,3 +5,6 @@ class CapybaraCategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'capybara_categories'
     verbose_name = 'Categories'
+
+    def ready(self):
+        import capybara_categories.signals
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from capybara_products.models import Product
+from .models import Category, SubCategory
+from .tree import schedule_category_tree_refresh
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def category_changed(sender, instance, **kwargs):
+    schedule_category_tree_refresh()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    # Дерево считает только опубликованные объявления по категориям: правка
+    # текста или цены его не меняет. Подключён после сигналов capybara_products,
+    # поэтому видит статус после модерации
+    tree_key = instance._tree_key()
+    if created or getattr(instance, '_loaded_tree', None) != tree_key:
+        schedule_category_tree_refresh()
+    instance._loaded_tree = tree_key
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    schedule_category_tree_refresh()
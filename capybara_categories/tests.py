@@ -1,3 +1,74 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.testing import HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin
+from capybara_products.models import Product
+
+
+class CategoryTreeTests(HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    def test_tree_within_budget(self):
+        # Холодный кэш: бюджет category-tree проверяет middleware
+        response = self.client.get(reverse('category-tree'))
+        self.assertEqual(response.status_code, 200)
+        counts = {item['slug']: item['products_count'] for item in response.json()}
+        self.assertEqual(counts, {self.category.slug: 4, self.other_category.slug: 4})
+
+        with self.assertMaxQueries(0, 'category-tree'):
+            response = self.client.get(reverse('category-tree'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_within_budget(self):
+        response = self.client.get(reverse('category-list'))
+        self.assertEqual([item['slug'] for item in response.json()], [self.category.slug, self.other_category.slug])
+
+        with self.assertMaxQueries(0, 'category-list'):
+            self.client.get(reverse('category-list'))
+
+    def test_detail(self):
+        response = self.client.get(reverse('category-detail', kwargs={'slug': self.category.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['slug'], self.category.slug)
+
+        path = reverse('subcategory-detail', kwargs={'super_slug': self.category.slug, 'slug': self.subcategory.slug})
+        self.assertEqual(self.client.get(path).json()['category'], self.category.slug)
+        self.assertEqual(self.client.get(reverse('category-detail', kwargs={'slug': 'missing'})).status_code, 404)
+
+
+class CategoryTreeASGITests(CategoryTreeTests):
+    async_views = True
+
+
+@mock.patch('capybara_categories.signals.schedule_category_tree_refresh')
+class CategoryTreeRefreshTests(MarketplaceDataMixin, APITestCase):
+    def test_edit_does_not_refresh(self, refresh):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.title = 'Renamed'
+        product.price = 150
+        product.save()
+        refresh.assert_not_called()
+
+    def test_status_or_category_change_refreshes(self, refresh):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.status = 4
+        product.save()
+        self.assertEqual(refresh.call_count, 1)
+
+        product.category = self.category
+        product.save()
+        self.assertEqual(refresh.call_count, 2)
+
+        product.save()
+        self.assertEqual(refresh.call_count, 2)
+
+    def test_create_and_delete_refresh(self, refresh):
+        with mock.patch('capybara_products.signals.moderate_goods', return_value=True):
+            product = Product.objects.create(
+                author=self.author, category=self.category, title='New', description='Description',
+                country=self.country, city=self.city, price=1, currency=self.usd,
+            )
+        self.assertEqual(refresh.call_count, 1)
+
+        product.delete()
+        self.assertEqual(refresh.call_count, 2)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count
+
+from api.versions import aget_data_version, bump_data_version, get_data_version
+from capybara_products.models import Product
+
+from .models import Category, SubCategory
+
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_CACHE_KEY = 'categories:tree:v2'
+CATEGORY_TREE_VERSION = 'category-tree'
+
+_refresh_lock = threading.Lock()
+_refresh_pending = threading.Event()
+
+
+def _image_url(image):
+    return image.url if image else None
+
+
+def build_category_tree():
+    """
+    Собирает дерево категорий с количеством опубликованных объявлений.
+
+    Количество объявлений считается одним сгруппированным запросом
+    по (category, subcategory), а не отдельным COUNT на каждую категорию.
+    Возвращает кортеж (etag, body), где body — готовый JSON в байтах.
+    """
+    counts = (
+        Product.objects.filter(status=3)
+        .values('category_id', 'subcategory_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    category_counts = {}
+    subcategory_counts = {}
+    for row in counts:
+        category_counts[row['category_id']] = category_counts.get(row['category_id'], 0) + row['total']
+        if row['subcategory_id'] is not None:
+            subcategory_counts[row['subcategory_id']] = subcategory_counts.get(row['subcategory_id'], 0) + row['total']
+
+    subcategories = {}
+    for sub in SubCategory.objects.all():
+        subcategories.setdefault(sub.category_id, []).append({
+            'id': sub.id,
+            'name': sub.name,
+            'slug': sub.slug,
+            'image': _image_url(sub.image),
+            'products_count': subcategory_counts.get(sub.id, 0),
+        })
+
+    tree = [
+        {
+            'id': category.id,
+            'name': category.name,
+            'slug': category.slug,
+            'image': _image_url(category.image),
+            'products_count': category_counts.get(category.id, 0),
+            'subcategories': subcategories.get(category.id, []),
+        }
+        for category in Category.objects.all()
+    ]
+
+    body = json.dumps(tree, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    return etag, body
+
+
+def refresh_category_tree(version=None):
+    """Пересобирает дерево категорий и кладёт его в кэш вместе с версией данных."""
+    if version is None:
+        # Версия читается до сборки: изменение во время сборки даст более новую
+        version = get_data_version(CATEGORY_TREE_VERSION)
+    etag, body = build_category_tree()
+    cache.set(CATEGORY_TREE_CACHE_KEY, (version, etag, body), timeout=settings.CATEGORY_TREE_TIMEOUT)
+    return etag, body
+
+
+def get_category_tree():
+    """
+    Возвращает (etag, body) дерева категорий из кэша.
+
+    Дерево в кэше помечено версией данных (api.versions). Запрос собирает
+    его сам, только если кэш холодный или версия устарела: изменение в другом
+    процессе, чей фоновый пересбор не попал в локальный кэш этого воркера.
+    """
+    version = get_data_version(CATEGORY_TREE_VERSION)
+    cached = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1:]
+    return refresh_category_tree(version)
+
+
+async def aget_category_tree():
+    """get_category_tree для async-view: кэш читается без блокировки event loop."""
+    version = await aget_data_version(CATEGORY_TREE_VERSION)
+    cached = await cache.aget(CATEGORY_TREE_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1:]
+    return await sync_to_async(refresh_category_tree)(version)
+
+
+def _refresh_worker():
+    # Небольшая задержка склеивает пачку изменений в одно обновление
+    time.sleep(settings.CATEGORY_TREE_REFRESH_DELAY)
+    try:
+        while _refresh_pending.is_set():
+            _refresh_pending.clear()
+            try:
+                refresh_category_tree()
+            except Exception:
+                logger.exception("Category tree refresh failed")
+    finally:
+        connections.close_all()
+        _refresh_lock.release()
+
+    # Изменение могло прийти между последней проверкой и снятием блокировки
+    if _refresh_pending.is_set():
+        _start_refresh()
+
+
+def _start_refresh():
+    _refresh_pending.set()
+    if not _refresh_lock.acquire(blocking=False):
+        # Обновление уже идёт — оно подхватит выставленный флаг
+        return
+    threading.Thread(target=_refresh_worker, name='category-tree-refresh', daemon=True).start()
+
+
+def _tree_changed():
+    # Версия увеличивается сразу, а не в фоновом потоке: процесс задачи может
+    # завершиться раньше, чем поток успеет отработать
+    bump_data_version(CATEGORY_TREE_VERSION)
+    _start_refresh()
+
+
+def schedule_category_tree_refresh():
+    """
+    После коммита текущей транзакции отмечает изменение дерева для всех
+    процессов и запускает его фоновое обновление в этом.
+    """
+    transaction.on_commit(_tree_changed)
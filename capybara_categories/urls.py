@@ -1,11 +1,12 @@
 
 from django.urls import path
 from .views import (
-    CategoryAPIView, CategoryDetailAPIView, SubCategoryDetailAPIView
+    CategoryAPIView, CategoryTreeAPIView, CategoryDetailAPIView, SubCategoryDetailAPIView
 )
 
 urlpatterns = [
     path('v1/', CategoryAPIView.as_view(), name='category-list'),
+    path('v1/tree/', CategoryTreeAPIView.as_view(), name='category-tree'),
     path('v1/<slug:slug>/', CategoryDetailAPIView.as_view(), name='category-detail'),
     path('v1/<slug:super_slug>/<slug:slug>/', SubCategoryDetailAPIView.as_view(), name='subcategory-detail'),
 ]
\ No newline at end of file
@@ -1,44 +1,82 @@
 
     
 from rest_framework import generics
-from django.shortcuts import get_object_or_404
+from rest_framework.permissions import AllowAny
+from api.asyncviews import AsyncAPIView, AsyncAPIViewMixin
+from api.reference import areference_response, reference_response
+from api.replicas import ReplicaReadsMixin
+from api.responses import cached_json_response
 from .models import Category,  SubCategory
 
 from .serializers import CategoryListSerializer, CategoryDetailSerializer, SubCategoryDetailSerializer
+from .tree import aget_category_tree, get_category_tree
 
 
-class CategoryAPIView(generics.ListAPIView):
+class CategoryAPIView(AsyncAPIViewMixin, ReplicaReadsMixin, generics.ListAPIView):
     """
     API для просмотра категорий.
 
+    Ответ отдаётся из снимка справочников без обращения к базе.
     """
     queryset = Category.objects.all()
     serializer_class = CategoryListSerializer
 
+    def list(self, request, *args, **kwargs):
+        return reference_response(request, ('categories',))
 
-class CategoryDetailAPIView(generics.RetrieveAPIView):
+    async def aget(self, request, *args, **kwargs):
+        return await areference_response(request, ('categories',))
+
+
+class CategoryTreeAPIView(ReplicaReadsMixin, AsyncAPIView):
+    """
+    API для получения дерева категорий.
+
+    Возвращает категории, их подкатегории и количество опубликованных
+    объявлений одним ответом. Ответ собирается заранее и отдаётся из кэша
+    вместе с ETag; при совпадении If-None-Match возвращается 304.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        etag, body = get_category_tree()
+        return cached_json_response(request, body, etag)
+
+    async def aget(self, request):
+        etag, body = await aget_category_tree()
+        return cached_json_response(request, body, etag)
+
+
+class CategoryDetailAPIView(AsyncAPIViewMixin, ReplicaReadsMixin, generics.RetrieveAPIView):
     """
     API для просмотра деталей категории.
 
+    Ответ отдаётся из снимка справочников без обращения к базе.
     """
     queryset = Category.objects.all()
     serializer_class = CategoryDetailSerializer
     lookup_field = 'slug' 
 
+    def retrieve(self, request, *args, **kwargs):
+        return reference_response(request, ('category', kwargs['slug']), model=Category)
 
-class SubCategoryDetailAPIView(generics.RetrieveAPIView):
+    async def aget(self, request, *args, **kwargs):
+        return await areference_response(request, ('category', kwargs['slug']), model=Category)
+
+
+class SubCategoryDetailAPIView(AsyncAPIViewMixin, ReplicaReadsMixin, generics.RetrieveAPIView):
     """
     API для просмотра детелей подкатегории.
 
+    Ответ отдаётся из снимка справочников без обращения к базе.
     """
     serializer_class = SubCategoryDetailSerializer
     lookup_field = 'slug'
 
-    def get_object(self):
-        super_slug = self.kwargs['super_slug']
-        sub_slug = self.kwargs['slug']
-        return get_object_or_404(
-            SubCategory,
-            slug=sub_slug,
-            category__slug=super_slug  
-        ) # изменения 
\ No newline at end of file
+    def retrieve(self, request, *args, **kwargs):
+        key = ('subcategory', kwargs['super_slug'], kwargs['slug'])
+        return reference_response(request, key, model=SubCategory)
+
+    async def aget(self, request, *args, **kwargs):
+        key = ('subcategory', kwargs['super_slug'], kwargs['slug'])
+        return await areference_response(request, key, model=SubCategory)
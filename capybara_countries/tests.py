@@ -1,3 +1,23 @@
-from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from api.testing import HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin
+
+
+class CountryAPITests(HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    def test_list_within_budget(self):
+        # Холодный снимок справочников: бюджет country-list проверяет middleware
+        response = self.client.get(reverse('country-list'))
+        self.assertEqual([item['name'] for item in response.json()], ['Argentina'])
+
+        with self.assertMaxQueries(0, 'country-list'):
+            self.client.get(reverse('country-list'))
+
+    def test_detail_lists_cities(self):
+        response = self.client.get(reverse('country-detail', kwargs={'pk': self.country.pk}))
+        self.assertEqual([city['name'] for city in response.json()['cities']], ['Buenos Aires', 'Cordoba'])
+        self.assertEqual(self.client.get(reverse('country-detail', kwargs={'pk': 0})).status_code, 404)
+
+
+class CountryAPIASGITests(CountryAPITests):
+    async_views = True
@@ -1,16 +1,20 @@
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 
+from api.asyncviews import AsyncAPIViewMixin
+from api.replicas import ReplicaReadsMixin
+from api.reference import areference_response, reference_response
 from .models import Country
 from .serializers import CountrySerializer, CountryDetailSerializer
 
 
-class CountryViewSet(viewsets.ReadOnlyModelViewSet):
+class CountryViewSet(AsyncAPIViewMixin, ReplicaReadsMixin, viewsets.ReadOnlyModelViewSet):
     """
     API для работы со странами и городами.
     
     Предоставляет доступ только для чтения к списку стран и детальной информации
     о конкретной стране, включая список городов в ней.
+    Ответы отдаются из снимка справочников без обращения к базе.
     """
     queryset = Country.objects.all().prefetch_related('cities')
     permission_classes = [AllowAny]
@@ -26,3 +30,22 @@ class CountryViewSet(viewsets.ReadOnlyModelViewSet):
         if self.action == 'retrieve':
             return CountryDetailSerializer
         return CountrySerializer
+
+    def list(self, request, *args, **kwargs):
+        return reference_response(request, ('countries',))
+
+    async def alist(self, request, *args, **kwargs):
+        return await areference_response(request, ('countries',))
+
+    def retrieve(self, request, *args, **kwargs):
+        return reference_response(request, self.get_country_key(), model=Country)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await areference_response(request, self.get_country_key(), model=Country)
+
+    def get_country_key(self):
+        try:
+            pk = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            pk = None
+        return ('country', pk)
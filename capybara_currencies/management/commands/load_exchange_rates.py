@@ -0,0 +1,60 @@
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Upper
+
+from capybara_currencies.models import Currency
+from capybara_products.pricing import recompute_price_base
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает курсы валют из JSON-файла и пересчитывает цены объявлений "
+        "в базовой валюте. Формат файла: "
+        '{"base": "USD", "rates": {"ARS": 1150.5, "EUR": 0.92}} — '
+        "сколько единиц валюты стоит одна единица базовой."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к JSON-файлу с курсами")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read rates file: {e}")
+
+        base = str(data.get('base', settings.BASE_CURRENCY_CODE)).upper()
+        if base != settings.BASE_CURRENCY_CODE:
+            raise CommandError(
+                f"Rates are based on {base}, expected {settings.BASE_CURRENCY_CODE}"
+            )
+
+        try:
+            rates = {code.upper(): Decimal(str(rate)) for code, rate in data['rates'].items()}
+        except (KeyError, AttributeError, InvalidOperation) as e:
+            raise CommandError(f"Invalid rates format: {e}")
+        rates[base] = Decimal(1)
+
+        changed = []
+        # Коды в базе могут быть в любом регистре, ключи курсов уже приведены к верхнему
+        for currency in Currency.objects.alias(code_upper=Upper('code')).filter(code_upper__in=rates.keys()):
+            rate = rates[currency.code.upper()]
+            if rate <= 0:
+                raise CommandError(f"Rate for {currency.code} must be positive")
+            if currency.rate != rate:
+                currency.rate = rate
+                changed.append(currency)
+
+        with transaction.atomic():
+            # bulk_update не шлёт post_save, поэтому цены пересчитываем здесь одним проходом
+            Currency.objects.bulk_update(changed, ['rate'])
+            updated = recompute_price_base([currency.pk for currency in changed])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {len(changed)} rates, recomputed {updated} product prices"
+        ))
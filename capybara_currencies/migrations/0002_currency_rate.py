@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_currencies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currency',
+            name='rate',
+            field=models.DecimalField(decimal_places=8, default=1, max_digits=20, verbose_name='Rate (per 1 base currency)'),
+        ),
+    ]
@@ -5,6 +5,7 @@ class Currency(models.Model):
     name = models.CharField(max_length=20, db_index=True, verbose_name="Name")
     code = models.CharField(max_length=8, db_index=True, verbose_name="Code")
     order = models.SmallIntegerField(default=0, db_index=True, verbose_name='Order')
+    rate = models.DecimalField(max_digits=20, decimal_places=8, default=1, verbose_name='Rate (per 1 base currency)')
 
     class Meta:
         verbose_name = "Currency"
@@ -14,4 +15,14 @@ class Currency(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем курс из базы, чтобы пересчитывать цены только при его изменении
+        instance._loaded_rate = instance.__dict__.get('rate')
+        return instance
+
+    def rate_changed(self) -> bool:
+        return getattr(self, '_loaded_rate', None) != self.rate
+
 
@@ -0,0 +1,19 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.testing import HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin
+
+
+class CurrencyAPITests(HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    def test_list_within_budget(self):
+        # Холодный снимок справочников: бюджет currencies-list проверяет middleware
+        response = self.client.get(reverse('currencies-list'))
+        self.assertEqual([item['code'] for item in response.json()], ['USD', 'ARS'])
+
+        with self.assertMaxQueries(0, 'currencies-list'):
+            response = self.client.get(reverse('currencies-list'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class CurrencyAPIASGITests(CurrencyAPITests):
+    async_views = True
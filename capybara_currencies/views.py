@@ -1,17 +1,28 @@
 from rest_framework import viewsets, mixins
 from rest_framework.permissions import AllowAny
 
+from api.asyncviews import AsyncAPIViewMixin
+from api.replicas import ReplicaReadsMixin
+from api.reference import areference_response, reference_response
 from .models import Currency
 from .serializers import CurrencySerializer
 
-class CurrencyViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class CurrencyViewSet(AsyncAPIViewMixin, ReplicaReadsMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     API для работы с валютами.
     
     Предоставляет доступ только для чтения к списку валют, используемых в системе.
     Валюты используются при создании и отображении продуктов.
+    Ответ отдаётся из снимка справочников без обращения к базе.
     """
     
     queryset = Currency.objects.all()
     serializer_class = CurrencySerializer
     permission_classes = [AllowAny]
+
+    def list(self, request, *args, **kwargs):
+        return reference_response(request, ('currencies',))
+
+    async def alist(self, request, *args, **kwargs):
+        return await areference_response(request, ('currencies',))
+
@@ -0,0 +1,29 @@
+from datetime import timedelta
+from html import escape
+from django.conf import settings
+from django.utils import timezone
+from capybara_tg_bot.models import Notification
+from capybara_tg_bot.notifications import enqueue
+from .models import ProductPremium
+
+
+def notify_expiring_premiums():
+    now = timezone.now()
+    expiring = ProductPremium.objects.filter(
+        is_active=True,
+        end_date__gt=now,
+        end_date__lte=now + timedelta(hours=settings.PREMIUM_EXPIRY_NOTICE_HOURS),
+    ).values_list('pk', 'end_date', 'product__title', 'product__author__telegram_id')
+
+    count = 0
+    for pk, end_date, title, chat_id in expiring.iterator():
+        # В ключе дата окончания: после продления придёт новое предупреждение
+        end = timezone.localtime(end_date)
+        enqueue(
+            chat_id, Notification.KIND_PREMIUM_EXPIRING,
+            f"⭐ «{escape(title)}» — до {end:%d.%m %H:%M}",
+            key=f"premium_expiring:{pk}:{end:%Y%m%d%H%M}",
+        )
+        count += 1
+
+    return f"Found {count} expiring premiums"
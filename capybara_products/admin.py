@@ -1,8 +1,9 @@
 from django.contrib import admin
-from .models import Product, ProductImage, Favorite
+from .models import Product, ProductImage, Favorite, ProductTombstone
 
 
 admin.site.register(Product)
 admin.site.register(ProductImage)
 admin.site.register(Favorite)
+admin.site.register(ProductTombstone)
 
@@ -0,0 +1,226 @@
+"""
+Архив объявлений.
+
+Объявления в статусе «Архив» дольше PRODUCT_ARCHIVE_GRACE_DAYS и любые
+объявления без изменений дольше PRODUCT_ARCHIVE_AFTER_DAYS переносятся
+из Product в ArchivedProduct пачками, чтобы индексы горячей таблицы, общие
+с лентой, оставались маленькими. Изображения переезжают в каталог
+PRODUCT_ARCHIVE_MEDIA_DIR хранилища, детали архивного объявления по-прежнему
+отдаются /products/v1/<id>/ с теми же правилами видимости.
+
+Изображения и избранное переезжают в архивную запись (пользователи получают
+уведомление бота), просмотры удаляются; объявления с другими связанными
+записями (например, оплаченным премиумом) в архив не переносятся.
+
+Автор может вернуть объявление из архива (restore_product) или удалить его
+(delete_archived_product).
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from capybara_tg_bot.notifications import notify_favorites_archived
+
+from .feed import invalidate_feed_cache
+from .models import ArchivedProduct, Favorite, Product, ProductImage, ProductTombstone
+
+
+logger = logging.getLogger(__name__)
+
+# Связи, которые удаляются вместе с объявлением (имена обратных связей Product)
+DROPPED_RELATIONS = ('images', 'favorited_by', 'views', 'daily_views', 'view_bloom')
+
+
+def archivable(now=None):
+    """Объявления, которые пора перенести в архив."""
+    now = now or timezone.now()
+    queryset = Product.objects.filter(
+        Q(status=4, update_at__lt=now - timedelta(days=settings.PRODUCT_ARCHIVE_GRACE_DAYS))
+        | Q(update_at__lt=now - timedelta(days=settings.PRODUCT_ARCHIVE_AFTER_DAYS))
+    )
+    for relation in Product._meta.related_objects:
+        if relation.get_accessor_name() not in DROPPED_RELATIONS:
+            related = relation.related_model._base_manager.filter(**{relation.field.name: OuterRef('pk')})
+            queryset = queryset.exclude(Exists(related))
+    return queryset
+
+
+def copy_in_storage(name, target, copies):
+    """
+    Копирует файл хранилища в target и возвращает новый путь; путь копии
+    добавляется в copies. Отсутствующий файл остаётся как есть.
+    """
+    if not default_storage.exists(name):
+        return name
+    with default_storage.open(name) as source:
+        copy = default_storage.save(target, source)
+    copies.append(copy)
+    return copy
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning("Failed to delete product image %s", name)
+
+
+def archive_batch(ids):
+    """
+    Переносит объявления ids в архив одной транзакцией и возвращает их число.
+
+    Условия архивации перепроверяются под блокировкой: объявление, которое
+    успели изменить, остаётся на месте. Файлы копируются в транзакции и
+    удаляются, если она откатилась; оригиналы удаляются после коммита.
+    """
+    copies = []
+    try:
+        with transaction.atomic():
+            products = list(archivable().filter(pk__in=ids).select_for_update(skip_locked=True))
+            if not products:
+                return 0
+            pks = [product.pk for product in products]
+            titles = {product.pk: product.title for product in products}
+
+            images = defaultdict(list)
+            for product_id, name in ProductImage.objects.filter(product_id__in=pks).order_by('pk').values_list('product_id', 'image'):
+                if name:
+                    images[product_id].append(name)
+
+            favorited_by, chats = defaultdict(list), []
+            favorites = Favorite.objects.filter(product_id__in=pks).order_by('pk')
+            for product_id, user_id, chat_id in favorites.values_list('product_id', 'user_id', 'user__telegram_id'):
+                favorited_by[product_id].append(user_id)
+                chats.append((chat_id, titles[product_id]))
+
+            fields = [field.attname for field in Product._meta.concrete_fields]
+            ArchivedProduct.objects.bulk_create([
+                ArchivedProduct(
+                    **{name: getattr(product, name) for name in fields},
+                    images=[
+                        copy_in_storage(name, f'{settings.PRODUCT_ARCHIVE_MEDIA_DIR}/{name}', copies)
+                        for name in images[product.pk]
+                    ],
+                    favorited_by=favorited_by[product.pk],
+                )
+                for product in products
+            ])
+
+            published = [product for product in products if product.status == 3]
+            ProductTombstone.objects.bulk_create([
+                ProductTombstone(product_id=product.pk, reason=ProductTombstone.REASON_ARCHIVED) for product in published
+            ])
+            notify_favorites_archived(chats)
+            # Удаление в обход ORM: сигналы Product и Favorite на каждую строку здесь не нужны
+            _delete_rows(pks)
+
+            originals = [name for names in images.values() for name in names]
+            transaction.on_commit(lambda: _after_change(published, originals))
+    except Exception:
+        delete_files(copies)
+        raise
+    return len(products)
+
+
+def _delete_rows(pks):
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        for relation in Product._meta.related_objects:
+            if relation.get_accessor_name() in DROPPED_RELATIONS:
+                table, column = relation.related_model._meta.db_table, relation.field.column
+                cursor.execute(f"DELETE FROM {quote(table)} WHERE {quote(column)} IN ({placeholders})", pks)
+        cursor.execute(f"DELETE FROM {quote(Product._meta.db_table)} WHERE id IN ({placeholders})", pks)
+
+
+def _after_change(published, files):
+    """После коммита: сбрасывает кэши ленты и дерева категорий, удаляет старые файлы."""
+    for product in published:
+        invalidate_feed_cache(product)
+    if published:
+        from capybara_categories.tree import schedule_category_tree_refresh
+        schedule_category_tree_refresh()
+    delete_files(files)
+
+
+def restore_product(pk):
+    """
+    Возвращает объявление pk из архива в Product с изображениями и избранным.
+
+    Поля и дата создания сохраняются, update_at становится текущим временем,
+    поэтому объявление не уходит в архив снова сразу. Повторной модерации нет:
+    сигналы Product не шлются. Возвращает восстановленный Product.
+    """
+    copies = []
+    try:
+        with transaction.atomic():
+            archived = ArchivedProduct.objects.select_for_update().get(pk=pk)
+            fields = [field.attname for field in Product._meta.concrete_fields]
+            product = Product(**{name: getattr(archived, name) for name in fields})
+            Product.objects.bulk_create([product])
+
+            prefix = f'{settings.PRODUCT_ARCHIVE_MEDIA_DIR}/'
+            ProductImage.objects.bulk_create([
+                ProductImage(product_id=pk, image=copy_in_storage(name, name.removeprefix(prefix), copies))
+                for name in archived.images
+            ])
+            # Пользователи, удалённые за время архива, пропускаются
+            users = list(get_user_model().objects.filter(pk__in=archived.favorited_by).values_list('pk', flat=True))
+            Favorite.objects.bulk_create([Favorite(user_id=user_id, product_id=pk) for user_id in users])
+            # bulk_create ставит create_at текущим временем: восстановление не поднимает объявление в ленте
+            Product.objects.filter(pk=pk).update(create_at=archived.create_at, favorites_count=len(users))
+            product.create_at, product.favorites_count = archived.create_at, len(users)
+
+            archived.delete()
+            published = [product] if product.status == 3 else []
+            transaction.on_commit(lambda: _after_change(published, archived.images))
+    except Exception:
+        delete_files(copies)
+        raise
+    return product
+
+
+def delete_archived_product(archived):
+    """Удаляет объявление из архива вместе с его изображениями."""
+    with transaction.atomic():
+        ProductTombstone.objects.create(product_id=archived.pk, reason=ProductTombstone.REASON_DELETED)
+        archived.delete()
+        transaction.on_commit(lambda: delete_files(archived.images))
+
+
+def archive_products(batch_size=None, pause=None, max_seconds=None):
+    """
+    Переносит в архив все подходящие объявления пачками по batch_size.
+
+    После каждой пачки мувер ждёт не меньше, чем она выполнялась (и не меньше
+    pause), поэтому занимает базу не больше половины времени. Через max_seconds
+    останавливается; следующий запуск продолжит с оставшихся. Возвращает
+    число перенесённых объявлений.
+    """
+    batch_size = batch_size or settings.PRODUCT_ARCHIVE_BATCH_SIZE
+    pause = settings.PRODUCT_ARCHIVE_PAUSE if pause is None else pause
+    max_seconds = max_seconds or settings.PRODUCT_ARCHIVE_MAX_SECONDS
+
+    started = time.monotonic()
+    last_pk, total = 0, 0
+    while True:
+        ids = list(archivable().filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        batch_started = time.monotonic()
+        total += archive_batch(ids)
+        elapsed = time.monotonic() - batch_started
+        last_pk = ids[-1]
+        if time.monotonic() - started >= max_seconds:
+            break
+        time.sleep(max(pause, elapsed))
+    return total
@@ -0,0 +1,158 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api import metrics
+from api.reference import aget_reference_snapshot, get_reference_snapshot
+from api.renderers import FastJSONRenderer, JSONFragment
+
+from .serializers import ProductListFastSerializer
+
+
+# Поля, по которым строится ключ карточки; их достаточно выбрать для страницы списка
+CARD_KEY_FIELDS = ('id', 'update_at', 'favorites_count', 'views_count')
+
+metrics.describe('product_card_cache_hits_total', 'Product cards served from the card cache')
+metrics.describe('product_card_cache_misses_total', 'Product cards built because they were not cached')
+metrics.describe('product_card_cache_lookup_seconds', 'Time of one get_many over a page of cards')
+metrics.describe('product_card_build_seconds', 'Time to load and encode one missing card')
+metrics.describe('product_card_saved_seconds_total', 'Estimated build time saved by card cache hits')
+
+_renderer = FastJSONRenderer()
+
+
+def card_cache_key(row, reference_version):
+    """
+    Ключ карточки: (id, update_at, counters_version).
+
+    counters_version меняется вместе со счётчиками, которые не трогают
+    update_at; версия справочников сбрасывает карточки после переименования
+    категорий, городов и валют.
+    """
+    counters_version = f"{row['favorites_count']}.{row['views_count']}"
+    updated = int(row['update_at'].timestamp() * 1_000_000)
+    return f"product:{row['id']}:{updated}:{counters_version}:{reference_version}"
+
+
+class ProductCards:
+    """
+    Готовые JSON-карточки объявлений для списков.
+
+    Карточка — вывод ProductListFastSerializer, закодированный без is_favorited
+    и product_url: флаг зависит от пользователя, ссылка — от хоста запроса.
+    Они вставляются при сборке, поэтому одна карточка в кэше обслуживает всех.
+    Страница читается из кэша одним get_many, недостающие карточки собираются
+    одним запросом и сохраняются одним set_many.
+    """
+
+    def __init__(self, request, format=None):
+        self.serializer = ProductListFastSerializer(request, format=format)
+        self.cache = caches[settings.PRODUCT_CARD_CACHE]
+
+    def build(self, row):
+        data = self.serializer.to_representation(row)
+        keys = list(data)
+        split = keys.index('is_favorited')
+        head = {key: data[key] for key in keys[:split]}
+        # После is_favorited идёт product_url, он тоже подставляется при сборке
+        tail = {key: data[key] for key in keys[split + 2:]}
+        return (
+            _renderer.render(head)[:-1] + b',"is_favorited":',
+            b',' + _renderer.render(tail)[1:],
+        )
+
+    def assemble(self, pk, card, is_favorited):
+        head, tail = card
+        return JSONFragment(b''.join((
+            head,
+            b'true' if is_favorited else b'false',
+            b',"product_url":',
+            _renderer.render(self.serializer.product_url(pk)),
+            tail,
+        )))
+
+    def render(self, queryset, rows):
+        """
+        Карточки (JSONFragment) для строк rows в том же порядке.
+
+        rows — словари как минимум с полями CARD_KEY_FIELDS, queryset — тот же
+        список объявлений, из которого берутся полные строки для промахов.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+
+        version = get_reference_snapshot().version[:12]
+        keys = {row['id']: card_cache_key(row, version) for row in rows}
+
+        started = time.perf_counter()
+        cached = self.cache.get_many(list(keys.values()))
+        metrics.observe('product_card_cache_lookup_seconds', time.perf_counter() - started)
+        cards, missing = self.split_cached(keys, cached)
+
+        if missing:
+            started = time.perf_counter()
+            misses = queryset.filter(pk__in=missing).values(*ProductListFastSerializer.fields)
+            self.cache.set_many(self.build_missing(misses, cards, version))
+            self.record_misses(len(missing), time.perf_counter() - started)
+
+        return self.assemble_page(rows, cards, self.serializer.get_favorited_ids(rows))
+
+    async def arender(self, queryset, rows):
+        """render для async-view: кэш и база через async API Django."""
+        rows = list(rows)
+        if not rows:
+            return []
+
+        version = (await aget_reference_snapshot()).version[:12]
+        keys = {row['id']: card_cache_key(row, version) for row in rows}
+
+        started = time.perf_counter()
+        cached = await self.cache.aget_many(list(keys.values()))
+        metrics.observe('product_card_cache_lookup_seconds', time.perf_counter() - started)
+        cards, missing = self.split_cached(keys, cached)
+
+        if missing:
+            started = time.perf_counter()
+            misses = queryset.filter(pk__in=missing).values(*ProductListFastSerializer.fields)
+            await self.cache.aset_many(self.build_missing([row async for row in misses], cards, version))
+            self.record_misses(len(missing), time.perf_counter() - started)
+
+        return self.assemble_page(rows, cards, await self.serializer.aget_favorited_ids(rows))
+
+    def split_cached(self, keys, cached):
+        """Найденные в кэше карточки {id: card} и id промахов."""
+        cards = {pk: cached[key] for pk, key in keys.items() if key in cached}
+        missing = [pk for pk in keys if pk not in cards]
+        self.record_hits(len(cards))
+        return cards, missing
+
+    def build_missing(self, rows, cards, version):
+        """Собирает карточки для полных строк rows, дописывает их в cards и возвращает {key: card} для кэша."""
+        fresh = {}
+        for row in rows:
+            card = cards[row['id']] = self.build(row)
+            fresh[card_cache_key(row, version)] = card
+        return fresh
+
+    def assemble_page(self, rows, cards, favorited):
+        # Объявление могло пропасть между запросами — такие строки пропускаем
+        return [
+            self.assemble(row['id'], cards[row['id']], row['id'] in favorited)
+            for row in rows if row['id'] in cards
+        ]
+
+    def record_misses(self, missed, elapsed):
+        per_card = elapsed / missed
+        metrics.incr('product_card_cache_misses_total', missed)
+        for _ in range(missed):
+            metrics.observe('product_card_build_seconds', per_card)
+
+    def record_hits(self, hits):
+        if not hits:
+            return
+        metrics.incr('product_card_cache_hits_total', hits)
+        built, build_time = metrics.registry.get_histogram('product_card_build_seconds')
+        if built:
+            metrics.incr('product_card_saved_seconds_total', hits * build_time / built)
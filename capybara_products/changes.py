@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+CHANGES_TOKEN_SALT = 'capybara_products.changes'
+
+
+def issue_token(moment, last_id=None):
+    """
+    Выдаёт метку синхронизации — подписанное серверное время.
+
+    Для продолжения выдачи (has_more) в метку добавляется id последнего
+    отданного объявления, чтобы объявления с одинаковым update_at
+    не зацикливали синхронизацию.
+    """
+    payload = {'t': moment.isoformat()}
+    if last_id is not None:
+        payload['i'] = last_id
+    return signing.dumps(payload, salt=CHANGES_TOKEN_SALT)
+
+
+def read_token(token):
+    """Возвращает (moment, last_id) из метки синхронизации."""
+    try:
+        payload = signing.loads(token, salt=CHANGES_TOKEN_SALT)
+        moment = parse_datetime(payload['t'])
+    except (signing.BadSignature, KeyError, TypeError):
+        raise ValidationError({'since': ['Invalid token']})
+    if moment is None:
+        raise ValidationError({'since': ['Invalid token']})
+    return moment, payload.get('i')
+
+
+def changed_since(moment, last_id=None):
+    """
+    Условие на объявления, изменённые после метки.
+
+    Для обычной метки окно сдвигается назад на CHANGES_OVERLAP_SECONDS, чтобы
+    не потерять транзакции, закоммиченные позже выдачи метки; клиент
+    дедуплицирует объявления по id.
+    """
+    if last_id is not None:
+        return Q(update_at__gt=moment) | Q(update_at=moment, id__gt=last_id)
+    return Q(update_at__gt=moment - timedelta(seconds=settings.CHANGES_OVERLAP_SECONDS))
+
+
+def token_expired(moment) -> bool:
+    """Метка старше срока хранения tombstone-записей — нужна полная перезагрузка."""
+    return moment < timezone.now() - timedelta(days=settings.CHANGES_RETENTION_DAYS)
+
+
+def deleted_since(moment, until):
+    """Возвращает id объявлений, пропавших из выдачи в окне (moment, until]."""
+    from .models import ProductTombstone
+
+    start = moment - timedelta(seconds=settings.CHANGES_OVERLAP_SECONDS)
+    return set(
+        ProductTombstone.objects
+        .filter(created_at__gt=start, created_at__lte=until)
+        .values_list('product_id', flat=True)
+    )
@@ -0,0 +1,95 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Favorite, Product
+
+
+def _tables():
+    quote = connection.ops.quote_name
+    return quote(Favorite._meta.db_table), quote(Product._meta.db_table)
+
+
+def _current_count(cursor, product_id, user_id=None):
+    """Текущий счётчик избранного или None, если объявления нет (или оно не видно)."""
+    _, products = _tables()
+    sql = f"SELECT favorites_count FROM {products} WHERE id = %s"
+    params = [product_id]
+    if user_id is not None:
+        sql += " AND (status = 3 OR author_id = %s)"
+        params.append(user_id)
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def add_favorite(user_id, product_id):
+    """
+    Добавляет объявление в избранное.
+
+    Вставка идёт через INSERT ... SELECT ... ON CONFLICT DO NOTHING, поэтому
+    повторное нажатие и недоступное объявление не создают записей. Счётчик
+    увеличивается атомарно только при реальной вставке и возвращается через
+    RETURNING. Возвращает новый favorites_count или None, если объявления нет.
+    """
+    favorites, products = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {favorites} (user_id, product_id, create_at) "
+            f"SELECT %s, id, %s FROM {products} WHERE id = %s AND (status = 3 OR author_id = %s) "
+            f"ON CONFLICT (user_id, product_id) DO NOTHING RETURNING id",
+            [user_id, connection.ops.adapt_datetimefield_value(timezone.now()), product_id, user_id],
+        )
+        if cursor.fetchone() is None:
+            return _current_count(cursor, product_id, user_id)
+
+        cursor.execute(
+            f"UPDATE {products} SET favorites_count = favorites_count + 1 "
+            f"WHERE id = %s RETURNING favorites_count",
+            [product_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def remove_favorite(user_id, product_id):
+    """
+    Убирает объявление из избранного.
+
+    Счётчик уменьшается атомарно только если запись действительно удалена.
+    Возвращает новый favorites_count или None, если объявления нет.
+    """
+    favorites, products = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {favorites} WHERE user_id = %s AND product_id = %s RETURNING id",
+            [user_id, product_id],
+        )
+        if cursor.fetchone() is None:
+            return _current_count(cursor, product_id)
+
+        cursor.execute(
+            f"UPDATE {products} SET favorites_count = "
+            f"CASE WHEN favorites_count > 0 THEN favorites_count - 1 ELSE 0 END "
+            f"WHERE id = %s RETURNING favorites_count",
+            [product_id],
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def sync_favorites(user_id, actions):
+    """
+    Применяет пачку отложенных нажатий «в избранное» одной транзакцией.
+
+    actions — список пар (product_id, favorited) в порядке нажатий; для
+    каждого объявления учитывается только последнее состояние.
+    Возвращает словарь product_id -> favorites_count (None для несуществующих).
+    """
+    final = dict(actions)
+    results = {}
+    with transaction.atomic():
+        for product_id, favorited in final.items():
+            if favorited:
+                results[product_id] = add_favorite(user_id, product_id)
+            else:
+                results[product_id] = remove_favorite(user_id, product_id)
+    return results
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from capybara_countries.models import City
+
+
+FEED_CURSOR_SALT = 'capybara_products.feed'
+
+SCOPE_CITY = 'city'
+SCOPE_COUNTRY = 'country'
+SCOPE_ALL = 'all'
+
+
+def feed_cache_key(scope, location_id):
+    return f'feed:first_page:{scope}:{location_id or 0}'
+
+
+def invalidate_feed_cache(product):
+    """Сбрасывает закэшированные первые страницы ленты для города и страны объявления."""
+    cache.delete_many([
+        feed_cache_key(SCOPE_CITY, product.city_id),
+        feed_cache_key(SCOPE_COUNTRY, product.country_id),
+        feed_cache_key(SCOPE_ALL, None),
+    ])
+
+
+def _cache_page(queryset, scope, location_id):
+    rows, next_cursor = get_page(queryset, scope, location_id)
+    page = {'scope': scope, 'location': location_id, 'next': next_cursor, 'rows': rows}
+    cache.set(feed_cache_key(scope, location_id), page, settings.FEED_FIRST_PAGE_TIMEOUT)
+    return page
+
+
+def get_first_page(queryset, scope, location_id, country_id=None):
+    """
+    Первая страница ленты области (строки без карточек) из кэша.
+
+    Если в городе меньше FEED_MIN_RESULTS объявлений, лента расширяется
+    до страны. Расширенная страница хранится под ключом страны, а под ключом
+    города — только ссылка на неё: так изменение объявления в любом городе
+    страны сбрасывает и ленты городов, расширенные до неё. Сама ссылка
+    сбрасывается изменениями в городе, после которых расширение может
+    стать не нужно.
+    """
+    key = feed_cache_key(scope, location_id)
+    page = cache.get(key)
+    if page is not None and 'widened_to' in page:
+        country_id = page['widened_to']
+        return cache.get(feed_cache_key(SCOPE_COUNTRY, country_id)) or _cache_page(queryset, SCOPE_COUNTRY, country_id)
+    if page is not None:
+        return page
+
+    rows, next_cursor = get_page(queryset, scope, location_id)
+    if scope == SCOPE_CITY and country_id and len(rows) < settings.FEED_MIN_RESULTS:
+        cache.set(key, {'widened_to': country_id}, settings.FEED_FIRST_PAGE_TIMEOUT)
+        return _cache_page(queryset, SCOPE_COUNTRY, country_id)
+    page = {'scope': scope, 'location': location_id, 'next': next_cursor, 'rows': rows}
+    cache.set(key, page, settings.FEED_FIRST_PAGE_TIMEOUT)
+    return page
+
+
+def encode_cursor(scope, location_id, row):
+    return signing.dumps(
+        {'s': scope, 'l': location_id, 'c': row['create_at'].isoformat(), 'i': row['id']},
+        salt=FEED_CURSOR_SALT,
+    )
+
+
+def decode_cursor(cursor):
+    try:
+        return signing.loads(cursor, salt=FEED_CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValidationError({'cursor': ['Invalid cursor']})
+
+
+def scope_queryset(queryset, scope, location_id):
+    """
+    Ограничивает опубликованные объявления городом или страной.
+
+    Фильтр (city|country, status) + сортировка по -create_at идут по индексам
+    product_city_feed_idx / product_country_feed_idx.
+    """
+    queryset = queryset.filter(status=3)
+    if scope == SCOPE_CITY:
+        queryset = queryset.filter(city_id=location_id)
+    elif scope == SCOPE_COUNTRY:
+        queryset = queryset.filter(country_id=location_id)
+    return queryset.order_by('-create_at', '-id')
+
+
+def get_page(queryset, scope, location_id, after=None):
+    """
+    Возвращает строки страницы и курсор следующей страницы (keyset-пагинация).
+
+    queryset — values() с полями id и create_at.
+    """
+    queryset = scope_queryset(queryset, scope, location_id)
+    if after is not None:
+        queryset = queryset.filter(
+            Q(create_at__lt=after['c']) | Q(create_at=after['c'], id__lt=after['i'])
+        )
+
+    size = settings.FEED_PAGE_SIZE
+    rows = list(queryset[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(scope, location_id, rows[-1])
+    return rows, next_cursor
+
+
+def resolve_location(request):
+    """
+    Определяет область ленты по параметрам запроса или профилю пользователя.
+
+    Возвращает (scope, location_id, country_id); country_id нужен,
+    чтобы расширить ленту города до страны.
+    """
+    params = request.query_params
+    user = request.user
+
+    try:
+        if params.get('city'):
+            city_id = int(params['city'])
+            country_id = City.objects.values_list('country_id', flat=True).filter(pk=city_id).first()
+            if country_id is None:
+                raise ValidationError({'city': ['Unknown city']})
+            return SCOPE_CITY, city_id, country_id
+        if params.get('country'):
+            return SCOPE_COUNTRY, int(params['country']), None
+    except ValueError:
+        raise ValidationError({'detail': ['city and country must be integers']})
+
+    if user.is_authenticated:
+        return SCOPE_CITY, user.city_id, user.country_id
+    return SCOPE_ALL, None, None
+
@@ -1,9 +1,24 @@
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+
+from capybara_currencies.models import Currency
 from .models import Product
+from .pricing import get_rate, to_base
+
 
 class ProductFilterSet(filters.FilterSet):
-    min_price = filters.NumberFilter(field_name="price", lookup_expr='gte')
-    max_price = filters.NumberFilter(field_name="price", lookup_expr='lte')
+    """
+    Фильтры объявлений.
+
+    min_price и max_price задаются в валюте price_currency (код валюты)
+    и сравниваются с ценой, приведённой к базовой валюте (price_base).
+    Если price_currency не указан, используется валюта из фильтра currency,
+    а без него — базовая валюта.
+    """
+    min_price = filters.NumberFilter(method='filter_min_price')
+    max_price = filters.NumberFilter(method='filter_max_price')
+    price_currency = filters.CharFilter(method='filter_price_currency')
     
     class Meta:
         model = Product
@@ -14,3 +29,44 @@ class ProductFilterSet(filters.FilterSet):
             'category': ['exact'],
             'status': ['exact'],
         }
+
+    def get_price_rate(self):
+        code = self.data.get('price_currency')
+        if not code and self.form.cleaned_data.get('currency'):
+            return self.form.cleaned_data['currency'].rate
+        try:
+            return get_rate(code)
+        except Currency.DoesNotExist:
+            raise ValidationError({'price_currency': [f'Unknown currency code: {code}']})
+
+    def filter_min_price(self, queryset, name, value):
+        return queryset.filter(price_base__gte=to_base(value, self.get_price_rate()))
+
+    def filter_max_price(self, queryset, name, value):
+        return queryset.filter(price_base__lte=to_base(value, self.get_price_rate()))
+
+    def filter_price_currency(self, queryset, name, value):
+        # Используется в filter_min_price / filter_max_price
+        return queryset
+
+
+class ProductOrderingFilter(OrderingFilter):
+    """
+    Сортировка объявлений.
+
+    Сортировка по price выполняется по price_base, чтобы объявления
+    в разных валютах сравнивались корректно и по индексу.
+    """
+    field_map = {'price': 'price_base'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        result = []
+        for term in ordering:
+            prefix = '-' if term.startswith('-') else ''
+            name = term.lstrip('-')
+            result.append(prefix + self.field_map.get(name, name))
+        return result
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from capybara_products.archive import archivable, archive_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит устаревшие объявления в архив (ArchivedProduct) пачками с паузами, "
+        "как периодическая задача move_products_to_archive. Удобно для первого "
+        "переноса большой таблицы: --max-seconds ограничивает длительность запуска."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.PRODUCT_ARCHIVE_BATCH_SIZE,
+            help=f"Объявлений в пачке (по умолчанию {settings.PRODUCT_ARCHIVE_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=settings.PRODUCT_ARCHIVE_PAUSE,
+            help=f"Минимальная пауза между пачками, сек (по умолчанию {settings.PRODUCT_ARCHIVE_PAUSE})",
+        )
+        parser.add_argument(
+            '--max-seconds', type=float, default=settings.PRODUCT_ARCHIVE_MAX_SECONDS,
+            help=f"Предельная длительность запуска, сек (по умолчанию {settings.PRODUCT_ARCHIVE_MAX_SECONDS})",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать объявления для архива")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['pause'] < 0 or options['max_seconds'] <= 0:
+            raise CommandError("--batch-size and --max-seconds must be positive, --pause must not be negative")
+
+        if options['dry_run']:
+            self.stdout.write(f"Products to archive: {archivable().count()}")
+            return
+
+        started = time.perf_counter()
+        count = archive_products(options['batch_size'], options['pause'], options['max_seconds'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {count} products to the archive in {time.perf_counter() - started:.1f}s"
+        ))
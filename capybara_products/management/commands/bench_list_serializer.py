@@ -0,0 +1,79 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.testing import allowed_host
+from capybara_products.models import Favorite, Product
+from capybara_products.serializers import ProductListFastSerializer, ProductListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стоимость сериализации одной строки списка объявлений "
+        "для ProductListSerializer и ProductListFastSerializer и проверяет, "
+        "что их ответы побайтно совпадают. Запросы к базе в замер не входят."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help="Размер страницы (по умолчанию 50)")
+        parser.add_argument('--repeat', type=int, default=200, help="Количество повторов (по умолчанию 200)")
+        parser.add_argument('--user', type=int, help="id пользователя для is_favorited")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError("--rows and --repeat must be positive")
+
+        user = AnonymousUser()
+        if options['user'] is not None:
+            try:
+                user = get_user_model().objects.get(pk=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} not found")
+
+        request = Request(RequestFactory().get('/products/v1/', HTTP_HOST=allowed_host()))
+        request.user = user
+
+        queryset = Product.objects.order_by('pk')[:rows]
+        instances = queryset.select_related('author', 'category', 'currency', 'country', 'city')
+        if user.is_authenticated:
+            instances = instances.prefetch_related(
+                Prefetch('favorited_by', queryset=Favorite.objects.filter(user=user), to_attr='my_favorites')
+            )
+        instances = list(instances)
+        values = list(queryset.values(*ProductListFastSerializer.fields))
+        if not values:
+            raise CommandError("No products to serialize")
+
+        fast = ProductListFastSerializer(request)
+        favorited_ids = fast.get_favorited_ids(values)
+
+        def drf():
+            return ProductListSerializer(instances, many=True, context={'request': request}).data
+
+        def lean():
+            return ProductListFastSerializer(request).serialize(values, favorited_ids)
+
+        renderer = JSONRenderer()
+        if renderer.render(drf()) != renderer.render(lean()):
+            raise CommandError("ProductListFastSerializer output differs from ProductListSerializer")
+
+        results = {}
+        for name, func in (('ProductListSerializer', drf), ('ProductListFastSerializer', lean)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            per_row = (time.perf_counter() - started) / (repeat * len(values)) * 1e6
+            results[name] = per_row
+            self.stdout.write(f"{name:<28} {per_row:8.2f} us/row")
+
+        speedup = results['ProductListSerializer'] / results['ProductListFastSerializer']
+        self.stdout.write(self.style.SUCCESS(
+            f"Identical output for {len(values)} rows, speedup x{speedup:.1f}"
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from capybara_products.models import ProductView
+from capybara_products.viewstats import compact_views, last_compacted_day, purge_raw_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Сворачивает закрытые дни просмотров в ProductViewDaily, обновляет views_count "
+        "и удаляет сырые просмотры старше PRODUCT_VIEWS_RAW_RETENTION_DAYS, как "
+        "периодическая задача compact_product_views. Запускается при каждом деплое "
+        "и раз в сутки после полуночи (cron: 15 0 * * *); после миграции 0008 первый "
+        "запуск досчитывает views_count за все прошедшие дни."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать несвёрнутые дни")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            days = ProductView.objects.filter(day__lt=timezone.localdate())
+            last = last_compacted_day()
+            if last is not None:
+                days = days.filter(day__gt=last)
+            self.stdout.write(f"Days to compact: {days.values('day').distinct().count()}")
+            return
+
+        started = time.perf_counter()
+        days = compact_views()
+        purged = purge_raw_views()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {days} days of product views, purged {purged} raw views "
+            f"(retention {settings.PRODUCT_VIEWS_RAW_RETENTION_DAYS} days) in {time.perf_counter() - started:.1f}s"
+        ))
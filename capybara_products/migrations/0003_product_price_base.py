@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-19 03:54
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+
+def fill_price_base(apps, schema_editor):
+    Currency = apps.get_model('capybara_currencies', 'Currency')
+    Product = apps.get_model('capybara_products', 'Product')
+    for currency_id, rate in Currency.objects.values_list('pk', 'rate'):
+        Product.objects.filter(currency_id=currency_id).update(
+            price_base=ExpressionWrapper(
+                F('price') * (Decimal(1) / rate),
+                output_field=DecimalField(max_digits=20, decimal_places=2),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_categories', '0001_initial'),
+        ('capybara_countries', '0001_initial'),
+        ('capybara_currencies', '0002_currency_rate'),
+        ('capybara_products', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_base',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=20, null=True, verbose_name='Price in base currency'),
+        ),
+        migrations.RunPython(fill_price_base, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'price_base'], name='product_status_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'status', 'price_base'], name='product_cat_price_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_categories', '0001_initial'),
+        ('capybara_countries', '0001_initial'),
+        ('capybara_currencies', '0002_currency_rate'),
+        ('capybara_products', '0003_product_price_base'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['city', 'status', '-create_at'], name='product_city_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['country', 'status', '-create_at'], name='product_country_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 03:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_categories', '0001_initial'),
+        ('capybara_countries', '0001_initial'),
+        ('capybara_currencies', '0002_currency_rate'),
+        ('capybara_products', '0004_product_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField(db_index=True, verbose_name='Product ID')),
+                ('reason', models.CharField(choices=[('deleted', 'Удалено'), ('archived', 'В архиве'), ('unpublished', 'Снято с публикации')], max_length=16, verbose_name='Reason')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created at')),
+            ],
+            options={
+                'verbose_name': 'Product tombstone',
+                'verbose_name_plural': 'Product tombstones',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'update_at'], name='product_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 03:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_favorites_count(apps, schema_editor):
+    Favorite = apps.get_model('capybara_products', 'Favorite')
+    Product = apps.get_model('capybara_products', 'Product')
+    counts = (
+        Favorite.objects.filter(product=OuterRef('pk'))
+        .order_by().values('product')
+        .annotate(total=Count('pk')).values('total')
+    )
+    Product.objects.update(
+        favorites_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_products', '0005_product_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Favorites count'),
+        ),
+        migrations.RunPython(fill_favorites_count, migrations.RunPython.noop),
+    ]
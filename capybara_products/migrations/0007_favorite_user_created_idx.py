@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 03:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_products', '0006_product_favorites_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favorite',
+            name='create_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Date create'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-create_at', '-id'], name='favorite_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-19 04:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_view_day(apps, schema_editor):
+    # Существующие просмотры относятся к дню создания, а не к дню миграции;
+    # views_count заполнит первый запуск свёртки (compact_product_views)
+    ProductView = apps.get_model('capybara_products', 'ProductView')
+    ProductView.objects.update(day=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_products', '0007_favorite_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductViewBloom',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_bloom', serialize=False, to='capybara_products.product', verbose_name='Product')),
+                ('bits', models.BinaryField(verbose_name='Bits')),
+            ],
+            options={
+                'verbose_name': 'Product viewers bloom filter',
+                'verbose_name_plural': 'Product viewers bloom filters',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('viewers', models.PositiveIntegerField(verbose_name='Viewers')),
+            ],
+            options={
+                'verbose_name': 'Product daily views',
+                'verbose_name_plural': 'Product daily views',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='productview',
+            name='unique_product_user_view',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Views count'),
+        ),
+        migrations.AddField(
+            model_name='productview',
+            name='day',
+            field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Day'),
+        ),
+        migrations.RunPython(fill_view_day, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='productview',
+            index=models.Index(fields=['day'], name='product_view_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productview',
+            constraint=models.UniqueConstraint(fields=('product', 'user', 'day'), name='unique_product_user_day_view'),
+        ),
+        migrations.AddField(
+            model_name='productviewdaily',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='capybara_products.product', verbose_name='Product'),
+        ),
+        migrations.AddIndex(
+            model_name='productviewdaily',
+            index=models.Index(fields=['day'], name='product_view_daily_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productviewdaily',
+            constraint=models.UniqueConstraint(fields=('product', 'day'), name='unique_product_view_day'),
+        ),
+    ]
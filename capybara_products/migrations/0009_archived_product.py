@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-19 04:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_categories', '0001_initial'),
+        ('capybara_countries', '0001_initial'),
+        ('capybara_currencies', '0002_currency_rate'),
+        ('capybara_products', '0008_product_view_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedProduct',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='Title')),
+                ('description', models.TextField(max_length=550, verbose_name='Description')),
+                ('price', models.IntegerField(verbose_name='Price')),
+                ('price_base', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True, verbose_name='Price in base currency')),
+                ('status', models.IntegerField(choices=[(0, 'Не проверено'), (1, 'Одобрено'), (2, 'Отклонено'), (3, 'Опубликовано'), (4, 'Архив')], verbose_name='Status')),
+                ('is_premium', models.BooleanField(default=False, verbose_name='Is premium')),
+                ('favorites_count', models.PositiveIntegerField(default=0, verbose_name='Favorites count')),
+                ('views_count', models.PositiveIntegerField(default=0, verbose_name='Views count')),
+                ('create_at', models.DateTimeField(verbose_name='Date create')),
+                ('update_at', models.DateTimeField(verbose_name='Date update')),
+                ('images', models.JSONField(default=list, verbose_name='Images')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived at')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='capybara_categories.category', verbose_name='Category')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='capybara_countries.city', verbose_name='City')),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='capybara_countries.country', verbose_name='Country')),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='capybara_currencies.currency', verbose_name='Currency')),
+                ('subcategory', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='capybara_categories.subcategory', verbose_name='Subcategory')),
+            ],
+            options={
+                'verbose_name': 'Archived product',
+                'verbose_name_plural': 'Archived products',
+            },
+        ),
+    ]
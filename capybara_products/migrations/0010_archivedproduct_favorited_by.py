@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_products', '0009_archived_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedproduct',
+            name='favorited_by',
+            field=models.JSONField(default=list, verbose_name='Favorited by'),
+        ),
+    ]
@@ -1,12 +1,14 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from capybara_categories.models import Category, SubCategory
 from capybara_countries.models import Country, City
 
 
 from .choices import STATUS_CHOICES
+from .pricing import to_base
 from .utils_img import process_image
 
 
@@ -19,9 +21,12 @@ class Product(models.Model):
     country = models.ForeignKey(Country, on_delete=models.PROTECT, db_index=True, related_name='products_by_country', verbose_name="Country")
     city = models.ForeignKey(City, on_delete=models.PROTECT, db_index=True, related_name='products_by_city', verbose_name="City")
     price = models.IntegerField(verbose_name="Price")
+    price_base = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Price in base currency")
     currency = models.ForeignKey("capybara_currencies.Currency", on_delete=models.PROTECT, verbose_name="Currency")
     status = models.IntegerField(choices=STATUS_CHOICES, default=0, verbose_name="Status")
     is_premium = models.BooleanField(default=False, verbose_name="Is premium")
+    favorites_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Favorites count")
+    views_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Views count")
     create_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date create")
     update_at = models.DateTimeField(auto_now=True, verbose_name="Date update")
 
@@ -29,9 +34,47 @@ class Product(models.Model):
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ["-create_at"]
+        indexes = [
+            models.Index(fields=['status', 'price_base'], name='product_status_price_idx'),
+            models.Index(fields=['category', 'status', 'price_base'], name='product_cat_price_idx'),
+            models.Index(fields=['city', 'status', '-create_at'], name='product_city_feed_idx'),
+            models.Index(fields=['country', 'status', '-create_at'], name='product_country_feed_idx'),
+            models.Index(fields=['status', 'update_at'], name='product_status_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус из базы нужен, чтобы заметить снятие объявления с публикации
+        instance._loaded_status = instance.__dict__.get('status')
+        # Цена и валюта из базы: price_base пересчитывается только при их изменении
+        instance._loaded_price = instance._price_key()
+        # Статус и категории из базы: от них зависят счётчики дерева категорий
+        instance._loaded_tree = instance._tree_key()
+        return instance
+
+    def _price_key(self):
+        return self.__dict__.get('price'), self.__dict__.get('currency_id')
+
+    def _tree_key(self):
+        return self.__dict__.get('status'), self.__dict__.get('category_id'), self.__dict__.get('subcategory_id')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            price_changed = self.price_base is None or getattr(self, '_loaded_price', None) != self._price_key()
+        else:
+            price_changed = bool({'price', 'currency', 'currency_id'} & set(update_fields))
+        # Курс валюты — отдельный запрос, поэтому только когда цена могла измениться
+        if price_changed:
+            self.price_base = to_base(self.price, self.currency.rate)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'price_base'}
+        super().save(*args, **kwargs)
+        self._loaded_price = self._price_key()
     
     def get_absolute_url(self) -> str:
         return reverse("product:product_detail", kwargs={"pk": self.pk})
@@ -40,8 +83,45 @@ class Product(models.Model):
         return reverse("user-detail", kwargs={"pk": self.author.pk})
     
     def get_view_count(self) -> int:
-        return self.views.count()
+        return self.views_count
+
+
 
+class ArchivedProduct(models.Model):
+    """
+    Объявление, перенесённое из Product в архив (capybara_products.archive).
+
+    Хранит те же поля под тем же id, изображения — списком путей
+    в архивном каталоге хранилища, избранное — списком id пользователей
+    (восстанавливается вместе с объявлением). Обратных связей у архива нет.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="+", verbose_name="Author")
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="+", verbose_name="Category")
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.PROTECT, blank=True, null=True, related_name="+", verbose_name="Subcategory")
+    title = models.CharField(max_length=50, verbose_name="Title")
+    description = models.TextField(max_length=550, verbose_name="Description")
+    country = models.ForeignKey(Country, on_delete=models.PROTECT, related_name="+", verbose_name="Country")
+    city = models.ForeignKey(City, on_delete=models.PROTECT, related_name="+", verbose_name="City")
+    price = models.IntegerField(verbose_name="Price")
+    price_base = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, verbose_name="Price in base currency")
+    currency = models.ForeignKey("capybara_currencies.Currency", on_delete=models.PROTECT, related_name="+", verbose_name="Currency")
+    status = models.IntegerField(choices=STATUS_CHOICES, verbose_name="Status")
+    is_premium = models.BooleanField(default=False, verbose_name="Is premium")
+    favorites_count = models.PositiveIntegerField(default=0, verbose_name="Favorites count")
+    views_count = models.PositiveIntegerField(default=0, verbose_name="Views count")
+    create_at = models.DateTimeField(verbose_name="Date create")
+    update_at = models.DateTimeField(verbose_name="Date update")
+    images = models.JSONField(default=list, verbose_name="Images")
+    favorited_by = models.JSONField(default=list, verbose_name="Favorited by")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archived at")
+
+    class Meta:
+        verbose_name = "Archived product"
+        verbose_name_plural = "Archived products"
+
+    def __str__(self) -> str:
+        return self.title
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
@@ -61,7 +141,7 @@ class ProductImage(models.Model):
 class Favorite(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='favorites', verbose_name="User")
     product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name='favorited_by', verbose_name="Product")
-    create_at = models.DateTimeField(auto_now=True, verbose_name="Date create")
+    create_at = models.DateTimeField(auto_now_add=True, verbose_name="Date create")
 
     class Meta:
         verbose_name = "Favorite"
@@ -69,15 +149,58 @@ class Favorite(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['user', 'product'], name='unique_user_favorite')
         ]
+        indexes = [
+            models.Index(fields=['user', '-create_at', '-id'], name='favorite_user_created_idx'),
+        ]
         ordering = ["-create_at"]
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.product.title}"
 
 
+class ProductTombstone(models.Model):
+    """
+    Запись об объявлении, которое пропало из публичной выдачи.
+
+    Нужна для синхронизации изменений (/products/v1/changes/): клиент
+    по ней удаляет объявление из локального кэша.
+    """
+    REASON_DELETED = 'deleted'
+    REASON_ARCHIVED = 'archived'
+    REASON_UNPUBLISHED = 'unpublished'
+    REASON_CHOICES = [
+        (REASON_DELETED, 'Удалено'),
+        (REASON_ARCHIVED, 'В архиве'),
+        (REASON_UNPUBLISHED, 'Снято с публикации'),
+    ]
+
+    product_id = models.BigIntegerField(db_index=True, verbose_name="Product ID")
+    reason = models.CharField(max_length=16, choices=REASON_CHOICES, verbose_name="Reason")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Created at")
+
+    class Meta:
+        verbose_name = "Product tombstone"
+        verbose_name_plural = "Product tombstones"
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} ({self.reason})"
+
+    @classmethod
+    def reason_for_status(cls, status) -> str:
+        return cls.REASON_ARCHIVED if status == 4 else cls.REASON_UNPUBLISHED
+
+
 class ProductView(models.Model):
+    """
+    Сырой просмотр объявления: не больше одного на пользователя в день.
+
+    Закрытые дни сворачиваются в ProductViewDaily (capybara_products.viewstats),
+    сырые строки хранятся PRODUCT_VIEWS_RAW_RETENTION_DAYS дней.
+    """
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='views', verbose_name='Product')
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, verbose_name='User')
+    day = models.DateField(default=timezone.localdate, verbose_name='Day')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created at')
 
     class Meta:
@@ -85,11 +208,54 @@ class ProductView(models.Model):
         verbose_name_plural = 'Product Views'
         constraints = [
             models.UniqueConstraint(
-                fields=['product', 'user'],
-                name='unique_product_user_view'
+                fields=['product', 'user', 'day'],
+                name='unique_product_user_day_view'
             ),
         ]
+        indexes = [
+            models.Index(fields=['day'], name='product_view_day_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.product.title} - {self.user.username}"
+
+
+class ProductViewDaily(models.Model):
+    """Просмотры объявления за день: число разных пользователей."""
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='daily_views', verbose_name='Product')
+    day = models.DateField(verbose_name='Day')
+    viewers = models.PositiveIntegerField(verbose_name='Viewers')
+
+    class Meta:
+        verbose_name = 'Product daily views'
+        verbose_name_plural = 'Product daily views'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='unique_product_view_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='product_view_daily_day_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} {self.day}: {self.viewers}"
+
+
+class ProductViewBloom(models.Model):
+    """
+    Bloom-фильтр пользователей, когда-либо смотревших объявление.
+
+    По нему свёртка отличает новых зрителей от вернувшихся, не храня
+    сырые просмотры вечно; ложные совпадения немного занижают views_count.
+    """
+    product = models.OneToOneField(
+        'Product', on_delete=models.CASCADE, primary_key=True, related_name='view_bloom', verbose_name='Product'
+    )
+    bits = models.BinaryField(verbose_name='Bits')
+
+    class Meta:
+        verbose_name = 'Product viewers bloom filter'
+        verbose_name_plural = 'Product viewers bloom filters'
+
+    def __str__(self) -> str:
+        return str(self.product_id)
     
\ No newline at end of file
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FavoriteCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация избранного по времени добавления.
+
+    Идёт по индексу (user, -create_at), поэтому стоимость страницы
+    не зависит от общего числа избранных объявлений пользователя.
+    """
+    ordering = ('-create_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
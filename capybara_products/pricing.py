@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from capybara_currencies.models import Currency
+
+
+PRICE_BASE_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def to_base(amount, rate) -> Decimal:
+    """
+    Переводит сумму в базовую валюту.
+
+    rate — сколько единиц валюты стоит одна единица базовой валюты.
+    """
+    return (Decimal(amount) / Decimal(rate)).quantize(Decimal('0.01'))
+
+
+def get_rate(code=None) -> Decimal:
+    """
+    Возвращает курс валюты по её коду.
+
+    Без кода возвращает курс базовой валюты (BASE_CURRENCY_CODE), то есть 1.
+    Возбуждает Currency.DoesNotExist для неизвестного кода.
+    """
+    code = (code or settings.BASE_CURRENCY_CODE).upper()
+    if code == settings.BASE_CURRENCY_CODE:
+        return Decimal(1)
+    return Currency.objects.values_list('rate', flat=True).get(code__iexact=code)
+
+
+def recompute_price_base(currency_ids=None) -> int:
+    """
+    Пересчитывает Product.price_base одним UPDATE на каждую валюту.
+
+    Вызывается после изменения курсов; без аргументов пересчитывает все валюты.
+    Возвращает количество обновлённых объявлений.
+    """
+    from .models import Product
+
+    currencies = Currency.objects.all()
+    if currency_ids is not None:
+        currencies = currencies.filter(pk__in=currency_ids)
+
+    updated = 0
+    for currency_id, rate in currencies.values_list('pk', 'rate'):
+        # Умножение на обратный курс: деление целого на целое в SQLite отбрасывает дробь
+        updated += Product.objects.filter(currency_id=currency_id).update(
+            price_base=ExpressionWrapper(F('price') * (Decimal(1) / rate), output_field=PRICE_BASE_FIELD)
+        )
+    return updated
@@ -1,6 +1,8 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from django.urls import reverse
-from .models import Product, ProductImage, Favorite
+from .models import ArchivedProduct, Product, ProductImage, Favorite
 from django.utils import timezone
 
 
@@ -31,7 +33,7 @@ class ProductListSerializer(serializers.ModelSerializer):
     - category: название категории продукта
     - currency: код валюты (например, USD, EUR)
     - main_image: основное изображение продукта
-    - views_count: количество просмотров продукта
+    - views_count: количество пользователей, смотревших продукт (по свёрнутым дням)
     - favorites_count: количество добавлений продукта в избранное
     - is_favorited: добавлен ли продукт в избранное текущим пользователем
     - product_url: ссылка на детальное представление продукта
@@ -52,7 +54,7 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ['price_base']
 
     def get_is_favorited(self, obj):
         """
@@ -74,6 +76,88 @@ class ProductListSerializer(serializers.ModelSerializer):
         return obj.favorited_by.filter(user=user).exists()
 
 
+class ProductListFastSerializer:
+    """
+    Быстрый сериализатор списка продуктов только для чтения.
+
+    Работает со строками queryset.values(*ProductListFastSerializer.fields) без
+    механики полей DRF: ссылка на продукт собирается по заранее вычисленному
+    шаблону, даты форматируются так же, как в DateTimeField. Результат
+    побайтно совпадает с ProductListSerializer.
+    """
+    fields = (
+        'id', 'category__name', 'currency__code', 'city__name', 'country__name',
+        'author__username', 'views_count', 'favorites_count', 'title', 'description',
+        'price', 'status', 'is_premium', 'create_at', 'update_at', 'subcategory_id',
+    )
+    PK_PLACEHOLDER = '__pk__'
+
+    def __init__(self, request, format=None):
+        self.request = request
+        kwargs = {'pk': self.PK_PLACEHOLDER}
+        if format:
+            kwargs['format'] = format
+        url = request.build_absolute_uri(reverse('product-detail', kwargs=kwargs))
+        self.url_head, self.url_tail = url.split(self.PK_PLACEHOLDER)
+        self.timezone = timezone.get_current_timezone()
+
+    def format_datetime(self, value):
+        value = value.astimezone(self.timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    def product_url(self, pk):
+        return f"{self.url_head}{pk}{self.url_tail}"
+
+    def get_favorited_ids(self, rows):
+        """id избранных продуктов текущего пользователя среди rows одним запросом."""
+        user = self.request.user
+        if not user.is_authenticated or not rows:
+            return set()
+        return set(
+            Favorite.objects.filter(user=user, product_id__in=[row['id'] for row in rows])
+            .values_list('product_id', flat=True)
+        )
+
+    async def aget_favorited_ids(self, rows):
+        """get_favorited_ids через async ORM."""
+        user = self.request.user
+        if not user.is_authenticated or not rows:
+            return set()
+        favorites = Favorite.objects.filter(user=user, product_id__in=[row['id'] for row in rows])
+        return {pk async for pk in favorites.values_list('product_id', flat=True)}
+
+    def to_representation(self, row, is_favorited=False):
+        pk = row['id']
+        return {
+            'id': pk,
+            'category': row['category__name'],
+            'currency': row['currency__code'],
+            'city': row['city__name'],
+            'country': row['country__name'],
+            'author': row['author__username'],
+            'views_count': row['views_count'],
+            'favorites_count': row['favorites_count'],
+            'is_favorited': is_favorited,
+            'product_url': self.product_url(pk),
+            'title': row['title'],
+            'description': row['description'],
+            'price': row['price'],
+            'status': row['status'],
+            'is_premium': row['is_premium'],
+            'create_at': self.format_datetime(row['create_at']),
+            'update_at': self.format_datetime(row['update_at']),
+            'subcategory': row['subcategory_id'],
+        }
+
+    def serialize(self, rows, favorited_ids=None):
+        rows = list(rows)
+        if favorited_ids is None:
+            favorited_ids = self.get_favorited_ids(rows)
+        return [self.to_representation(row, row['id'] in favorited_ids) for row in rows]
+
+
 class ProductDetailSerializer(ProductListSerializer):
     """
     Сериализатор для детального представления продукта.
@@ -93,7 +177,33 @@ class ProductDetailSerializer(ProductListSerializer):
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ['price_base']
+
+
+class ArchivedProductSerializer(ProductDetailSerializer):
+    """
+    Сериализатор для деталей объявления из архива.
+
+    Формат тот же, что у ProductDetailSerializer, дополнительно:
+    - images: ссылки на изображения в архивном хранилище
+    - archived_at: дата переноса в архив
+
+    is_favorited берётся из сохранённого в архиве избранного.
+    """
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedProduct
+        exclude = ['price_base', 'favorited_by']
+
+    def get_is_favorited(self, obj):
+        request = self.context.get('request')
+        return bool(request and request.user.is_authenticated and request.user.pk in obj.favorited_by)
+
+    def get_images(self, obj):
+        request = self.context.get('request')
+        urls = [default_storage.url(name) for name in obj.images]
+        return [request.build_absolute_uri(url) for url in urls] if request else urls
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -160,4 +270,25 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
 
         return product
 
- 
\ No newline at end of file
+
+class FavoriteSyncActionSerializer(serializers.Serializer):
+    """
+    Одно отложенное нажатие «в избранное»:
+    - product: id объявления
+    - favorited: итоговое состояние после нажатия
+    """
+    product = serializers.IntegerField()
+    favorited = serializers.BooleanField()
+
+
+class FavoriteSyncSerializer(serializers.Serializer):
+    """
+    Пачка отложенных нажатий «в избранное» в порядке их совершения.
+    """
+    actions = FavoriteSyncActionSerializer(many=True, allow_empty=False)
+
+    def validate_actions(self, value):
+        limit = settings.FAVORITES_SYNC_MAX_ACTIONS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} actions per request")
+        return value
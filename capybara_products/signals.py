@@ -1,6 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Product
+from capybara_currencies.models import Currency
+from capybara_tg_bot.notifications import notify_moderation
+from .feed import invalidate_feed_cache
+from .models import Product, ProductTombstone, Favorite
+from .pricing import recompute_price_base
 from .utils import moderate_goods
 
 
@@ -15,4 +22,48 @@ def product_post_save(sender, instance, created, **kwargs):
             instance.status = 2
             
         type(instance).objects.filter(pk=instance.pk).update(status=instance.status)
+        notify_moderation(instance)
 
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_feed_changed(sender, instance, **kwargs):
+    # Подключён после product_post_save, поэтому видит статус после модерации
+    invalidate_feed_cache(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_tombstone_on_unpublish(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_loaded_status', None) == 3 and instance.status != 3:
+        ProductTombstone.objects.create(
+            product_id=instance.pk,
+            reason=ProductTombstone.reason_for_status(instance.status),
+        )
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Product)
+def product_tombstone_on_delete(sender, instance, **kwargs):
+    ProductTombstone.objects.create(product_id=instance.pk, reason=ProductTombstone.REASON_DELETED)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_post_save(sender, instance, created, **kwargs):
+    # Переключение из API идёт в обход ORM (capybara_products.favorites),
+    # здесь учитываются изменения из админки и прочего кода
+    if created:
+        Product.objects.filter(pk=instance.product_id).update(favorites_count=F('favorites_count') + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_post_delete(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).update(
+        favorites_count=Greatest(F('favorites_count') - 1, 0)
+    )
+
+
+@receiver(post_save, sender=Currency)
+def currency_post_save(sender, instance, created, **kwargs):
+    if not created and instance.rate_changed():
+        transaction.on_commit(lambda: recompute_price_base([instance.pk]))
+    instance._loaded_rate = instance.rate
@@ -1,15 +1,46 @@
 from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from .models import Product
+from .archive import archive_products
+from .models import Product, ProductTombstone
+from .viewstats import compact_views, purge_raw_views
 
 def archive_old_products():
     one_day_ago = timezone.now() - timedelta(days=28)
     
     old_products = Product.objects.filter(
         status=3, 
-        updated_at__lt=one_day_ago 
+        update_at__lt=one_day_ago 
     )
-    
-    count = old_products.update(status=4)
+
+    with transaction.atomic():
+        ids = list(old_products.values_list('pk', flat=True))
+        # update() не шлёт post_save, поэтому записи для синхронизации создаём сами
+        count = Product.objects.filter(pk__in=ids).update(status=4, update_at=timezone.now())
+        ProductTombstone.objects.bulk_create([
+            ProductTombstone(product_id=pk, reason=ProductTombstone.REASON_ARCHIVED) for pk in ids
+        ])
+
+    if count:
+        from capybara_categories.tree import schedule_category_tree_refresh
+        schedule_category_tree_refresh()
     
     return f"Archived {count} ads"
+
+
+def purge_product_tombstones():
+    cutoff = timezone.now() - timedelta(days=settings.CHANGES_RETENTION_DAYS)
+    count, _ = ProductTombstone.objects.filter(created_at__lt=cutoff).delete()
+    return f"Purged {count} tombstones"
+
+
+def compact_product_views():
+    days = compact_views()
+    purged = purge_raw_views()
+    return f"Compacted {days} days of product views, purged {purged} raw views"
+
+
+def move_products_to_archive():
+    count = archive_products()
+    return f"Moved {count} products to the archive"
@@ -1,3 +1,568 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models import Prefetch
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+
+from api.queries import query_budget
+from api.testing import HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin
+from capybara_tg_bot.models import Notification
+from capybara_tg_user.models import TelegramUser
+
+from .archive import archive_batch
+from .cards import ProductCards
+from .changes import issue_token
+from .feed import SCOPE_ALL, SCOPE_CITY, SCOPE_COUNTRY, feed_cache_key
+from .models import ArchivedProduct, Favorite, Product, ProductImage, ProductView, ProductViewDaily
+from .serializers import ProductListFastSerializer, ProductListSerializer
+
+
+class ProductQueryBudgetTests(HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    """
+    Бюджеты запросов QUERY_BUDGETS для объявлений и избранного.
+
+    Первый запрос идёт с холодными кэшами, и его бюджет проверяет
+    QueryInstrumentationMiddleware; повторный — с тёплыми.
+    """
+
+    def assertWithinBudget(self, view_name, path, warm_budget, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        with self.assertMaxQueries(warm_budget, view_name):
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_budgets_are_configured(self):
+        for view_name in ('product-list', 'product-feed', 'product-batch', 'product-changes', 'favorite-list'):
+            self.assertIn(view_name, settings.QUERY_BUDGETS)
+            self.assertLess(query_budget(view_name), settings.QUERY_BUDGET_DEFAULT)
+
+    def test_list(self):
+        response = self.assertWithinBudget('product-list', reverse('product-list'), 2)
+        self.assertEqual(len(response.json()), len(self.products))
+
+    def test_list_authenticated(self):
+        self.login(self.user)
+        response = self.assertWithinBudget('product-list', reverse('product-list'), 3)
+        favorited = {item['id'] for item in response.json() if item['is_favorited']}
+        self.assertEqual(favorited, {product.pk for product in self.products[:3]})
+
+    def test_list_filtered_by_category(self):
+        self.assertWithinBudget(
+            'product-list', reverse('product-list'), 3, category=self.category.pk, ordering='-price'
+        )
+
+    def test_feed(self):
+        self.login(self.user)
+        response = self.assertWithinBudget('product-feed', reverse('product-feed'), 2)
+        self.assertEqual(response.json()['scope'], 'country')
+
+    def test_batch(self):
+        self.login(self.user)
+        ids = ','.join(str(product.pk) for product in self.products)
+        response = self.assertWithinBudget('product-batch', reverse('product-batch'), 3, ids=ids)
+        self.assertEqual(len(response.json()['results']), len(self.products))
+
+    def test_changes(self):
+        token = self.client.get(reverse('product-changes')).json()['token']
+        self.assertWithinBudget('product-changes', reverse('product-changes'), 4, since=token)
+
+    def test_favorites(self):
+        self.login(self.user)
+        response = self.assertWithinBudget('favorite-list', reverse('favorite-list'), 4)
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class ProductQueryBudgetASGITests(ProductQueryBudgetTests):
+    async_views = True
+
+
+class ProductDetailTests(HTTPStackMixin, MarketplaceDataMixin, QueryBudgetMixin, APITestCase):
+    def test_detail(self):
+        product = self.products[0]
+        response = self.client.get(reverse('product-detail', kwargs={'pk': product.pk}))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['id'], product.pk)
+        self.assertEqual(response.json()['title'], product.title)
+
+    def test_unpublished_is_visible_to_author_only(self):
+        product = self.products[0]
+        type(product).objects.filter(pk=product.pk).update(status=1)
+        path = reverse('product-detail', kwargs={'pk': product.pk})
+        self.assertEqual(self.client.get(path).status_code, 404)
+        self.login(self.author)
+        self.assertEqual(self.client.get(path).status_code, 200)
+
+    def test_missing(self):
+        self.assertEqual(self.client.get(reverse('product-detail', kwargs={'pk': 0})).status_code, 404)
+
+
+class ProductDetailASGITests(ProductDetailTests):
+    async_views = True
+
+
+class CompactProductViewsTests(MarketplaceDataMixin, APITestCase):
+    def test_counts_new_viewers_once(self):
+        product = self.products[0]
+        today = timezone.localdate()
+        for days_ago in (10, 2, 1):
+            ProductView.objects.create(product=product, user=self.user, day=today - timedelta(days=days_ago))
+        viewer = TelegramUser.objects.create(username='carol', telegram_id=3, country=self.country, city=self.city)
+        ProductView.objects.create(product=product, user=viewer, day=today - timedelta(days=1))
+        # Сегодняшний день ещё не закрыт
+        ProductView.objects.create(product=self.products[1], user=self.user, day=today)
+
+        out = StringIO()
+        call_command('compact_product_views', '--dry-run', stdout=out)
+        self.assertIn('Days to compact: 3', out.getvalue())
+
+        call_command('compact_product_views', stdout=StringIO())
+        self.assertEqual(Product.objects.get(pk=product.pk).views_count, 2)
+        self.assertEqual(Product.objects.get(pk=self.products[1].pk).views_count, 0)
+        self.assertEqual(ProductViewDaily.objects.count(), 3)
+        # Сырые просмотры старше PRODUCT_VIEWS_RAW_RETENTION_DAYS удалены
+        self.assertFalse(ProductView.objects.filter(day=today - timedelta(days=10)).exists())
+
+        call_command('compact_product_views', stdout=StringIO())
+        self.assertEqual(Product.objects.get(pk=product.pk).views_count, 2)
+
+
+class ProductArchiveTests(MarketplaceDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.product = self.products[0]
+        name = default_storage.save('products/photo.jpg', ContentFile(b'image'))
+        ProductImage.objects.bulk_create([ProductImage(product=self.product, image=name)])
+        # Объявление давно не менялось и подходит под PRODUCT_ARCHIVE_AFTER_DAYS
+        Product.objects.filter(pk=self.product.pk).update(
+            update_at=timezone.now() - timedelta(days=settings.PRODUCT_ARCHIVE_AFTER_DAYS + 1)
+        )
+        self.path = reverse('product-detail', kwargs={'pk': self.product.pk})
+
+    def archive(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_batch([self.product.pk]), 1)
+
+    def test_archive_keeps_favorites_and_notifies(self):
+        self.archive()
+        archived = ArchivedProduct.objects.get(pk=self.product.pk)
+        self.assertEqual(archived.favorited_by, [self.user.pk])
+        self.assertEqual(archived.images, ['archive/products/photo.jpg'])
+        self.assertTrue(default_storage.exists('archive/products/photo.jpg'))
+        self.assertFalse(default_storage.exists('products/photo.jpg'))
+        notification = Notification.objects.get(kind=Notification.KIND_FAVORITE_ARCHIVED)
+        self.assertEqual(notification.chat_id, self.user.telegram_id)
+
+        self.login(self.user)
+        self.assertTrue(self.client.get(self.path).json()['is_favorited'])
+
+    def test_rollback_removes_copies(self):
+        with mock.patch('capybara_products.archive._delete_rows', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                archive_batch([self.product.pk])
+        self.assertFalse(default_storage.exists('archive/products/photo.jpg'))
+        self.assertTrue(default_storage.exists('products/photo.jpg'))
+        self.assertTrue(Product.objects.filter(pk=self.product.pk).exists())
+
+    def test_owner_restores(self):
+        self.archive()
+        self.login(self.user)
+        self.assertEqual(self.client.post(self.path + 'restore/').status_code, 403)
+
+        self.login(self.author)
+        self.assertEqual(self.client.patch(self.path, {'title': 'New'}).status_code, 409)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.path + 'restore/')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        restored = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(restored.create_at, self.product.create_at)
+        self.assertGreater(restored.update_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(restored.favorites_count, 1)
+        self.assertTrue(Favorite.objects.filter(user=self.user, product=restored).exists())
+        self.assertEqual(list(restored.images.values_list('image', flat=True)), ['products/photo.jpg'])
+        self.assertTrue(default_storage.exists('products/photo.jpg'))
+        self.assertFalse(default_storage.exists('archive/products/photo.jpg'))
+        self.assertFalse(ArchivedProduct.objects.exists())
+
+    def test_owner_deletes(self):
+        self.archive()
+        self.login(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(self.path).status_code, 204)
+        self.assertFalse(ArchivedProduct.objects.exists())
+        self.assertFalse(default_storage.exists('archive/products/photo.jpg'))
+        self.assertEqual(self.client.post(self.path + 'restore/').status_code, 404)
+
+
+class FavoriteAPITests(MarketplaceDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.user)
+
+    def toggle(self, method, product_id):
+        return getattr(self.client, method)(reverse('favorite-toggle', kwargs={'pk': product_id}))
+
+    def assertCountMatchesRows(self, product):
+        product.refresh_from_db()
+        self.assertEqual(product.favorites_count, Favorite.objects.filter(product=product).count())
+
+    def test_repeated_add_and_remove(self):
+        product = self.products[5]
+        for _ in range(2):
+            response = self.toggle('post', product.pk)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'is_favorited': True, 'favorites_count': 1})
+        self.assertEqual(Favorite.objects.filter(user=self.user, product=product).count(), 1)
+        self.assertCountMatchesRows(product)
+
+        for _ in range(2):
+            response = self.toggle('delete', product.pk)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'is_favorited': False, 'favorites_count': 0})
+        self.assertFalse(Favorite.objects.filter(user=self.user, product=product).exists())
+        self.assertCountMatchesRows(product)
+
+    def test_count_follows_other_users(self):
+        product = self.products[0]
+        self.login(self.author)
+        self.assertEqual(self.toggle('post', product.pk).json()['favorites_count'], 2)
+        self.assertCountMatchesRows(product)
+
+    def test_hidden_or_missing_product(self):
+        hidden = self.products[6]
+        Product.objects.filter(pk=hidden.pk).update(status=1)
+        self.assertEqual(self.toggle('post', hidden.pk).status_code, 404)
+        self.assertFalse(Favorite.objects.filter(product=hidden).exists())
+        self.assertEqual(self.toggle('post', 0).status_code, 404)
+        self.assertEqual(self.toggle('delete', 0).status_code, 404)
+
+        # Автор видит своё неопубликованное объявление и может его добавить
+        self.login(self.author)
+        self.assertEqual(self.toggle('post', hidden.pk).status_code, 200)
+
+    def test_sync(self):
+        kept, added, removed = self.products[0], self.products[5], self.products[1]
+        actions = [
+            {'product': added.pk, 'favorited': False},
+            {'product': added.pk, 'favorited': True},
+            {'product': removed.pk, 'favorited': False},
+            {'product': kept.pk, 'favorited': True},
+            {'product': 0, 'favorited': True},
+        ]
+        response = self.client.post(reverse('favorite-sync'), {'actions': actions}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {
+            'results': [
+                {'product': added.pk, 'is_favorited': True, 'favorites_count': 1},
+                {'product': removed.pk, 'is_favorited': False, 'favorites_count': 0},
+                {'product': kept.pk, 'is_favorited': True, 'favorites_count': 1},
+            ],
+            'missing': [0],
+        })
+        self.assertEqual(
+            set(Favorite.objects.filter(user=self.user).values_list('product_id', flat=True)),
+            {kept.pk, added.pk, self.products[2].pk},
+        )
+        for product in (kept, added, removed):
+            self.assertCountMatchesRows(product)
+
+
+class ProductListFastSerializerTests(MarketplaceDataMixin, APITestCase):
+    def render_both(self, user):
+        request = Request(RequestFactory().get(reverse('product-list')))
+        request.user = user
+        queryset = Product.objects.order_by('pk')
+        instances = queryset.select_related('author', 'category', 'currency', 'country', 'city')
+        if user.is_authenticated:
+            instances = instances.prefetch_related(
+                Prefetch('favorited_by', queryset=Favorite.objects.filter(user=user), to_attr='my_favorites')
+            )
+        drf = ProductListSerializer(instances, many=True, context={'request': request}).data
+
+        fast = ProductListFastSerializer(request)
+        rows = list(queryset.values(*ProductListFastSerializer.fields))
+        lean = fast.serialize(rows, fast.get_favorited_ids(rows))
+
+        renderer = JSONRenderer()
+        return renderer.render(drf), renderer.render(lean), lean
+
+    def test_anonymous_output_is_identical(self):
+        drf, lean, data = self.render_both(AnonymousUser())
+        self.assertEqual(lean, drf)
+        self.assertEqual(len(data), len(self.products))
+        self.assertFalse(any(item['is_favorited'] for item in data))
+
+    def test_authenticated_output_is_identical(self):
+        drf, lean, data = self.render_both(self.user)
+        self.assertEqual(lean, drf)
+        favorited = {item['id'] for item in data if item['is_favorited']}
+        self.assertEqual(favorited, {product.pk for product in self.products[:3]})
+
+
+class ProductPriceFilterTests(HTTPStackMixin, MarketplaceDataMixin, APITestCase):
+    # Объявления с чётным номером — в ARS (курс 1000) и в категории Home, с нечётным — в USD и Electronics
+
+    def titles(self, **params):
+        response = self.client.get(reverse('product-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.json()]
+
+    def test_usd_bounds_match_ars_listings_by_converted_price(self):
+        # 100, 300, 500, 700 ARS — это 0.10, 0.30, 0.50, 0.70 USD
+        titles = self.titles(category=self.other_category.pk, min_price='0.25', max_price='0.6', ordering='price')
+        self.assertEqual(titles, ['Product 2', 'Product 4'])
+
+    def test_bounds_in_price_currency(self):
+        titles = self.titles(category=self.other_category.pk, min_price=250, max_price=600, price_currency='ARS', ordering='price')
+        self.assertEqual(titles, ['Product 2', 'Product 4'])
+        # В USD те же границы отсекают все объявления в ARS
+        self.assertEqual(self.titles(category=self.other_category.pk, min_price=250), [])
+
+    def test_ordering_by_price_uses_base_currency(self):
+        # Пустой category включает фильтры и сортировку, не сужая выборку
+        titles = self.titles(category='', ordering='price')
+        self.assertEqual(titles, [f'Product {number}' for number in (0, 2, 4, 6, 1, 3, 5, 7)])
+        self.assertEqual(self.titles(category='', ordering='-price'), titles[::-1])
+
+    def test_unknown_price_currency_is_rejected(self):
+        response = self.client.get(reverse('product-list'), {'category': self.category.pk, 'min_price': 1, 'price_currency': 'XXX'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('price_currency', response.json())
+
+
+class ProductPriceBaseTests(MarketplaceDataMixin, APITestCase):
+    def price_base(self, product):
+        return Product.objects.values_list('price_base', flat=True).get(pk=product.pk)
+
+    def test_rate_change_recomputes_price_base_after_commit(self):
+        product = self.products[0]
+        self.assertEqual(self.price_base(product), Decimal('0.10'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ars.rate = 50
+            self.ars.save()
+            self.assertEqual(self.price_base(product), Decimal('0.10'))
+        self.assertEqual(self.price_base(product), Decimal('2.00'))
+        self.assertEqual(self.price_base(self.products[1]), Decimal('200'))
+
+    def test_load_exchange_rates(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump({'base': 'USD', 'rates': {'ars': 500, 'EUR': 0.9}}, f)
+            f.flush()
+            out = StringIO()
+            call_command('load_exchange_rates', f.name, stdout=out)
+
+        self.assertIn('Updated 1 rates, recomputed 4 product prices', out.getvalue())
+        self.assertEqual(self.price_base(self.products[0]), Decimal('0.20'))
+        self.assertEqual(self.price_base(self.products[6]), Decimal('1.40'))
+
+
+@override_settings(CHANGES_OVERLAP_SECONDS=0)
+class ProductChangesTests(HTTPStackMixin, MarketplaceDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Объявления из фикстур созданы до первой метки
+        earlier = timezone.now() - timedelta(minutes=5)
+        Product.objects.update(create_at=earlier, update_at=earlier)
+
+    def changes(self, since=None):
+        response = self.client.get(reverse('product-changes'), {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_classifies_created_updated_and_deleted(self):
+        token = self.changes()['token']
+
+        with mock.patch('capybara_products.signals.moderate_goods', return_value=True):
+            created = Product.objects.create(
+                author=self.author, category=self.category, title='New', description='Description',
+                country=self.country, city=self.city, price=1, currency=self.usd,
+            )
+        updated = Product.objects.get(pk=self.products[1].pk)
+        updated.title = 'Renamed'
+        updated.save()
+        archived = Product.objects.get(pk=self.products[3].pk)
+        archived.status = 4
+        archived.save()
+        Product.objects.get(pk=self.products[5].pk).delete()
+
+        data = self.changes(token)
+        self.assertEqual([item['id'] for item in data['created']], [created.pk])
+        self.assertEqual([(item['id'], item['title']) for item in data['updated']], [(updated.pk, 'Renamed')])
+        self.assertEqual(data['deleted'], sorted([archived.pk, self.products[5].pk]))
+        self.assertFalse(data['has_more'])
+
+        # Следующая метка не повторяет уже отданные изменения
+        data = self.changes(data['token'])
+        self.assertEqual((data['created'], data['updated'], data['deleted']), ([], [], []))
+
+    def test_unpublished_own_listing_is_not_deleted_for_author(self):
+        token = self.changes()['token']
+        archived = Product.objects.get(pk=self.products[3].pk)
+        archived.status = 4
+        archived.save()
+
+        self.login(self.author)
+        data = self.changes(token)
+        self.assertEqual(data['deleted'], [])
+        self.assertEqual([item['id'] for item in data['updated']], [archived.pk])
+
+    @override_settings(CHANGES_MAX_ITEMS=2)
+    def test_has_more_continues_from_token(self):
+        token = self.changes()['token']
+        for product in self.products[:3]:
+            Product.objects.get(pk=product.pk).save()
+
+        first = self.changes(token)
+        self.assertTrue(first['has_more'])
+        second = self.changes(first['token'])
+        self.assertFalse(second['has_more'])
+        seen = [item['id'] for item in first['updated'] + second['updated']]
+        self.assertEqual(seen, [product.pk for product in self.products[:3]])
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get(reverse('product-changes'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+        expired = issue_token(timezone.now() - timedelta(days=settings.CHANGES_RETENTION_DAYS + 1))
+        response = self.client.get(reverse('product-changes'), {'since': expired})
+        self.assertEqual(response.status_code, 410)
+
+
+class ProductBatchTests(HTTPStackMixin, MarketplaceDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        Product.objects.filter(pk=self.products[2].pk).update(status=4)
+
+    def test_get_keeps_request_order(self):
+        ids = [self.products[5].pk, self.products[1].pk, 999999, self.products[2].pk, self.products[5].pk]
+        response = self.client.get(reverse('product-batch'), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['results']], [self.products[5].pk, self.products[1].pk])
+        # Несуществующие и скрытые объявления
+        self.assertEqual(data['missing'], [999999, self.products[2].pk])
+
+    def test_post_shows_own_hidden_listing(self):
+        self.login(self.author)
+        ids = [self.products[2].pk, self.products[0].pk]
+        # content_type вместо format='json': его понимает и AsyncClient
+        response = self.client.post(reverse('product-batch'), {'ids': ids}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['results']], ids)
+        self.assertEqual(data['missing'], [])
+
+    @override_settings(PRODUCTS_BATCH_MAX_IDS=2)
+    def test_invalid_ids(self):
+        for ids in (['a'], {'id': 1}, [1, 2, 3]):
+            response = self.client.post(reverse('product-batch'), {'ids': ids}, content_type='application/json')
+            self.assertEqual(response.status_code, 400, ids)
+            self.assertIn('ids', response.json())
+
+
+class ProductCardCacheTests(HTTPStackMixin, MarketplaceDataMixin, APITestCase):
+    def list_products(self):
+        """Список объявлений и число карточек, собранных мимо кэша."""
+        with mock.patch.object(ProductCards, 'build', autospec=True, side_effect=ProductCards.build) as build:
+            response = self.client.get(reverse('product-list'))
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.json()}, build.call_count
+
+    def test_cards_are_cached(self):
+        _, built = self.list_products()
+        self.assertEqual(built, len(self.products))
+        _, built = self.list_products()
+        self.assertEqual(built, 0)
+
+    def test_product_save_invalidates_its_card(self):
+        self.list_products()
+        product = Product.objects.get(pk=self.products[1].pk)
+        product.title = 'Renamed'
+        product.save()
+
+        cards, built = self.list_products()
+        self.assertEqual(built, 1)
+        self.assertEqual(cards[product.pk]['title'], 'Renamed')
+
+    def test_counter_change_invalidates_its_card(self):
+        self.list_products()
+        Favorite.objects.create(user=self.author, product=self.products[4])
+
+        cards, built = self.list_products()
+        self.assertEqual(built, 1)
+        self.assertEqual(cards[self.products[4].pk]['favorites_count'], 1)
+
+    def test_reference_version_change_misses_cache(self):
+        self.list_products()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.name = 'CABA'
+            self.city.save()
+
+        cards, built = self.list_products()
+        self.assertEqual(built, len(self.products))
+        self.assertEqual(cards[self.products[0].pk]['city'], 'CABA')
+
+
+class ProductFeedCacheTests(HTTPStackMixin, MarketplaceDataMixin, APITestCase):
+    def feed(self):
+        response = self.client.get(reverse('product-feed'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def create_product(self, city):
+        with mock.patch('capybara_products.signals.moderate_goods', return_value=True):
+            return Product.objects.create(
+                author=self.author, category=self.category, title='New', description='Description',
+                country=self.country, city=city, price=1, currency=self.usd,
+            )
+
+    def test_publish_drops_cached_first_page(self):
+        self.assertEqual(len(self.feed()['results']), len(self.products))
+        self.assertIsNotNone(cache.get(feed_cache_key(SCOPE_ALL, None)))
+
+        product = self.create_product(self.city)
+        self.assertIsNone(cache.get(feed_cache_key(SCOPE_ALL, None)))
+        self.assertEqual(self.feed()['results'][0]['id'], product.pk)
+
+    def test_delete_drops_cached_first_page(self):
+        self.feed()
+        self.products[7].delete()
+        self.assertIsNone(cache.get(feed_cache_key(SCOPE_ALL, None)))
+        self.assertNotIn(self.products[7].pk, [item['id'] for item in self.feed()['results']])
+
+    def test_change_in_other_city_drops_widened_city_feed(self):
+        # В городе пользователя меньше FEED_MIN_RESULTS объявлений — лента расширена до страны
+        self.login(self.user)
+        data = self.feed()
+        self.assertEqual((data['scope'], data['location']), (SCOPE_COUNTRY, self.country.pk))
+        self.assertEqual(cache.get(feed_cache_key(SCOPE_CITY, self.city.pk)), {'widened_to': self.country.pk})
+
+        product = Product.objects.get(pk=self.products[6].pk)
+        product.status = 4
+        product.save()
+        self.assertIsNone(cache.get(feed_cache_key(SCOPE_COUNTRY, self.country.pk)))
+        self.assertNotIn(product.pk, [item['id'] for item in self.feed()['results']])
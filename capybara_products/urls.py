@@ -5,23 +5,30 @@ from rest_framework_nested import routers
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import ProductViewSet
+from .views import ProductViewSet, FavoriteViewSet
 
 """
     GET    /products/v1/products/             — список (только status=3, + свои для авториз.)
     POST   /products/v1/products/             — создать новое объявление
+    GET    /products/v1/products/feed/        — лента по городу/стране пользователя (keyset, ?cursor=)
+    GET    /products/v1/products/changes/     — изменения с метки ?since= (created/updated/deleted)
+    GET    /products/v1/products/batch/?ids=1,2,3  — несколько объявлений за один запрос
+    POST   /products/v1/products/batch/       — то же, {"ids": [1, 2, 3]}
 
     GET    /products/v1/products/{pk}/        — детали + сохраняем просмотр
     PUT    /products/v1/products/{pk}/        — полный апдейт (только автор)
     PATCH  /products/v1/products/{pk}/        — частичный апдейт (только автор)
     DELETE /products/v1/products/{pk}/        — удалить (только автор)
 
-    GET    /products/v1/products/favorites/   — список избранного текущего пользователя
-    POST   /products/v1/products/{pk}/favorite/   — добавить в избранное
-    DELETE /products/v1/products/{pk}/favorite/   — убрать из избранного
+    GET    /products/v1/favorites/               — список избранного текущего пользователя
+    POST   /products/v1/favorites/{pk}/toggle/   — добавить в избранное
+    DELETE /products/v1/favorites/{pk}/toggle/   — убрать из избранного
+    POST   /products/v1/favorites/sync/          — применить пачку отложенных нажатий
 """
 
 router = DefaultRouter()
+# favorites регистрируется раньше, иначе 'favorites/' совпадёт с деталями объявления
+router.register(r'favorites', FavoriteViewSet, basename='favorite')
 router.register(r'', ProductViewSet, basename='product')
 
 urlpatterns = [
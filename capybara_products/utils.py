@@ -1,21 +1,42 @@
+import threading
 
-from mistralai import Mistral
 from django.conf import settings
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mistral_client():
+    """
+    Общий клиент Mistral процесса.
+
+    SDK тяжёлый (pydantic-модели, httpx), поэтому импортируется при первом
+    вызове, а не при загрузке сигналов в каждом процессе. Клиент и его пул
+    keep-alive соединений переиспользуются между вызовами и потоками.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from mistralai import Mistral
+                _client = Mistral(api_key=settings.MISTRAL_API_KEY)
+    return _client
+
+
 def moderate_goods(text):
-    client = Mistral(api_key=settings.MISTRAL_API_KEY)
-    
+    client = get_mistral_client()
+
     response = client.classifiers.moderate_chat(
         model="mistral-moderation-latest",
         inputs=[{"role": "user", "content": text}]
     )
-    
+
     category_scores = response.results[0].category_scores
-    
+
     has_violations = any(
-        category_score > 0.5 
+        category_score > 0.5
         for category_score in category_scores.values()
     )
-    
+
 
     return not has_violations
@@ -1,22 +1,40 @@
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.utils import timezone
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status, mixins
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q, Prefetch
+from django.db.models import Q, Prefetch
 
-from .models import Product, ProductView, Favorite
+from api.asyncviews import AsyncAPIViewMixin
+from api.replicas import ReplicaReadsMixin
+
+from .models import ArchivedProduct, Product, ProductView, Favorite
 from .serializers import (
+    ArchivedProductSerializer,
+    FavoriteSyncSerializer,
+    ProductListFastSerializer,
     ProductListSerializer, 
     ProductDetailSerializer, 
     ProductCreateUpdateSerializer,   
 )
 from .permissions import IsAuthorOrReadOnly, IsCommentAuthorOrReadOnly
-from .filters import ProductFilterSet
+from .filters import ProductFilterSet, ProductOrderingFilter
+from .pagination import FavoriteCursorPagination
+from .changes import changed_since, deleted_since, issue_token, read_token, token_expired
+from .cards import CARD_KEY_FIELDS, ProductCards
+from .favorites import add_favorite, remove_favorite, sync_favorites
+from .viewstats import arecord_view, record_view
+from .archive import delete_archived_product, restore_product
+from .feed import decode_cursor, get_first_page, get_page, resolve_location
 
 
 class ProductQuerySetMixin:
@@ -26,12 +44,18 @@ class ProductQuerySetMixin:
         """Базовый QuerySet с предзагрузкой связанных объектов и аннотациями"""
         return Product.objects.select_related(
             'author', 'category', 'currency', 'country', 'city'
-        ).prefetch_related('images')\
-         .annotate(
-            views_count=Count('views', distinct=True),
-            favorites_count=Count('favorited_by', distinct=True)
-         )
+        ).prefetch_related('images')
     
+    def filter_visible(self, queryset, user):
+        """Оставляет опубликованные объявления и собственные объявления пользователя"""
+        if user.is_authenticated:
+            return queryset.filter(Q(status=3) | Q(author=user))
+        return queryset.filter(status=3)
+
+    def get_list_queryset(self):
+        """Лёгкий QuerySet для списков: только колонки ProductListFastSerializer, без предзагрузок"""
+        return self.filter_visible(Product.objects.all(), self.request.user)
+
     def add_favorites_prefetch(self, queryset, user):
         """Добавляет prefetch для избранных продуктов пользователя"""
         if not user.is_authenticated:
@@ -46,56 +70,336 @@ class ProductQuerySetMixin:
         )
 
 
-class ProductViewSet(ProductQuerySetMixin, viewsets.ModelViewSet):
+class ProductViewSet(AsyncAPIViewMixin, ReplicaReadsMixin, ProductQuerySetMixin, viewsets.ModelViewSet):
     """
     API для работы с продуктами (объявлениями).
     
     Предоставляет полный набор CRUD-операций для продуктов, а также
     дополнительные действия для управления избранными продуктами.
+    Список и детали объявления имеют async-варианты (alist, aretrieve).
+    Чтения идут на реплику базы (api.replicas), кроме changes: токен синхронизации
+    выдаётся по часам primary, и отставшая реплика потеряла бы изменения из окна.
     """
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filterset_class = ProductFilterSet
     search_fields = ['title', 'description']
     ordering_fields = ['create_at', 'price', 'views_count', 'favorites_count']
     ordering = ['-create_at']
+    primary_actions = ('changes',)
 
     def get_filter_backends(self):
         backends = [SearchFilter]
         if 'category' in self.request.query_params:
-            backends += [DjangoFilterBackend, OrderingFilter]
+            backends += [DjangoFilterBackend, ProductOrderingFilter]
         return backends
 
+    def filter_queryset(self, queryset):
+        for backend in self.get_filter_backends():
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
     def get_queryset(self):
         queryset = self.get_base_queryset()
         queryset = self.add_favorites_prefetch(queryset, self.request.user)
-        
-        user = self.request.user
-        if user.is_authenticated:
-            return queryset.filter(Q(status=3) | Q(author=user))
-        return queryset.filter(status=3)
+        return self.filter_visible(queryset, self.request.user)
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return ProductCreateUpdateSerializer
-        if self.action == 'list':
+        if self.action in ['list', 'feed', 'changes', 'batch']:
             return ProductListSerializer
         return ProductDetailSerializer
 
+    def get_fast_serializer(self):
+        return ProductListFastSerializer(self.request, format=self.format_kwarg)
+
+    def render_cards(self, rows):
+        return ProductCards(self.request, format=self.format_kwarg).render(self.get_list_queryset(), rows)
+
+    async def arender_cards(self, rows):
+        return await ProductCards(self.request, format=self.format_kwarg).arender(self.get_list_queryset(), rows)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список объявлений.
+
+        Запрос выбирает только поля ключа карточки; сами карточки берутся
+        из кэша (ProductCards), формат ответа тот же, что у ProductListSerializer.
+        """
+        queryset = self.filter_queryset(self.get_list_queryset()).values(*CARD_KEY_FIELDS)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.render_cards(page))
+        return Response(self.render_cards(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = (await self.afilter_queryset(self.get_list_queryset())).values(*CARD_KEY_FIELDS)
+
+        if self.paginator is not None:
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            if page is not None:
+                return self.get_paginated_response(await self.arender_cards(page))
+        return Response(await self.arender_cards([row async for row in queryset]))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Детали объявления.
+
+        Просмотр авторизованного пользователя (кроме автора) записывается
+        и попадает в views_count после свёртки просмотров за день.
+        Объявление, перенесённое в архив, отдаётся из архива (ArchivedProductSerializer).
+        """
+        try:
+            instance = self.get_object()
+        except Http404:
+            archived = self.get_archived_object()
+            if archived is None:
+                raise
+            return self.archived_response(archived)
+        record_view(instance, request.user)
+        return Response(self.get_serializer(instance).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        # Объявление со всеми связями загружается через async ORM,
+        # сериализатор работает только с загруженными данными
+        try:
+            instance = await self.aget_object()
+        except Http404:
+            archived = await sync_to_async(self.get_archived_object)()
+            if archived is None:
+                raise
+            return self.archived_response(archived)
+        await arecord_view(instance, request.user)
+        return Response(self.get_serializer(instance).data)
+
+    def get_archived_object(self):
+        """Объявление из архива с теми же правилами видимости или None."""
+        queryset = ArchivedProduct.objects.select_related('author', 'category', 'currency', 'country', 'city')
+        queryset = self.filter_visible(queryset, self.request.user)
+        try:
+            return queryset.filter(pk=self.kwargs['pk']).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+
+    def archived_response(self, archived):
+        return Response(ArchivedProductSerializer(archived, context=self.get_serializer_context()).data)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except Http404:
+            archived = self.get_archived_object()
+            if archived is None or archived.author_id != request.user.pk:
+                raise
+            return Response(
+                {'detail': 'Product is archived, restore it first'}, status=status.HTTP_409_CONFLICT
+            )
+
+    def destroy(self, request, *args, **kwargs):
+        """Удаление объявления; автор может удалить и своё объявление из архива."""
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Http404:
+            archived = self.get_archived_object()
+            if archived is None:
+                raise
+            self.check_object_permissions(request, archived)
+            delete_archived_product(archived)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """
+        Вернуть своё объявление из архива.
+
+        Объявление восстанавливается с изображениями и избранным, дата
+        создания сохраняется. Для объявлений не из архива — 404.
+        """
+        archived = self.get_archived_object()
+        if archived is None:
+            raise NotFound()
+        self.check_object_permissions(request, archived)
+        try:
+            restore_product(archived.pk)
+        except ArchivedProduct.DoesNotExist:
+            raise NotFound()
+        return Response(self.get_serializer(self.get_object()).data)
+
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        Лента опубликованных объявлений по местоположению.
+
+        По умолчанию показывает объявления из города пользователя; если их меньше
+        FEED_MIN_RESULTS, лента расширяется до страны. Область можно задать явно
+        параметрами city или country. Для следующих страниц передаётся cursor из
+        поля next. Первая страница каждой области (строки без карточек) хранится
+        в кэше, сами карточки берутся из кэша карточек.
+
+        Возвращает:
+        - scope: city, country или all
+        - location: id города или страны
+        - next: курсор следующей страницы или null
+        - results: объявления
+        """
+        queryset = self.get_list_queryset().values(*CARD_KEY_FIELDS, 'create_at')
+        cursor = request.query_params.get('cursor')
+
+        if cursor:
+            position = decode_cursor(cursor)
+            rows, next_cursor = get_page(queryset, position['s'], position['l'], after=position)
+            page = {'scope': position['s'], 'location': position['l'], 'next': next_cursor, 'rows': rows}
+        else:
+            page = get_first_page(queryset, *resolve_location(request))
+
+        return Response({
+            'scope': page['scope'],
+            'location': page['location'],
+            'next': page['next'],
+            'results': self.render_cards(page['rows']),
+        })
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Изменения объявлений с момента метки since.
+
+        Без since возвращает только текущую метку: её нужно получить перед
+        полной загрузкой списка и затем передавать в следующих запросах.
+        Если изменений больше CHANGES_MAX_ITEMS, возвращается has_more=true
+        и метка, с которой нужно продолжить. Если метка старше
+        CHANGES_RETENTION_DAYS, возвращается 410 — нужна полная перезагрузка.
+
+        Возвращает:
+        - token: метка для следующего запроса
+        - created: новые объявления
+        - updated: изменённые объявления
+        - deleted: id объявлений, которые нужно удалить из кэша
+        - has_more: есть ли ещё изменения
+        """
+        now = timezone.now()
+        since = request.query_params.get('since')
+        if not since:
+            return Response({'token': issue_token(now)})
+
+        moment, last_id = read_token(since)
+        if token_expired(moment):
+            return Response(
+                {'detail': 'Token expired, full reload required'},
+                status=status.HTTP_410_GONE
+            )
+
+        limit = settings.CHANGES_MAX_ITEMS
+        rows = list(
+            self.get_list_queryset()
+            .filter(changed_since(moment, last_id), update_at__lte=now)
+            .order_by('update_at', 'id')
+            .values(*ProductListFastSerializer.fields)[:limit + 1]
+        )
+        has_more = len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+            until = rows[-1]['update_at']
+            token = issue_token(until, rows[-1]['id'])
+        else:
+            until = now
+            token = issue_token(now)
+
+        deleted_ids = deleted_since(moment, until)
+        if deleted_ids:
+            # Объявления, которые по-прежнему видны пользователю (свои или снова опубликованные)
+            visible = self.filter_visible(Product.objects.filter(pk__in=deleted_ids), request.user)
+            deleted_ids -= set(visible.values_list('pk', flat=True))
+
+        data = self.get_fast_serializer().serialize(rows)
+        return Response({
+            'token': token,
+            'created': [item for item, row in zip(data, rows) if row['create_at'] > moment],
+            'updated': [item for item, row in zip(data, rows) if row['create_at'] <= moment],
+            'deleted': sorted(deleted_ids),
+            'has_more': has_more,
+        })
+
+
+    def get_batch_ids(self, request):
+        if request.method == 'POST':
+            raw = request.data.get('ids', [])
+        else:
+            raw = [part for part in request.query_params.get('ids', '').split(',') if part.strip()]
+
+        if not isinstance(raw, list):
+            raise ValidationError({'ids': ['Expected a list of product IDs']})
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in raw))
+        except (TypeError, ValueError):
+            raise ValidationError({'ids': ['Product IDs must be integers']})
+
+        if len(ids) > settings.PRODUCTS_BATCH_MAX_IDS:
+            raise ValidationError({'ids': [f'At most {settings.PRODUCTS_BATCH_MAX_IDS} IDs per request']})
+        return ids
+
+    @action(detail=False, methods=['get', 'post'], permission_classes=[AllowAny])
+    def batch(self, request):
+        """
+        Получить несколько объявлений по списку id одним запросом.
+
+        - GET: ?ids=1,2,3
+        - POST: {"ids": [1, 2, 3]}
+
+        Действуют те же правила видимости, что и для списка объявлений.
+        Не больше PRODUCTS_BATCH_MAX_IDS id за запрос, повторы игнорируются.
+
+        Возвращает:
+        - results: найденные объявления в порядке запроса
+        - missing: id, которые не найдены или недоступны
+        """
+        ids = self.get_batch_ids(request)
+        rows = self.get_list_queryset().filter(pk__in=ids).values(*CARD_KEY_FIELDS)
+        products = {row['id']: row for row in rows}
+
+        found = [products[pk] for pk in ids if pk in products]
+        return Response({
+            'results': self.render_cards(found),
+            'missing': [pk for pk in ids if pk not in products],
+        })
+
 
 class FavoriteViewSet(ProductQuerySetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     API для работы с избранными продуктами.
     
     Позволяет получать список избранных продуктов, а также добавлять и удалять продукты из избранного.
+    Список строится от таблицы избранного в порядке добавления и листается курсором.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ProductListSerializer
+    pagination_class = FavoriteCursorPagination
     
     
     def get_queryset(self):
-        user = self.request.user
-        queryset = self.get_base_queryset().filter(favorited_by__user=user)
-        return self.add_favorites_prefetch(queryset, user)
+        if getattr(self, 'swagger_fake_view', False):
+            return Favorite.objects.none()
+
+        # Объявления с аннотациями подгружаются только для записей текущей страницы
+        return Favorite.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('product', queryset=self.get_base_queryset())
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список избранного текущего пользователя, начиная с последних добавленных.
+        """
+        page = self.paginate_queryset(self.get_queryset())
+
+        products = []
+        for favorite in page:
+            product = favorite.product
+            product.my_favorites = [favorite]
+            products.append(product)
+
+        serializer = self.get_serializer(products, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post', 'delete'])
     def toggle(self, request, pk=None):
@@ -105,41 +409,61 @@ class FavoriteViewSet(ProductQuerySetMixin, mixins.ListModelMixin, viewsets.Gene
         Требуется авторизация.
         - POST: добавляет продукт в избранное
         - DELETE: удаляет продукт из избранного
+
+        Выполняется одной транзакцией из двух SQL-запросов; счётчик избранного
+        хранится в объявлении и не пересчитывается.
         
         Возвращает:
         - is_favorited: добавлен ли продукт в избранное
         - favorites_count: общее количество добавлений продукта в избранное
         """
         try:
-            product = Product.objects.get(pk=pk)
-            user = request.user
+            product_id = int(pk)
+        except ValueError:
+            raise NotFound("Product not found")
 
-            if request.method == 'POST':
-                fav, created = Favorite.objects.get_or_create(user=user, product=product)
-            else:
-                deleted = Favorite.objects.filter(user=user, product=product).delete()[0] > 0
-                created = False
+        is_favorited = request.method == 'POST'
+        if is_favorited:
+            count = add_favorite(request.user.pk, product_id)
+        else:
+            count = remove_favorite(request.user.pk, product_id)
 
-            count = Product.objects.filter(pk=product.pk)\
-                .annotate(favorites_count=Count('favorited_by', distinct=True))\
-                .first().favorites_count
+        if count is None:
+            raise NotFound("Product not found")
 
-            return Response(
-                {
-                    "is_favorited": bool(created),
-                    "favorites_count": count
-                },
-                status=status.HTTP_200_OK
-            )
-        except Product.DoesNotExist:
-            return Response(
-                {"error": "Product not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Exception as e:
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(
+            {
+                "is_favorited": is_favorited,
+                "favorites_count": count
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """
+        Применить пачку отложенных нажатий «в избранное».
+
+        Клиент копит нажатия без сети и отправляет их одним запросом:
+        {"actions": [{"product": 1, "favorited": true}, ...]} в порядке нажатий.
+        Для каждого объявления учитывается последнее состояние.
+        Не больше FAVORITES_SYNC_MAX_ACTIONS действий за запрос.
+
+        Возвращает:
+        - results: итоговые is_favorited и favorites_count по объявлениям
+        - missing: id объявлений, которые не найдены
+        """
+        serializer = FavoriteSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        actions = [(item['product'], item['favorited']) for item in serializer.validated_data['actions']]
+        counts = sync_favorites(request.user.pk, actions)
+        final = dict(actions)
 
+        return Response({
+            'results': [
+                {'product': pk, 'is_favorited': final[pk], 'favorites_count': count}
+                for pk, count in counts.items() if count is not None
+            ],
+            'missing': [pk for pk, count in counts.items() if count is None],
+        })
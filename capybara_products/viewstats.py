@@ -0,0 +1,171 @@
+"""
+Просмотры объявлений: запись, свёртка по дням и счётчик зрителей.
+
+Детальная карточка пишет сырой просмотр (ProductView, один на пользователя
+в день). Задача compact_product_views сворачивает закрытые дни в
+ProductViewDaily и увеличивает Product.views_count на число новых зрителей:
+кто уже смотрел объявление, определяет bloom-фильтр объявления
+(ProductViewBloom), поэтому вернувшийся пользователь не считается повторно.
+Сырые дни старше PRODUCT_VIEWS_RAW_RETENTION_DAYS удаляются целиком.
+
+Свёртку запускает команда compact_product_views: при каждом деплое и раз
+в сутки после полуночи (cron). Первый запуск после миграции, добавившей
+views_count, посчитает накопленные просмотры за все прошедшие дни; до него
+views_count у всех объявлений равен нулю.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Product, ProductView, ProductViewBloom, ProductViewDaily
+
+
+COMPACTION_BATCH_SIZE = 500
+
+
+class BloomFilter:
+    """Bloom-фильтр id пользователей поверх массива байт (double hashing по blake2b)."""
+
+    def __init__(self, bits=None):
+        self.bits = bytearray(bits) if bits else bytearray(settings.PRODUCT_VIEWS_BLOOM_BITS // 8)
+        # Размер берётся из сохранённых данных: смена настройки не ломает старые фильтры
+        self.size = len(self.bits) * 8
+
+    def _positions(self, user_id):
+        digest = hashlib.blake2b(str(user_id).encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(settings.PRODUCT_VIEWS_BLOOM_HASHES)]
+
+    def __contains__(self, user_id):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(user_id))
+
+    def add(self, user_id):
+        """Добавляет пользователя; True, если его в фильтре ещё не было."""
+        added = False
+        for position in self._positions(user_id):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+def record_view(product, user):
+    """Сырой просмотр за сегодня; повторный просмотр в тот же день, автор и аноним не учитываются."""
+    view = _new_view(product, user)
+    if view is not None:
+        ProductView.objects.bulk_create([view], ignore_conflicts=True)
+
+
+async def arecord_view(product, user):
+    view = _new_view(product, user)
+    if view is not None:
+        await ProductView.objects.abulk_create([view], ignore_conflicts=True)
+
+
+def _new_view(product, user):
+    if not user.is_authenticated or user.pk == product.author_id:
+        return None
+    return ProductView(product_id=product.pk, user_id=user.pk, day=timezone.localdate())
+
+
+def last_compacted_day():
+    return ProductViewDaily.objects.aggregate(last=Max('day'))['last']
+
+
+def compact_views(today=None):
+    """
+    Сворачивает закрытые дни (раньше today) в ProductViewDaily и обновляет views_count.
+
+    Каждый день сворачивается в своей транзакции, дни не позже последнего
+    свёрнутого пропускаются, поэтому задачу можно перезапускать после сбоя.
+    Возвращает число свёрнутых дней.
+    """
+    today = today or timezone.localdate()
+    days = ProductView.objects.filter(day__lt=today)
+    last = last_compacted_day()
+    if last is not None:
+        days = days.filter(day__gt=last)
+
+    days = list(days.order_by('day').values_list('day', flat=True).distinct())
+    for day in days:
+        compact_day(day)
+    return len(days)
+
+
+def compact_day(day):
+    rows = (
+        ProductView.objects.filter(day=day)
+        .order_by('product_id')
+        .values_list('product_id', 'user_id')
+    )
+    with transaction.atomic():
+        for batch in _batches(rows.iterator(chunk_size=COMPACTION_BATCH_SIZE * 10)):
+            _compact_batch(day, batch)
+
+
+def _batches(rows):
+    """Пачки по COMPACTION_BATCH_SIZE объявлений: {product_id: [user_id, ...]}."""
+    batch = {}
+    for product_id, views in groupby(rows, key=itemgetter(0)):
+        batch[product_id] = [user_id for _, user_id in views]
+        if len(batch) >= COMPACTION_BATCH_SIZE:
+            yield batch
+            batch = {}
+    if batch:
+        yield batch
+
+
+def _compact_batch(day, batch):
+    ProductViewDaily.objects.bulk_create([
+        ProductViewDaily(product_id=product_id, day=day, viewers=len(users))
+        for product_id, users in batch.items()
+    ])
+
+    stored = ProductViewBloom.objects.in_bulk(list(batch))
+    created, updated = [], []
+    new_viewers = defaultdict(list)
+    for product_id, users in batch.items():
+        bloom = BloomFilter(stored[product_id].bits if product_id in stored else None)
+        added = sum(bloom.add(user_id) for user_id in users)
+        if added:
+            new_viewers[added].append(product_id)
+
+        if product_id in stored:
+            stored[product_id].bits = bytes(bloom.bits)
+            updated.append(stored[product_id])
+        else:
+            created.append(ProductViewBloom(product_id=product_id, bits=bytes(bloom.bits)))
+
+    ProductViewBloom.objects.bulk_create(created)
+    ProductViewBloom.objects.bulk_update(updated, ['bits'])
+    # Одинаковые приросты обновляются одним запросом: обычно их несколько значений на пачку
+    for added, product_ids in new_viewers.items():
+        Product.objects.filter(pk__in=product_ids).update(views_count=F('views_count') + added)
+
+
+def purge_raw_views(today=None):
+    """
+    Удаляет сырые просмотры старше PRODUCT_VIEWS_RAW_RETENTION_DAYS по дню за запрос.
+
+    Несвёрнутые дни не удаляются. Возвращает число удалённых строк.
+    """
+    today = today or timezone.localdate()
+    last = last_compacted_day()
+    if last is None:
+        return 0
+
+    bound = min(today - timedelta(days=settings.PRODUCT_VIEWS_RAW_RETENTION_DAYS), last + timedelta(days=1))
+    days = ProductView.objects.filter(day__lt=bound).order_by('day').values_list('day', flat=True).distinct()
+    total = 0
+    for day in list(days):
+        count, _ = ProductView.objects.filter(day=day).delete()
+        total += count
+    return total
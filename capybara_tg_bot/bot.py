@@ -1,7 +1,12 @@
+import argparse
 import asyncio
 import logging
+import sys
 from dotenv import load_dotenv
 import os
+from pathlib import Path
+
+import django
 
 from aiogram import Bot, Dispatcher, F, Router, types
 from aiogram.enums import ParseMode
@@ -15,15 +20,48 @@ from aiogram.types import (
     WebAppInfo,
 )
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+# Запуск скриптом (python capybara_tg_bot/bot.py) кладёт в sys.path только
+# каталог бота: корень проекта нужен для capybara_tg_bot и Django-приложений
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from capybara_tg_bot.webhook import create_app  # noqa: E402
 
 load_dotenv()
 
+# ORM нужен боту для реестра картинок (BotMedia) и статистики маркетплейса
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "capybara_api.settings")
+django.setup()
+
+from api.stats import aget_marketplace_stats  # noqa: E402
+from capybara_tg_bot.media import MediaRegistry  # noqa: E402
+
 API_TOKEN = os.getenv("BOT_TOKEN")
 
+# Другой сервер Bot API: локальный telegram-bot-api или фейковый для нагрузки (capybara_tg_bot.fake_telegram)
+BOT_API_URL = os.getenv("BOT_API_URL")
+
+# Webhook-режим (--webhook): публичный адрес для setWebhook, секрет для заголовка
+# X-Telegram-Bot-Api-Secret-Token, адрес и путь aiohttp-сервера, число воркеров и
+# размер очереди каждого, сколько одновременных запросов Telegram шлёт на вебхук
+WEBHOOK_URL = os.getenv("BOT_WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("BOT_WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("BOT_WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("BOT_WEBHOOK_PORT", 8081))
+WEBHOOK_PATH = os.getenv("BOT_WEBHOOK_PATH", "/webhook")
+WORKERS = int(os.getenv("BOT_WORKERS", 16))
+QUEUE_SIZE = int(os.getenv("BOT_QUEUE_SIZE", 100))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("BOT_WEBHOOK_MAX_CONNECTIONS", 40))
+
 logging.basicConfig(level=logging.INFO)
 
-bot = Bot(token=API_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+session = AiohttpSession(api=TelegramAPIServer.from_base(BOT_API_URL)) if BOT_API_URL else None
+bot = Bot(token=API_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher()
+media = MediaRegistry()
 
 prices = [LabeledPrice(label="Поддержать проект ⭐️", amount=1)]
 
@@ -38,6 +76,12 @@ URL = "https://www.capybaramarket.store/"
 
 SAPPORT_URL = os.getenv("SUPPORT_URL")
 
+START_CAPTION = (f"Привет, <b>User</b>! 👋\n\n"
+        f"Добро пожаловать в Capybara Marketplace\n\n"
+        f"Здесь вы можете покупать и продавать товары, "
+        f"общаться с продавцами и находить лучшие предложения.\n\n"
+        f"Нажмите кнопку ниже, чтобы открыть приложение:")
+
 def start_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(
@@ -56,31 +100,31 @@ back_kb = InlineKeyboardMarkup(inline_keyboard=[
 
 @dp.message(Command("start"))
 async def cmd_start(message: types.Message):
-    await bot.delete_webhook(drop_pending_updates=True)
-    await message.answer_photo(
-        photo=START_PHOTO_URL,
-        caption=(f"Привет, <b>User</b>! 👋\n\n"
-        f"Добро пожаловать в Capybara Marketplace\n\n"
-        f"Здесь вы можете покупать и продавать товары, "
-        f"общаться с продавцами и находить лучшие предложения.\n\n"
-        f"Нажмите кнопку ниже, чтобы открыть приложение:"),
+    await media.send(START_PHOTO_URL, lambda photo: message.answer_photo(
+        photo=photo,
+        caption=START_CAPTION,
         reply_markup=start_keyboard()
-    )
+    ))
+
+
+def count(value: int) -> str:
+    return f"{value:,}".replace(",", " ")
 
 
 @dp.callback_query(F.data == "about")
 async def callback_about(query: types.CallbackQuery):
-    await query.message.edit_media(
+    stats, _, _ = await aget_marketplace_stats()
+    await media.send(ABOUT_PHOTO_URL, lambda photo: query.message.edit_media(
         media=InputMediaPhoto(
-            media=ABOUT_PHOTO_URL,
+            media=photo,
             caption=(
         f"<b>Расскажу немного про сервис Capybara Marketplace</b>\n\n"
         f"Capybara Marketplace — это современный маркетплейс, созданный для удобной покупки и продажи товаров через Telegram.\n"
         f"Больше не нужно искать товары в десятках различных групп и чатах — мы собрали все в одном месте.\n\n"
         
-        f"👥 Уже более ХХХХ пользователей пользуются нашим сервисом.\n"
-        f"📈 У нас более ХХХХ объявлений в ХХХ различных категориях.\n"
-        f"🏘 Мы работаем в ХХХХ городах Аргентины.\n\n"
+        f"👥 Уже {count(stats['users'])} пользователей пользуются нашим сервисом.\n"
+        f"📈 У нас {count(stats['products'])} объявлений в {count(stats['categories'])} различных категориях.\n"
+        f"🏘 Мы работаем в {count(stats['cities'])} городах Аргентины.\n\n"
         
         f"Мы стремимся предоставить удобный и безопасный сервис как для покупателей, так и для продавцов.\n"
         f"Цени свое время — используй его с пользой.\n\n"
@@ -89,15 +133,15 @@ async def callback_about(query: types.CallbackQuery):
     )
         ),
         reply_markup=back_kb
-    )
+    ))
     await query.answer()
 
 
 @dp.callback_query(F.data == "help")
 async def callback_help(query: types.CallbackQuery):
-    await query.message.edit_media(
+    await media.send(HELP_PHOTO_URL, lambda photo: query.message.edit_media(
         media=InputMediaPhoto(
-            media=HELP_PHOTO_URL,
+            media=photo,
             caption=(
         "🔍 <b>Справка по использованию Capybara</b>\n\n"
         "Для использования сервиса Capybara Marketplace вам не нужна регистрация или авторизация. Все, что вам нужно — это открыть приложение и наслаждаться покупками и продажами.\n"
@@ -113,7 +157,7 @@ async def callback_help(query: types.CallbackQuery):
     )
         ),
         reply_markup=back_kb
-    )
+    ))
     await query.answer()
 
 
@@ -139,33 +183,42 @@ async def pre_checkout(query: PreCheckoutQuery):
 @dp.message(F.successful_payment)
 async def successful_payment(message: types.Message):
     total = message.successful_payment.total_amount / 100
-    await message.answer_photo(
-        photo=THANKS_PHOTO_URL,
+    await media.send(THANKS_PHOTO_URL, lambda photo: message.answer_photo(
+        photo=photo,
         caption=f"Спасибо за донат ⭐️ {total:.2f} XTR! Ваша поддержка бесценна.",
         reply_markup=back_kb
-    )
+    ))
 
 
 @dp.callback_query(F.data == "back")
 async def callback_back(query: types.CallbackQuery):
-    await query.message.edit_media(
-        media=InputMediaPhoto(
-            media=START_PHOTO_URL,
-            caption=(f"Привет, <b>User</b>! 👋\n\n"
-        f"Добро пожаловать в Capybara Marketplace\n\n"
-        f"Здесь вы можете покупать и продавать товары, "
-        f"общаться с продавцами и находить лучшие предложения.\n\n"
-        f"Нажмите кнопку ниже, чтобы открыть приложение:")
-        ),
+    await media.send(START_PHOTO_URL, lambda photo: query.message.edit_media(
+        media=InputMediaPhoto(media=photo, caption=START_CAPTION),
         reply_markup=start_keyboard()
-    )
+    ))
     await query.answer()
 
 
 async def main():
+    # Вебхук снимается один раз при запуске polling, а не в каждом /start
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    await dp.start_polling(bot, tasks_concurrency_limit=WORKERS)
+
+
+def run_webhook():
+    if not WEBHOOK_SECRET:
+        raise SystemExit("BOT_WEBHOOK_SECRET is required in webhook mode")
+    app = create_app(
+        dp, bot, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET, workers=WORKERS, queue_size=QUEUE_SIZE,
+        webhook_url=WEBHOOK_URL, max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
+    web.run_app(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Capybara Marketplace Telegram bot")
+    parser.add_argument("--webhook", action="store_true", help="aiohttp webhook server instead of long polling")
+    if parser.parse_args().webhook:
+        run_webhook()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,195 @@
+"""
+Фейковый Bot API и генератор обновлений для нагрузки на webhook-режим бота.
+
+Фейковый сервер отвечает на вызовы методов Bot API (с задержкой --api-latency,
+как у настоящего Telegram), генератор шлёт на вебхук обновления /start и
+нажатия кнопок с заданной конкурентностью. Пропускная способность считается
+по вызовам API, которые сделали обработчики: /start — один вызов (sendPhoto),
+кнопка — два (editMessageMedia, answerCallbackQuery).
+
+    BOT_TOKEN=1:fake BOT_API_URL=http://127.0.0.1:8082 BOT_WEBHOOK_SECRET=secret \\
+        python -m capybara_tg_bot.bot --webhook
+    python -m capybara_tg_bot.fake_telegram --secret secret --updates 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from collections import deque
+
+from aiohttp import ClientSession, TCPConnector, web
+
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Capybara', 'username': 'capybara_bot'}
+CALLBACKS = ('about', 'help', 'back')
+CALLS_PER_UPDATE = {'start': 1, 'callback': 2}
+PHOTO_SIZE = {'file_id': 'fake-photo', 'file_unique_id': 'fake-photo', 'width': 800, 'height': 600}
+
+
+def message(chat_id, message_id=1, **fields):
+    return {
+        'message_id': message_id, 'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'}, **fields,
+    }
+
+
+class FakeBotAPI:
+    """
+    Bot API, который отвечает успехом на любой метод и считает вызовы.
+
+    С global_rate и chat_rate отправка сверх лимита (сообщений в секунду всего
+    и в один чат) получает 429 с retry_after, как у Telegram.
+    """
+
+    def __init__(self, latency, global_rate=None, chat_rate=None):
+        self.latency = latency
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.window = deque()
+        self.last_sent = {}
+        self.calls = 0
+        self.uploads = 0
+        self.flooded = 0
+        self.done = asyncio.Event()
+        self.expected = None
+
+    async def handle(self, request):
+        method = request.match_info['method']
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        data = await request.post() if request.content_type != 'application/json' else await request.json()
+        chat_id = int(data.get('chat_id') or 0)
+
+        if method.startswith('send') and self.is_flood(chat_id):
+            self.flooded += 1
+            return web.json_response({
+                'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            }, status=429)
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method in ('sendPhoto', 'editMessageMedia'):
+            self.uploads += self.is_upload(method, data)
+            result = message(chat_id, **{'from': BOT_USER}, photo=[PHOTO_SIZE])
+        elif method.startswith('send') or method.startswith('edit'):
+            result = message(chat_id, **{'from': BOT_USER})
+        else:
+            result = True
+
+        if method not in ('setWebhook', 'deleteWebhook', 'getMe'):
+            self.calls += 1
+            if self.expected is not None and self.calls >= self.expected:
+                self.done.set()
+        return web.json_response({'ok': True, 'result': result})
+
+    def is_flood(self, chat_id):
+        now = time.monotonic()
+        while self.window and now - self.window[0] >= 1:
+            self.window.popleft()
+        if self.global_rate and len(self.window) > self.global_rate:
+            return True
+        # Небольшой допуск на сетевой джиттер между соседними сообщениями
+        if self.chat_rate and now - self.last_sent.get(chat_id, -60) < 0.9 / self.chat_rate:
+            return True
+        self.window.append(now)
+        self.last_sent[chat_id] = now
+        return False
+
+    @staticmethod
+    def is_upload(method, data):
+        """Картинка передана адресом, а не file_id: настоящий Telegram скачал бы её заново."""
+        photo = data.get('photo') if method == 'sendPhoto' else json.loads(data.get('media') or '{}').get('media')
+        return photo != PHOTO_SIZE['file_id']
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
+
+
+def make_update(update_id, rng, users):
+    user_id = rng.randrange(users) + 1000
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}'}
+    if rng.random() < 0.5:
+        update = {'update_id': update_id, 'message': message(user_id, update_id, text='/start', **{'from': user},
+                  entities=[{'type': 'bot_command', 'offset': 0, 'length': 6}])}
+        return update, 'start'
+    update = {'update_id': update_id, 'callback_query': {
+        'id': str(update_id), 'from': user, 'chat_instance': str(user_id), 'data': rng.choice(CALLBACKS),
+        'message': message(user_id, update_id, caption='menu', **{'from': BOT_USER}),
+    }}
+    return update, 'callback'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(options):
+    api = FakeBotAPI(options.api_latency)
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    await web.TCPSite(runner, options.api_host, options.api_port).start()
+
+    rng = random.Random(options.seed)
+    updates = [make_update(update_id, rng, options.users) for update_id in range(1, options.updates + 1)]
+    api.expected = sum(CALLS_PER_UPDATE[kind] for _, kind in updates)
+    counter = itertools.count()
+    latencies, errors = [], 0
+
+    async with ClientSession(connector=TCPConnector(limit=options.concurrency)) as session:
+        async def sender():
+            nonlocal errors
+            while (index := next(counter)) < len(updates):
+                started = time.perf_counter()
+                async with session.post(
+                    options.webhook_url, data=json.dumps(updates[index][0]),
+                    headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': options.secret},
+                ) as response:
+                    errors += response.status != 200
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender() for _ in range(options.concurrency)))
+        accepted = time.perf_counter() - started
+        try:
+            await asyncio.wait_for(api.done.wait(), options.timeout)
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - started
+
+    await runner.cleanup()
+    milliseconds = [latency * 1000 for latency in latencies]
+    print(
+        f"updates: {len(updates)}, webhook errors: {errors}, api calls: {api.calls}/{api.expected}, "
+        f"photos by url: {api.uploads}"
+    )
+    print(f"accepted in {accepted:.2f}s, processed in {elapsed:.2f}s: {len(updates) / elapsed:.1f} updates/s")
+    print(
+        f"webhook response ms: p50 {percentile(milliseconds, 0.5):.1f}, p95 {percentile(milliseconds, 0.95):.1f}, "
+        f"mean {statistics.fmean(milliseconds):.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Фейковый Bot API и нагрузка на webhook-режим бота")
+    parser.add_argument('--webhook-url', default='http://127.0.0.1:8081/webhook', help="Адрес вебхука бота")
+    parser.add_argument('--secret', required=True, help="BOT_WEBHOOK_SECRET проверяемого бота")
+    parser.add_argument('--api-host', default='127.0.0.1', help="Адрес фейкового Bot API")
+    parser.add_argument('--api-port', type=int, default=8082, help="Порт фейкового Bot API")
+    parser.add_argument('--api-latency', type=float, default=0.05, help="Задержка ответа Bot API, секунд")
+    parser.add_argument('--updates', type=int, default=2000, help="Число обновлений")
+    parser.add_argument('--concurrency', type=int, default=40, help="Одновременных запросов к вебхуку (max_connections)")
+    parser.add_argument('--users', type=int, default=500, help="Число разных пользователей в обновлениях")
+    parser.add_argument('--timeout', type=float, default=60, help="Сколько ждать обработки после отправки, секунд")
+    parser.add_argument('--seed', type=int, default=42, help="Seed генератора обновлений")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
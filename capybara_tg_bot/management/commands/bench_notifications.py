@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from capybara_tg_bot.fake_telegram import FakeBotAPI
+from capybara_tg_bot.models import Notification
+from capybara_tg_bot.notifier import Notifier
+
+
+# Чаты бенчмарка: диапазон, которого нет у настоящих пользователей
+BENCH_CHAT_BASE = 9 * 10 ** 15
+KINDS = [kind for kind, _ in Notification.KIND_CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Пропускная способность отправителя уведомлений против фейкового Bot API "
+        "(capybara_tg_bot.fake_telegram), поднятого в этом же процессе. С --limits "
+        "фейковый API отвечает 429 на превышение лимитов Telegram, как настоящий. "
+        "Уведомления бенчмарка удаляются после прогона."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=1000, help="Уведомлений в очереди (по умолчанию 1000)")
+        parser.add_argument('--chats', type=int, default=300, help="Разных получателей (по умолчанию 300)")
+        parser.add_argument('--api-latency', type=float, default=0.05, help="Задержка ответа Bot API, сек")
+        parser.add_argument(
+            '--global-rate', type=float, default=settings.BOT_NOTIFY_GLOBAL_RATE,
+            help=f"Лимит отправителя, сообщений в секунду (по умолчанию {settings.BOT_NOTIFY_GLOBAL_RATE})",
+        )
+        parser.add_argument(
+            '--chat-rate', type=float, default=settings.BOT_NOTIFY_CHAT_RATE,
+            help=f"Лимит на чат, сообщений в секунду (по умолчанию {settings.BOT_NOTIFY_CHAT_RATE})",
+        )
+        parser.add_argument('--limits', action='store_true', help="Фейковый API проверяет лимиты Telegram (30/с, 1/с на чат)")
+
+    def handle(self, *args, **options):
+        if options['notifications'] < 1 or options['chats'] < 1:
+            raise CommandError("--notifications and --chats must be positive")
+
+        bench_chats = Notification.objects.filter(chat_id__gte=BENCH_CHAT_BASE)
+        bench_chats.delete()
+        now = timezone.now()
+        Notification.objects.bulk_create([
+            Notification(
+                chat_id=BENCH_CHAT_BASE + index % options['chats'], kind=KINDS[index % len(KINDS)],
+                text=f"Уведомление №{index}", send_after=now,
+            )
+            for index in range(options['notifications'])
+        ], batch_size=1000)
+
+        try:
+            api, notifier, elapsed = asyncio.run(self.run(options))
+            failed = bench_chats.exclude(status=Notification.STATUS_SENT).count()
+        finally:
+            bench_chats.delete()
+
+        self.stdout.write(
+            f"notifications: {notifier.sent}/{options['notifications']} in {notifier.messages} messages "
+            f"to {options['chats']} chats, not sent: {failed}, 429 responses: {api.flooded}"
+        )
+        self.stdout.write(
+            f"elapsed {elapsed:.2f}s: {notifier.messages / elapsed:.1f} messages/s, "
+            f"{notifier.sent / elapsed:.1f} notifications/s"
+        )
+
+    async def run(self, options):
+        api = FakeBotAPI(
+            options['api_latency'],
+            global_rate=30 if options['limits'] else None, chat_rate=1 if options['limits'] else None,
+        )
+        runner = web.AppRunner(api.app())
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        bot = Bot(
+            token='1:bench',
+            session=AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{port}')),
+        )
+        notifier = Notifier(bot, global_rate=options['global_rate'], chat_rate=options['chat_rate'])
+        pending = Notification.objects.filter(chat_id__gte=BENCH_CHAT_BASE, status=Notification.STATUS_PENDING)
+        started = time.perf_counter()
+        try:
+            # Отложенные после 429 уведомления становятся готовыми не сразу: ждём их
+            while await pending.aexists():
+                await notifier.run(once=True)
+                await asyncio.sleep(0.1)
+            elapsed = time.perf_counter() - started
+        finally:
+            await bot.session.close()
+            await runner.cleanup()
+        return api, notifier, elapsed
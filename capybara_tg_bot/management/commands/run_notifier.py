@@ -0,0 +1,29 @@
+import asyncio
+import logging
+
+from django.core.management.base import BaseCommand
+
+from capybara_tg_bot.notifier import Notifier, create_bot
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет уведомления бота из очереди (Notification) с учётом лимитов Telegram. "
+        "Лимиты считаются в памяти процесса, поэтому на бота запускается один отправитель."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Выйти, когда в очереди не останется готовых уведомлений")
+
+    def handle(self, *args, **options):
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(self.run(options['once']))
+
+    async def run(self, once):
+        bot = create_bot()
+        notifier = Notifier(bot)
+        try:
+            await notifier.run(once=once)
+        finally:
+            await bot.session.close()
+            self.stdout.write(f"Sent {notifier.sent} notifications in {notifier.messages} messages")
@@ -0,0 +1,69 @@
+"""
+Реестр картинок бота: каждая картинка отправляется по адресу один раз,
+дальше бот шлёт сохранённый file_id, и Telegram не скачивает и не
+обрабатывает файл заново на каждое нажатие кнопки.
+"""
+import logging
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+
+from .models import BotMedia
+
+
+logger = logging.getLogger(__name__)
+
+# Фрагменты ошибок Bot API о негодном file_id
+INVALID_FILE_ID_ERRORS = ('file identifier', 'file_id', 'file reference', 'remote file')
+
+
+def is_invalid_file_id(error: TelegramBadRequest) -> bool:
+    message = error.message.lower()
+    return any(fragment in message for fragment in INVALID_FILE_ID_ERRORS)
+
+
+class MediaRegistry:
+    """
+    file_id по адресу картинки: в памяти процесса и в BotMedia.
+
+    send(source, call) вызывает call с file_id, если он известен, иначе с
+    адресом, и запоминает file_id из ответа. Если Telegram отверг file_id,
+    запись удаляется и отправка повторяется по адресу.
+    """
+
+    def __init__(self):
+        self.file_ids = {}
+        self.loaded = False
+
+    async def load(self):
+        self.file_ids = {media.source: media.file_id async for media in BotMedia.objects.all()}
+        self.loaded = True
+
+    async def send(self, source, call):
+        if not self.loaded:
+            await self.load()
+
+        file_id = self.file_ids.get(source)
+        if file_id is None:
+            return await self.remember(source, await call(source))
+        try:
+            return await call(file_id)
+        except TelegramBadRequest as error:
+            if not is_invalid_file_id(error):
+                raise
+            logger.warning("Telegram rejected cached file_id for %s, uploading again", source)
+            await self.forget(source)
+            return await self.remember(source, await call(source))
+
+    async def remember(self, source, result):
+        # edit_media для inline-сообщений возвращает True вместо сообщения
+        if isinstance(result, Message) and result.photo:
+            file_id = result.photo[-1].file_id
+            if self.file_ids.get(source) != file_id:
+                self.file_ids[source] = file_id
+                await BotMedia.objects.aupdate_or_create(source=source, defaults={'file_id': file_id})
+        return result
+
+    async def forget(self, source):
+        self.file_ids.pop(source, None)
+        await BotMedia.objects.filter(source=source).adelete()
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.URLField(max_length=500, unique=True, verbose_name='Source')),
+                ('file_id', models.CharField(max_length=255, verbose_name='File ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Bot media',
+                'verbose_name_plural': 'Bot media',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 04:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_tg_bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='Chat ID')),
+                ('kind', models.CharField(choices=[('moderation', 'Модерация объявления'), ('premium_expiring', 'Премиум заканчивается')], max_length=32, verbose_name='Kind')),
+                ('text', models.TextField(verbose_name='Text')),
+                ('key', models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='Key')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sent', 'Отправлено'), ('failed', 'Не доставлено')], default='pending', max_length=16, verbose_name='Status')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Send after')),
+                ('claim', models.CharField(blank=True, default='', max_length=32, verbose_name='Claim')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent at')),
+            ],
+            options={
+                'verbose_name': 'Notification',
+                'verbose_name_plural': 'Notifications',
+                'indexes': [models.Index(fields=['status', 'send_after'], name='notification_due_idx')],
+            },
+        ),
+    ]
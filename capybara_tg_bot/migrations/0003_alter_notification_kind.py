@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capybara_tg_bot', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('moderation', 'Модерация объявления'), ('premium_expiring', 'Премиум заканчивается'), ('favorite_archived', 'Объявление из избранного в архиве')], max_length=32, verbose_name='Kind'),
+        ),
+    ]
@@ -1,3 +1,71 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class BotMedia(models.Model):
+    """
+    file_id картинки бота в Telegram.
+
+    Ключ — адрес исходного файла (PHOTO_START и т.п.): при смене адреса
+    картинка загружается заново под новым ключом.
+    """
+    source = models.URLField(max_length=500, unique=True, verbose_name="Source")
+    file_id = models.CharField(max_length=255, verbose_name="File ID")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated at")
+
+    class Meta:
+        verbose_name = "Bot media"
+        verbose_name_plural = "Bot media"
+
+    def __str__(self) -> str:
+        return self.source
+
+
+class Notification(models.Model):
+    """
+    Исходящее сообщение бота пользователю.
+
+    Очередь читает отдельный процесс (capybara_tg_bot.notifier): он отправляет
+    сообщения с учётом лимитов Telegram и склеивает ожидающие уведомления
+    одного вида для одного пользователя в одно сообщение.
+    """
+    KIND_MODERATION = 'moderation'
+    KIND_PREMIUM_EXPIRING = 'premium_expiring'
+    KIND_FAVORITE_ARCHIVED = 'favorite_archived'
+    KIND_CHOICES = [
+        (KIND_MODERATION, 'Модерация объявления'),
+        (KIND_PREMIUM_EXPIRING, 'Премиум заканчивается'),
+        (KIND_FAVORITE_ARCHIVED, 'Объявление из избранного в архиве'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает отправки'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Не доставлено'),
+    ]
+
+    chat_id = models.BigIntegerField(verbose_name="Chat ID")
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES, verbose_name="Kind")
+    text = models.TextField(verbose_name="Text")
+    # Не даёт поставить одно и то же уведомление дважды (например, премиум №N заканчивается)
+    key = models.CharField(max_length=100, unique=True, null=True, blank=True, verbose_name="Key")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Status")
+    send_after = models.DateTimeField(default=timezone.now, verbose_name="Send after")
+    claim = models.CharField(max_length=32, blank=True, default='', verbose_name="Claim")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Attempts")
+    last_error = models.TextField(blank=True, default='', verbose_name="Last error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Sent at")
+
+    class Meta:
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='notification_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} → {self.chat_id}"
@@ -0,0 +1,74 @@
+"""
+Постановка уведомлений бота в очередь (Notification).
+
+Модуль не зависит от aiogram: его вызывают сигналы и задачи Django,
+а сообщения отправляет отдельный процесс capybara_tg_bot.notifier.
+"""
+from datetime import timedelta
+from html import escape
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Notification
+
+
+# Заголовок сообщения, под которым склеиваются уведомления одного вида
+HEADERS = {
+    Notification.KIND_MODERATION: "<b>Модерация объявлений</b>",
+    Notification.KIND_PREMIUM_EXPIRING: "<b>Скоро закончится премиум</b>",
+    Notification.KIND_FAVORITE_ARCHIVED: "<b>Избранное перенесено в архив</b>",
+}
+
+
+def enqueue(chat_id, kind, text, key=None):
+    """
+    Ставит уведомление в очередь.
+
+    Отправка откладывается на BOT_NOTIFY_COALESCE_SECONDS, чтобы уведомления,
+    пришедшие подряд, ушли одним сообщением. Уведомление с уже известным key
+    повторно не ставится.
+    """
+    send_after = timezone.now() + timedelta(seconds=settings.BOT_NOTIFY_COALESCE_SECONDS)
+    Notification.objects.bulk_create(
+        [Notification(chat_id=chat_id, kind=kind, text=text, key=key, send_after=send_after)],
+        ignore_conflicts=key is not None,
+    )
+
+
+def expired_notifications(now=None):
+    """Отправленные и недоставленные уведомления старше BOT_NOTIFY_RETENTION_DAYS."""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.BOT_NOTIFY_RETENTION_DAYS)
+    # send_after не раньше создания; по нему фильтрует индекс notification_due_idx
+    return Notification.objects.filter(
+        status__in=[Notification.STATUS_SENT, Notification.STATUS_FAILED], send_after__lt=cutoff,
+    )
+
+
+def notify_moderation(product):
+    """Сообщает автору результат модерации объявления (статус 2 или 3)."""
+    title = escape(product.title)
+    if product.status == 3:
+        text = f"✅ «{title}» опубликовано"
+    elif product.status == 2:
+        text = f"❌ «{title}» отклонено модерацией"
+    else:
+        return
+    enqueue(product.author.telegram_id, Notification.KIND_MODERATION, text)
+
+
+def notify_favorites_archived(favorites):
+    """
+    Сообщает пользователям, что объявления из их избранного перенесены в архив.
+
+    favorites — пары (telegram_id пользователя, название объявления); сообщения
+    одного пользователя склеиваются в одно при отправке.
+    """
+    send_after = timezone.now() + timedelta(seconds=settings.BOT_NOTIFY_COALESCE_SECONDS)
+    Notification.objects.bulk_create([
+        Notification(
+            chat_id=chat_id, kind=Notification.KIND_FAVORITE_ARCHIVED, send_after=send_after,
+            text=f"📦 «{escape(title)}» снято с публикации и перенесено в архив",
+        )
+        for chat_id, title in favorites
+    ])
@@ -0,0 +1,252 @@
+"""
+Отправка уведомлений из очереди Notification с учётом лимитов Telegram.
+
+Запускается отдельным процессом, один на бота, — лимиты считаются в памяти:
+python manage.py run_notifier.
+
+Общий token bucket держит BOT_NOTIFY_GLOBAL_RATE сообщений в секунду,
+у каждого чата свой на BOT_NOTIFY_CHAT_RATE. Ожидающие уведомления одного
+вида для одного чата склеиваются в одно сообщение. При RetryAfter отправка
+приостанавливается на указанное Telegram время, а сообщения чата
+откладываются в базе. Уведомления забираются пачкой на BOT_NOTIFY_LEASE_SECONDS:
+после перезапуска незавершённые пачки снова становятся доступны. Отправленные
+уведомления отмечаются в базе по FLUSH_SIZE за запрос, поэтому отправленные
+незадолго до падения могут прийти повторно.
+
+Раз в BOT_NOTIFY_PURGE_INTERVAL отправитель удаляет отправленные и недоставленные
+уведомления старше BOT_NOTIFY_RETENTION_DAYS (как задача purge_notifications).
+"""
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Notification
+from .notifications import HEADERS, expired_notifications
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+# Сколько отправленных уведомлений отмечать в базе одним запросом
+FLUSH_SIZE = 50
+# Незакрытые сущность (&amp;) или тег в конце обрезанного текста
+CUT_MARKUP = re.compile(r'&[#\w]*$|<[^>]*$')
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity про запас; block приостанавливает выдачу."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.lock = asyncio.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Ожидающие встают в очередь под замком, а не просыпаются все на каждый токен
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def idle(self, now):
+        self.refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+def truncate(text, limit):
+    """Обрезает HTML-текст уведомления до limit символов, не оставляя разрезанных сущностей и тегов."""
+    if len(text) <= limit:
+        return text
+    return CUT_MARKUP.sub('', text[:limit - 1]) + '…'
+
+
+def compose(kind, notifications):
+    """Склеивает уведомления одного вида: [(текст, [id, ...]), ...], каждое не длиннее MESSAGE_LIMIT."""
+    header = HEADERS[kind]
+    # Сообщение длиннее лимита Telegram отклоняет навсегда (BadRequest): слишком длинное уведомление обрезается
+    limit = MESSAGE_LIMIT - len(header) - 2
+    messages, lines, ids = [], [], []
+    for notification in notifications:
+        text = truncate(notification.text, limit)
+        if lines and len(header) + 2 + len('\n'.join(lines + [text])) > MESSAGE_LIMIT:
+            messages.append(('\n\n'.join([header, '\n'.join(lines)]), ids))
+            lines, ids = [], []
+        lines.append(text)
+        ids.append(notification.pk)
+    if lines:
+        messages.append(('\n\n'.join([header, '\n'.join(lines)]), ids))
+    return messages
+
+
+def create_bot():
+    api_url = settings.TELEGRAM_BOT_API_URL
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None
+    return Bot(
+        token=settings.TELEGRAM_BOT_TOKEN, session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+class Notifier:
+    """Отправитель очереди уведомлений; параметры по умолчанию — из настроек BOT_NOTIFY_*."""
+
+    def __init__(self, bot, *, global_rate=None, chat_rate=None, batch_size=None, poll_interval=None):
+        self.bot = bot
+        # Без запаса: сообщения идут равномерно, без всплеска в первую секунду
+        self.global_bucket = TokenBucket(global_rate or settings.BOT_NOTIFY_GLOBAL_RATE, capacity=1)
+        self.chat_rate = chat_rate or settings.BOT_NOTIFY_CHAT_RATE
+        self.chat_buckets = {}
+        self.batch_size = batch_size or settings.BOT_NOTIFY_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.BOT_NOTIFY_POLL_INTERVAL
+        self.delivered = []
+        self.sent = 0
+        self.messages = 0
+        self.next_purge = 0
+
+    async def run(self, once=False):
+        """Обрабатывает очередь; с once — пока в ней есть готовые к отправке уведомления."""
+        while True:
+            await self.purge()
+            if not await self.process_batch():
+                if once:
+                    return
+                await asyncio.sleep(self.poll_interval)
+
+    async def purge(self):
+        """Удаляет старые отправленные и недоставленные уведомления не чаще раза в BOT_NOTIFY_PURGE_INTERVAL."""
+        now = time.monotonic()
+        if now < self.next_purge:
+            return
+        self.next_purge = now + settings.BOT_NOTIFY_PURGE_INTERVAL
+        count, _ = await expired_notifications().adelete()
+        if count:
+            logger.info("Purged %s notifications", count)
+
+    async def claim(self):
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        due = Notification.objects.filter(status=Notification.STATUS_PENDING, send_after__lte=now)
+        # Чаты самых давних уведомлений забираются со всеми готовыми уведомлениями, чтобы их склеить
+        oldest = due.order_by('send_after', 'pk').values_list('chat_id', flat=True)[:self.batch_size]
+        chats = {chat_id async for chat_id in oldest}
+        # Условия повторяются в UPDATE: каждое уведомление забирает только один процесс
+        await due.filter(chat_id__in=chats).aupdate(
+            claim=token, send_after=now + timedelta(seconds=settings.BOT_NOTIFY_LEASE_SECONDS),
+        )
+        return [
+            notification async for notification in
+            Notification.objects.filter(claim=token, status=Notification.STATUS_PENDING).order_by('pk')
+        ]
+
+    async def process_batch(self):
+        """Отправляет одну пачку; возвращает число забранных уведомлений."""
+        notifications = await self.claim()
+        by_chat = defaultdict(lambda: defaultdict(list))
+        for notification in notifications:
+            by_chat[notification.chat_id][notification.kind].append(notification)
+
+        try:
+            await asyncio.gather(*(
+                self.send_chat(chat_id, [message for kind, group in kinds.items() for message in compose(kind, group)])
+                for chat_id, kinds in by_chat.items()
+            ))
+        finally:
+            await self.flush()
+        now = time.monotonic()
+        self.chat_buckets = {chat_id: bucket for chat_id, bucket in self.chat_buckets.items() if not bucket.idle(now)}
+        return len(notifications)
+
+    async def send_chat(self, chat_id, messages):
+        """Сообщения одного чата по порядку; после временной ошибки остальные откладываются."""
+        bucket = self.chat_buckets.setdefault(chat_id, TokenBucket(self.chat_rate, capacity=1))
+        for index, (text, ids) in enumerate(messages):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text)
+            except TelegramRetryAfter as error:
+                logger.warning("Telegram flood control: retry after %s s", error.retry_after)
+                # Лимит может быть общим для бота: пауза и для остальных чатов
+                self.global_bucket.block(error.retry_after)
+                bucket.block(error.retry_after)
+                await self.postpone(messages[index:], error.retry_after, str(error), attempt=False)
+                return
+            except TelegramForbiddenError as error:
+                # Пользователь заблокировал бота: остальные сообщения чата тоже не дойдут
+                await self.fail(messages[index:], str(error))
+                return
+            except TelegramBadRequest as error:
+                await self.fail(messages[index:index + 1], str(error))
+                continue
+            except TelegramAPIError as error:
+                logger.warning("Failed to send notification to %s: %s", chat_id, error)
+                await self.postpone(messages[index:], settings.BOT_NOTIFY_RETRY_DELAY, str(error), attempt=True)
+                return
+
+            self.delivered.extend(ids)
+            self.sent += len(ids)
+            self.messages += 1
+            if len(self.delivered) >= FLUSH_SIZE:
+                await self.flush()
+
+    async def flush(self):
+        """Отмечает отправленные уведомления одним запросом."""
+        ids, self.delivered = self.delivered, []
+        if ids:
+            await Notification.objects.filter(pk__in=ids).aupdate(
+                status=Notification.STATUS_SENT, sent_at=timezone.now(), claim='',
+            )
+
+    async def fail(self, messages, error):
+        ids = [pk for _, message_ids in messages for pk in message_ids]
+        await Notification.objects.filter(pk__in=ids).aupdate(
+            status=Notification.STATUS_FAILED, last_error=error, claim='',
+        )
+
+    async def postpone(self, messages, delay, error, attempt):
+        """Откладывает сообщения на delay секунд; попытка с attempt засчитывается, последняя — провал."""
+        ids = [pk for _, message_ids in messages for pk in message_ids]
+        changes = {'send_after': timezone.now() + timedelta(seconds=delay), 'last_error': error, 'claim': ''}
+        if attempt:
+            changes['attempts'] = F('attempts') + 1
+            changes['status'] = Case(
+                When(attempts__gte=settings.BOT_NOTIFY_MAX_ATTEMPTS - 1, then=Value(Notification.STATUS_FAILED)),
+                default=Value(Notification.STATUS_PENDING),
+            )
+        await Notification.objects.filter(pk__in=ids).aupdate(**changes)
@@ -0,0 +1,6 @@
+from .notifications import expired_notifications
+
+
+def purge_notifications():
+    count, _ = expired_notifications().delete()
+    return f"Purged {count} notifications"
@@ -1,3 +1,133 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .media import MediaRegistry
+from .models import BotMedia, Notification
+from .notifier import MESSAGE_LIMIT, Notifier, compose
+from .tasks import purge_notifications
+from .webhook import SECRET_HEADER, create_app
+
+
+class ComposeTests(TestCase):
+    def notification(self, pk, text):
+        return Notification(pk=pk, chat_id=1, kind=Notification.KIND_MODERATION, text=text)
+
+    def test_groups_within_limit(self):
+        notifications = [self.notification(pk, 'x' * 1000) for pk in range(1, 6)]
+        messages = compose(Notification.KIND_MODERATION, notifications)
+        self.assertEqual([ids for _, ids in messages], [[1, 2, 3, 4], [5]])
+        self.assertTrue(all(len(text) <= MESSAGE_LIMIT for text, _ in messages))
+
+    def test_truncates_oversized_notification(self):
+        text = '«' + 'a' * (MESSAGE_LIMIT - 30) + ' &amp; ' + 'b' * 100
+        messages = compose(Notification.KIND_MODERATION, [self.notification(1, text), self.notification(2, 'ok')])
+        self.assertEqual([ids for _, ids in messages], [[1], [2]])
+        first = messages[0][0]
+        self.assertLessEqual(len(first), MESSAGE_LIMIT)
+        self.assertTrue(first.endswith('…'))
+        self.assertNotRegex(first, r'&[#\w]*…$')
+
+
+class PurgeNotificationsTests(TestCase):
+    def setUp(self):
+        old = timezone.now() - timedelta(days=settings.BOT_NOTIFY_RETENTION_DAYS + 1)
+        self.kept = Notification.objects.bulk_create([
+            Notification(chat_id=1, kind=Notification.KIND_MODERATION, text='pending', send_after=old),
+            Notification(chat_id=1, kind=Notification.KIND_MODERATION, text='recent', status=Notification.STATUS_SENT),
+        ])
+        Notification.objects.bulk_create([
+            Notification(chat_id=1, kind=Notification.KIND_MODERATION, text=status, status=status, send_after=old)
+            for status in (Notification.STATUS_SENT, Notification.STATUS_FAILED)
+        ])
+
+    def assertOnlyKept(self):
+        self.assertQuerySetEqual(Notification.objects.order_by('pk'), self.kept)
+
+    def test_task(self):
+        self.assertEqual(purge_notifications(), "Purged 2 notifications")
+        self.assertOnlyKept()
+
+    def test_notifier_purges_once_per_interval(self):
+        notifier = Notifier(bot=None)
+        async_to_sync(notifier.purge)()
+        self.assertOnlyKept()
+
+        Notification.objects.filter(pk=self.kept[1].pk).update(send_after=timezone.now() - timedelta(days=365))
+        async_to_sync(notifier.purge)()
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class WebhookTests(SimpleTestCase):
+    UPDATE = {'update_id': 1, 'message': {
+        'message_id': 1, 'date': 0, 'chat': {'id': 7, 'type': 'private'},
+        'from': {'id': 7, 'is_bot': False, 'first_name': 'Alice'}, 'text': '/start',
+    }}
+
+    async def post_update(self, headers):
+        dispatcher = mock.Mock(feed_update=mock.AsyncMock())
+        bot = mock.Mock(session=mock.Mock(close=mock.AsyncMock()))
+        app = create_app(dispatcher, bot, path='/webhook', secret='s3cret', workers=2, queue_size=10)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/webhook', json=self.UPDATE, headers=headers)
+        # Выход из клиента останавливает приложение и дожидается принятых обновлений
+        return response.status, dispatcher.feed_update.await_count
+
+    async def test_wrong_secret_is_rejected(self):
+        for headers in ({SECRET_HEADER: 'wrong'}, {}):
+            self.assertEqual(await self.post_update(headers), (401, 0))
+
+    async def test_update_is_processed(self):
+        self.assertEqual(await self.post_update({SECRET_HEADER: 's3cret'}), (200, 1))
+
+
+class MediaRegistryTests(TestCase):
+    SOURCE = 'https://example.com/start.png'
+
+    def message(self, file_id):
+        return Message.model_validate({
+            'message_id': 1, 'date': 0, 'chat': {'id': 7, 'type': 'private'},
+            'photo': [{'file_id': file_id, 'file_unique_id': file_id, 'width': 90, 'height': 90}],
+        })
+
+    def telegram(self, error):
+        """Отправка фото: по адресу возвращает сообщение с file_id 'uploaded', по file_id 'stale' — ошибку."""
+        async def call(photo):
+            if photo == 'stale':
+                raise TelegramBadRequest(mock.Mock(), error)
+            return self.message('uploaded')
+        return mock.AsyncMock(side_effect=call)
+
+    async def test_uploads_once_and_reuses_file_id(self):
+        registry = MediaRegistry()
+        call = self.telegram('unused')
+        await registry.send(self.SOURCE, call)
+        await registry.send(self.SOURCE, call)
+        self.assertEqual([args.args[0] for args in call.await_args_list], [self.SOURCE, 'uploaded'])
+        self.assertEqual((await BotMedia.objects.aget(source=self.SOURCE)).file_id, 'uploaded')
+
+    async def test_invalid_file_id_is_uploaded_again(self):
+        await BotMedia.objects.acreate(source=self.SOURCE, file_id='stale')
+        registry = MediaRegistry()
+        call = self.telegram('Bad Request: wrong file identifier/HTTP URL specified')
+
+        with self.assertLogs('capybara_tg_bot.media', 'WARNING'):
+            result = await registry.send(self.SOURCE, call)
+        self.assertEqual(result.photo[-1].file_id, 'uploaded')
+        self.assertEqual([args.args[0] for args in call.await_args_list], ['stale', self.SOURCE])
+        self.assertEqual([media.file_id async for media in BotMedia.objects.all()], ['uploaded'])
+        self.assertEqual(registry.file_ids, {self.SOURCE: 'uploaded'})
+
+    async def test_other_errors_keep_file_id(self):
+        await BotMedia.objects.acreate(source=self.SOURCE, file_id='stale')
+        registry = MediaRegistry()
+        with self.assertRaises(TelegramBadRequest):
+            await registry.send(self.SOURCE, self.telegram('Bad Request: chat not found'))
+        self.assertEqual((await BotMedia.objects.aget(source=self.SOURCE)).file_id, 'stale')
@@ -0,0 +1,113 @@
+"""
+Webhook-режим бота: aiohttp-сервер принимает обновления от Telegram
+и передаёт их ограниченному числу воркеров (UpdateProcessor).
+"""
+import asyncio
+import hmac
+import logging
+
+from aiohttp import web
+from aiogram.types import Update
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def shard_key(update: Update) -> int:
+    """Пользователь или чат обновления: его обновления идут в один воркер."""
+    try:
+        event = update.event
+    except Exception:
+        return update.update_id
+    user = getattr(event, 'from_user', None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, 'chat', None)
+    return chat.id if chat is not None else update.update_id
+
+
+class UpdateProcessor:
+    """
+    Ограниченная конкурентная обработка обновлений.
+
+    У каждого из workers воркеров своя очередь на queue_size обновлений;
+    обновление попадает в очередь по пользователю (shard_key), поэтому
+    обновления одного пользователя обрабатываются по порядку, а разных —
+    параллельно. Если очередь заполнена, submit ждёт места: Telegram не
+    получает ответ, пока обновление не принято, а число таких запросов
+    ограничено max_connections вебхука.
+    """
+
+    def __init__(self, dispatcher, bot, workers, queue_size):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.queues = [asyncio.Queue(queue_size) for _ in range(workers)]
+        self.tasks = []
+        self.processed = 0
+
+    async def start(self):
+        self.tasks = [asyncio.create_task(self.work(queue)) for queue in self.queues]
+
+    async def stop(self):
+        """Дожидается обработки принятых обновлений и останавливает воркеры."""
+        for queue in self.queues:
+            await queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def submit(self, update: Update):
+        await self.queues[shard_key(update) % len(self.queues)].put(update)
+
+    async def work(self, queue):
+        while True:
+            update = await queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Failed to process update %s", update.update_id)
+            finally:
+                self.processed += 1
+                queue.task_done()
+
+
+def create_app(dispatcher, bot, *, path, secret, workers, queue_size, webhook_url=None, max_connections=40):
+    """
+    aiohttp-приложение вебхука.
+
+    Запросы без правильного секрета (заголовок X-Telegram-Bot-Api-Secret-Token)
+    отклоняются с 401. При запуске регистрирует вебхук на webhook_url с тем же
+    секретом, если адрес задан.
+    """
+    processor = UpdateProcessor(dispatcher, bot, workers, queue_size)
+
+    async def handle_update(request):
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), secret):
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': bot})
+        except ValueError:
+            return web.Response(status=400)
+        await processor.submit(update)
+        return web.Response()
+
+    async def on_startup(app):
+        await processor.start()
+        if webhook_url:
+            await bot.set_webhook(
+                webhook_url, secret_token=secret, max_connections=max_connections,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+            )
+
+    async def on_shutdown(app):
+        await processor.stop()
+        await bot.session.close()
+
+    app = web.Application()
+    app['processor'] = processor
+    app.router.add_post(path, handle_update)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
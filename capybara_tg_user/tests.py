@@ -1,3 +1,57 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.testing import HTTPStackMixin, sign_init_data
+
+from capybara_countries.models import City, Country
+
+from .models import TelegramUser
+
+
+BOT_TOKEN = '0:test-token'
+
+
+@override_settings(TELEGRAM_BOT_TOKEN=BOT_TOKEN)
+class TelegramAuthTests(HTTPStackMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Новый пользователь получает страну и город по умолчанию (pk=1)
+        country = Country.objects.create(pk=1, name='Argentina')
+        City.objects.create(pk=1, name='Buenos Aires', country=country)
+
+    def authenticate(self, init_data):
+        return self.client.post(
+            reverse('telegram-auth'), data={'initData': init_data}, content_type='application/json'
+        )
+
+    def init_data(self, **user):
+        return sign_init_data({'auth_date': '1735689600', 'user': json.dumps(user)}, BOT_TOKEN)
+
+    def test_creates_user_and_sets_cookies(self):
+        response = self.authenticate(self.init_data(id=42, username='carol', first_name='Carol'))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('access_token', response.cookies)
+        self.assertIn('refresh_token', response.cookies)
+        user = TelegramUser.objects.get(telegram_id=42)
+        self.assertEqual((user.username, user.first_name), ('carol', 'Carol'))
+
+    def test_updates_username_on_repeat_login(self):
+        TelegramUser.objects.create(telegram_id=42, username='carol')
+        response = self.authenticate(self.init_data(id=42, username='carol_new'))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(TelegramUser.objects.get(telegram_id=42).username, 'carol_new')
+
+    def test_rejects_bad_signature(self):
+        init_data = sign_init_data({'user': json.dumps({'id': 42})}, '0:other-token')
+        self.assertEqual(self.authenticate(init_data).status_code, 403)
+        self.assertFalse(TelegramUser.objects.exists())
+
+    def test_requires_init_data(self):
+        self.assertEqual(self.authenticate('').status_code, 400)
+
+
+class TelegramAuthASGITests(TelegramAuthTests):
+    async_views = True
@@ -12,6 +12,9 @@ from urllib.parse import parse_qs
 from rest_framework import viewsets, mixins
 from rest_framework.permissions import IsAuthenticated
 
+from api.asyncviews import AsyncAPIView
+from api.replicas import ReplicaReadsMixin
+
 from .models import TelegramUser, UserRating
 from .serializers import (TelegramUserSerializer, 
     UserRatingSerializer, UserRatingCreateUpdateSerializer)
@@ -23,7 +26,7 @@ from .verify_telegram import verify_telegram_init_data
 logger = logging.getLogger(__name__)
 
 
-class TelegramAuthView(APIView):
+class TelegramAuthView(AsyncAPIView):
     """
     API для регистрации пользователя.
 
@@ -31,15 +34,42 @@ class TelegramAuthView(APIView):
     Получает initData от фронтенда, проверяет его и выдаёт JWT-токены.
     """
     def post(self, request):
+        user_data, error = self.read_user_data(request)
+        if error is not None:
+            return error
+        # 3
+        user, created = TelegramUser.objects.get_or_create(
+            telegram_id=user_data['id'], defaults=self.user_defaults(user_data)
+        )
+        if not created:
+            self.update_user(user, user_data)
+            user.save()
+        return self.login_response(user)
+
+    async def apost(self, request):
+        user_data, error = self.read_user_data(request)
+        if error is not None:
+            return error
+        # 3
+        user, created = await TelegramUser.objects.aget_or_create(
+            telegram_id=user_data['id'], defaults=self.user_defaults(user_data)
+        )
+        if not created:
+            self.update_user(user, user_data)
+            await user.asave()
+        return self.login_response(user)
+
+    def read_user_data(self, request):
+        """Проверяет initData и возвращает (данные пользователя Telegram, None) или (None, ответ с ошибкой)."""
         init_data = request.data.get('initData')
         if not init_data:
             logger.error("No initData provided")
-            return Response({'error': 'No initData provided'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, Response({'error': 'No initData provided'}, status=status.HTTP_400_BAD_REQUEST)
         # 1
         bot_token = settings.TELEGRAM_BOT_TOKEN
         if not verify_telegram_init_data(init_data, bot_token):
             logger.error("Invalid initData")
-            return Response({"detail": "Invalid init_data"}, status=status.HTTP_403_FORBIDDEN)
+            return None, Response({"detail": "Invalid init_data"}, status=status.HTTP_403_FORBIDDEN)
 
         # 2
         params = parse_qs(init_data, keep_blank_values=True)
@@ -47,31 +77,33 @@ class TelegramAuthView(APIView):
         user_json = params.get('user')
         if not user_json:
             logger.error("No user data provided")
-            return Response({"detail": "No user data provided"}, status=status.HTTP_400_BAD_REQUEST)
+            return None, Response({"detail": "No user data provided"}, status=status.HTTP_400_BAD_REQUEST)
         user_data = json.loads(user_json)
 
-        tg_id = user_data.get('id')
-        if not tg_id:
+        if not user_data.get('id'):
             logger.error("No Telegram ID provided")
-            return Response({"detail": "No Telegram ID provided"}, status=status.HTTP_400_BAD_REQUEST)
-        # 3
-        user, created = TelegramUser.objects.get_or_create(telegram_id=tg_id, defaults={
-            "username": user_data.get('username') or f"tg_{tg_id}",
+            return None, Response({"detail": "No Telegram ID provided"}, status=status.HTTP_400_BAD_REQUEST)
+        return user_data, None
+
+    def user_defaults(self, user_data):
+        return {
+            "username": user_data.get('username') or f"tg_{user_data['id']}",
             "first_name": user_data.get('first_name', ''),
             "last_name": user_data.get('last_name', ''),
             "language": user_data.get('language_code', ''),
-        })
-        if not created:
-            # При повторном входе можно обновить имя/юзернейм на случай изменений в Telegram
-            # user.first_name = user_data.get('first_name', user.first_name)
-            # user.last_name  = user_data.get('last_name', user.last_name)
-            uname = user_data.get('username')
-            # user.language = user_data.get('language_code', '')
-
-            if uname:
-                user.username = uname
-            user.save()
+        }
+
+    def update_user(self, user, user_data):
+        """При повторном входе можно обновить имя/юзернейм на случай изменений в Telegram."""
+        # user.first_name = user_data.get('first_name', user.first_name)
+        # user.last_name  = user_data.get('last_name', user.last_name)
+        uname = user_data.get('username')
+        # user.language = user_data.get('language_code', '')
+
+        if uname:
+            user.username = uname
 
+    def login_response(self, user):
         # 4 
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
@@ -118,7 +150,8 @@ class TokenRefreshFromCookieView(APIView):
 
 
 
-class UserViewSet(mixins.ListModelMixin,
+class UserViewSet(ReplicaReadsMixin,
+                  mixins.ListModelMixin,
                   mixins.RetrieveModelMixin,
                   mixins.UpdateModelMixin,
                   viewsets.GenericViewSet):
@@ -127,6 +160,7 @@ class UserViewSet(mixins.ListModelMixin,
     
     Предоставляет доступ к списку пользователей, детальной информации о пользователе,
     а также возможность обновления данных пользователя (только для самого пользователя).
+    Чтения идут на реплику базы (api.replicas).
     """
     queryset = TelegramUser.objects.all()
     serializer_class = TelegramUserSerializer